@@ -0,0 +1,15 @@
+from pyinfra import local
+from pyinfra.context import host
+
+from nullforge.molds.utils import ensure_features
+
+
+def cast_dns_bench() -> None:
+    """Cast the DNS benchmark against the resolver of the configured DNS mode."""
+
+    host.data.features = ensure_features(getattr(host.data, "features", None))
+
+    local.include("nullforge/runes/dns_bench.py")
+
+
+cast_dns_bench()
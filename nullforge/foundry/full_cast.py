@@ -1,7 +1,6 @@
 from pyinfra import local
 from pyinfra.context import host
 
-from nullforge.models.dns import DnsMode
 from nullforge.molds.utils import ensure_features, ensure_system
 
 
@@ -20,15 +19,24 @@ def cast_full() -> None:
 
     local.include("nullforge/runes/netsec.py")
 
+    # Included with partitioning off too, so slices and drop-ins from an earlier cast are removed
+    local.include("nullforge/runes/resources.py")
+
+    if host.data.system.memory.enabled:
+        local.include("nullforge/runes/memory.py")
+
     if host.data.features.profiles.for_root or host.data.features.profiles.for_user:
         local.include("nullforge/runes/profiles.py")
 
-    if host.data.features.dns.mode != DnsMode.NONE:
-        local.include("nullforge/runes/dns.py")
+    # Included with mode none too, so warming units left from an earlier mode are removed
+    local.include("nullforge/runes/dns.py")
 
     if host.data.features.warp.install:
         local.include("nullforge/runes/warp.py")
 
+    if host.data.features.tunnel.install:
+        local.include("nullforge/runes/tunnel.py")
+
     if host.data.features.haproxy.install:
         local.include("nullforge/runes/haproxy.py")
 
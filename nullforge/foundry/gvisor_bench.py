@@ -0,0 +1,15 @@
+from pyinfra import local
+from pyinfra.context import host
+
+from nullforge.molds.utils import ensure_features
+
+
+def cast_gvisor_bench() -> None:
+    """Cast the runc vs runsc benchmark with the configured gVisor settings."""
+
+    host.data.features = ensure_features(getattr(host.data, "features", None))
+
+    local.include("nullforge/runes/gvisor_bench.py")
+
+
+cast_gvisor_bench()
@@ -18,6 +18,25 @@ class ContainersRuntimeType(StrEnum):
     GVISOR = "gvisor"
 
 
+class GvisorPlatform(StrEnum):
+    """gVisor platform intercepting the sandboxed application's syscalls."""
+
+    AUTO = "auto"
+    """KVM when /dev/kvm exists, systrap otherwise."""
+    SYSTRAP = "systrap"
+    KVM = "kvm"
+    PTRACE = "ptrace"
+
+
+class GvisorNetwork(StrEnum):
+    """gVisor network stack."""
+
+    SANDBOX = "sandbox"
+    """gVisor's own user-space netstack (isolated)."""
+    HOST = "host"
+    """Host kernel network stack (faster, less isolated)."""
+
+
 class _ContainersBackendBase(BaseModel):
     """Base for a containers backend."""
 
@@ -46,6 +65,17 @@ ContainersBackend = Annotated[
 ]
 
 
+class RegistryCacheUpstream(BaseModel):
+    """An upstream registry fronted by the pull-through registry cache."""
+
+    name: str = Field(pattern=r"^[a-z0-9-]+$", description="Short name used for the cache unit and data directory")
+    registry: str = Field(description="Registry host clients pull from, e.g. docker.io")
+    remote_url: str = Field(description="URL the cache proxies to")
+    port: int = Field(ge=1, le=65535, description="Port the cache for this registry listens on")
+    username: str | None = Field(default=None, description="Upstream username (raises Docker Hub rate limits)")
+    password: str | None = Field(default=None, description="Upstream password or access token")
+
+
 def containers_backend_factory(type: ContainersBackendType) -> ContainersBackend:
     """Factory function for containers backends."""
 
@@ -26,6 +26,14 @@ class DnsProvider(StrEnum):
     QUAD9 = "quad9"
 
 
+class DnsCacheMode(StrEnum):
+    """systemd-resolved `Cache=` values."""
+
+    YES = "yes"
+    NO = "no"
+    NO_NEGATIVE = "no-negative"
+
+
 class _DnsServerBase(BaseModel):
     """Base for a DNS server."""
 
@@ -58,6 +66,15 @@ class DnsServerDoT(_DnsServerBase):
     port: int = Field(default=853, ge=1, le=65535, description="TLS port")
     sni: str | None = Field(default=None, description="Optional SNI/hostname for TLS verification")
 
+    @property
+    def resolved_address(self) -> str:
+        """Server address in systemd-resolved `DNS=` notation (`ip[:port][#sni]`)."""
+
+        address = str(self.host)
+        if self.port != 853:
+            address = f"[{address}]:{self.port}" if ":" in address else f"{address}:{self.port}"
+        return f"{address}#{self.sni}" if self.sni else address
+
 
 DnsServer = Annotated[
     DnsServerDoH | DnsServerDoT | DnsServerDoU,
@@ -0,0 +1,23 @@
+"""Shell profiles configuration models."""
+
+from enum import StrEnum
+
+from pydantic import BaseModel, Field
+
+
+class ShellFrameworkKind(StrEnum):
+    OH_MY_ZSH = "oh-my-zsh"
+    ZSH_PLUGIN = "zsh-plugin"
+    TPM = "tpm"
+
+
+class ShellFramework(BaseModel):
+    """A git-hosted shell framework or plugin installed into the profiles."""
+
+    name: str = Field(
+        pattern=r"^[A-Za-z0-9._-]+$",
+        description="Checkout directory name; for zsh plugins also the plugin name",
+    )
+    kind: ShellFrameworkKind = Field(description="What the checkout is and where it is installed")
+    src: str = Field(description="Git repository URL")
+    ref: str = Field(default="master", description="Branch, tag or commit to track")
@@ -0,0 +1,47 @@
+"""Resource partitioning configuration models."""
+
+from pydantic import BaseModel, Field
+
+
+PROXY_SLICE = "proxy.slice"
+"""Slice holding the proxy and tunnel services."""
+
+CONTAINERS_SLICE = "containers.slice"
+"""Slice holding the container engine and its containers."""
+
+
+class SliceLimits(BaseModel):
+    """cgroup v2 resource controls applied to a systemd slice."""
+
+    cpu_weight: int | None = Field(
+        default=None,
+        ge=1,
+        le=10000,
+        description="CPUWeight= share under contention (default 100)",
+    )
+    cpu_quota: str | None = Field(
+        default=None,
+        description="CPUQuota= hard cap, e.g. 200% for two CPUs",
+    )
+    allowed_cpus: str | None = Field(
+        default=None,
+        description="AllowedCPUs= cpuset, e.g. 0-1",
+    )
+    memory_low: str | None = Field(
+        default=None,
+        description="MemoryLow= amount protected from reclaim, e.g. 256M",
+    )
+    memory_high: str | None = Field(
+        default=None,
+        description="MemoryHigh= throttling threshold, e.g. 75% or 4G",
+    )
+    memory_max: str | None = Field(
+        default=None,
+        description="MemoryMax= hard limit that triggers the OOM killer",
+    )
+    io_weight: int | None = Field(
+        default=None,
+        ge=1,
+        le=10000,
+        description="IOWeight= share of block IO under contention (default 100)",
+    )
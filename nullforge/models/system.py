@@ -0,0 +1,113 @@
+"""Base system configuration models."""
+
+from enum import StrEnum
+
+from pydantic import BaseModel, Field
+
+
+class DpkgSyncMode(StrEnum):
+    """How dpkg syncs unpacked files to disk during the initial cast."""
+
+    SAFE = "safe"
+    UNSAFE_IO = "unsafe_io"
+    EATMYDATA = "eatmydata"
+
+
+class AptUpgradePolicy(StrEnum):
+    """When a cast runs a full apt upgrade."""
+
+    ALWAYS = "always"
+    NEVER = "never"
+    TTL = "ttl"
+
+
+class SwapMode(StrEnum):
+    """Compressed swap backing the memory profile."""
+
+    NONE = "none"
+    ZRAM = "zram"
+    ZSWAP = "zswap"
+
+
+class SwapCompressor(StrEnum):
+    """Compression algorithm for zram or zswap."""
+
+    LZ4 = "lz4"
+    ZSTD = "zstd"
+
+
+class OomKiller(StrEnum):
+    """Userspace OOM killer acting before the kernel one."""
+
+    NONE = "none"
+    SYSTEMD_OOMD = "systemd_oomd"
+    EARLYOOM = "earlyoom"
+
+
+def _default_earlyoom_avoid() -> list[str]:
+    return ["sshd", "systemd", "usque", "warp-svc", "cloudflared", "tor", "xray", "haproxy"]
+
+
+class MemoryProfile(BaseModel):
+    """Memory-pressure settings for small hosts; unset sysctls are derived from the installed RAM."""
+
+    enabled: bool = Field(
+        default=False,
+        description="Whether to apply the memory profile",
+    )
+    swap: SwapMode = Field(
+        default=SwapMode.ZRAM,
+        description="Compressed swap to configure",
+    )
+    compressor: SwapCompressor = Field(
+        default=SwapCompressor.ZSTD,
+        description="Compression algorithm of the zram device or the zswap pool",
+    )
+    zram_percent: int = Field(
+        default=50,
+        ge=10,
+        le=200,
+        description="Size of the zram device as a share of RAM",
+    )
+    zswap_pool_percent: int = Field(
+        default=20,
+        ge=1,
+        le=50,
+        description="Largest share of RAM the zswap pool may take",
+    )
+    swapfile_mb: int = Field(
+        default=1024,
+        ge=64,
+        description="Size of the swapfile created for zswap when the host has no swap",
+    )
+    swappiness: int | None = Field(
+        default=None,
+        ge=0,
+        le=200,
+        description="vm.swappiness; derived from the swap mode and RAM when unset",
+    )
+    vfs_cache_pressure: int | None = Field(
+        default=None,
+        ge=1,
+        le=1000,
+        description="vm.vfs_cache_pressure; derived from RAM when unset",
+    )
+    min_free_kbytes: int | None = Field(
+        default=None,
+        ge=1024,
+        description="vm.min_free_kbytes; derived from RAM when unset",
+    )
+    oom_killer: OomKiller = Field(
+        default=OomKiller.EARLYOOM,
+        description="Userspace OOM killer to enable",
+    )
+    earlyoom_avoid: list[str] = Field(
+        default_factory=_default_earlyoom_avoid,
+        description="Process names earlyoom avoids killing",
+    )
+    proxy_oom_score_adjust: int = Field(
+        default=-500,
+        ge=-1000,
+        le=0,
+        description="OOMScoreAdjust= given to the proxy and tunnel services",
+    )
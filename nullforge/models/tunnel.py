@@ -0,0 +1,15 @@
+"""Cloudflare Zero Trust tunnel configuration models."""
+
+from enum import StrEnum
+
+
+class TunnelProtocol(StrEnum):
+    AUTO = "auto"
+    QUIC = "quic"
+    HTTP2 = "http2"
+
+
+class TunnelEdgeIpVersion(StrEnum):
+    AUTO = "auto"
+    V4 = "4"
+    V6 = "6"
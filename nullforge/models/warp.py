@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 class WarpEngineType(StrEnum):
     WIREGUARD = "wireguard"
     MASQUE = "masque"
+    AUTO = "auto"
 
 
 class _WarpEngineBase(BaseModel):
@@ -19,7 +20,10 @@ class _WarpEngineBase(BaseModel):
     config_dir: str = Field(description="The path to the WARP configuration directory")
     systemd_service_name: str = Field(description="The name of the systemd service")
     policy_script: str = Field(default="", description="The path to the WARP policy script")
-    health_check_script: str = Field(default="", description="The path to the WARP health check script")
+    health_check_script: str = Field(default="", description="The path to the WARP health checker")
+    health_check_service_name: str = Field(default="", description="The name of the health checker systemd service")
+    mtu_overhead: int = Field(default=0, description="Encapsulation overhead in bytes over an IPv4 path")
+    max_mtu: int = Field(default=1280, description="The largest tunnel MTU the engine supports")
 
     @property
     def config_path(self) -> str:
@@ -40,7 +44,10 @@ class MasqueWarpEngine(_WarpEngineBase):
     config_dir: Literal["/etc/usque"] = "/etc/usque"
     systemd_service_name: Literal["cloudflare-warp"] = "cloudflare-warp"
     policy_script: Literal["/etc/usque/warp-v6-policy.sh"] = "/etc/usque/warp-v6-policy.sh"
-    health_check_script: Literal["/etc/usque/warp-check.sh"] = "/etc/usque/warp-check.sh"
+    health_check_script: Literal["/usr/local/lib/nullforge/warp-health.py"] = "/usr/local/lib/nullforge/warp-health.py"
+    health_check_service_name: Literal["cloudflare-warp-health"] = "cloudflare-warp-health"
+    mtu_overhead: Literal[80] = 80
+    max_mtu: Literal[1280] = 1280
 
 
 class WireguardWarpEngine(_WarpEngineBase):
@@ -49,7 +56,39 @@ class WireguardWarpEngine(_WarpEngineBase):
     config_dir: Literal["/etc/wgcf"] = "/etc/wgcf"
     systemd_service_name: Literal["wg-quick@warp"] = "wg-quick@warp"
     policy_script: Literal[""] = ""
-    health_check_script: Literal[""] = ""
+    health_check_script: Literal["/usr/local/lib/nullforge/warp-health.py"] = "/usr/local/lib/nullforge/warp-health.py"
+    health_check_service_name: Literal["cloudflare-warp-health"] = "cloudflare-warp-health"
+    mtu_overhead: Literal[60] = 60
+    max_mtu: Literal[1420] = 1420
+
+
+class WarpTunnel(BaseModel):
+    """A single tunnel instance of a WARP engine."""
+
+    index: int | None = Field(default=None, description="Instance index, or None for a single tunnel")
+    iface: str = Field(description="The name of the tunnel network interface")
+    config_dir: str = Field(description="The path to the instance configuration directory")
+    systemd_service_name: str = Field(description="The name of the instance systemd service")
+    health_check_service_name: str = Field(description="The name of the instance health checker service")
+
+    @property
+    def config_path(self) -> str:
+        return f"{self.config_dir}/config.json"
+
+    @property
+    def account_path(self) -> str:
+        return f"{self.config_dir}/wgcf-account.toml"
+
+    @property
+    def profile_path(self) -> str:
+        return f"{self.config_dir}/warp.conf"
+
+    def state_name(self, kind: str) -> str:
+        """Name of the per-instance state file for the given kind of measurement."""
+
+        if self.index is None:
+            return f"warp-{kind}.env"
+        return f"warp-{kind}-{self.iface}.env"
 
 
 WarpEngine = Annotated[
@@ -64,3 +103,5 @@ def warp_engine_factory(type: WarpEngineType) -> WarpEngine:
             return MasqueWarpEngine()
         case WarpEngineType.WIREGUARD:
             return WireguardWarpEngine()
+        case WarpEngineType.AUTO:
+            raise ValueError("The auto WARP engine must be resolved to a concrete engine first")
@@ -6,8 +6,10 @@ from .features import FeaturesMold
 from .haproxy import HaproxyMold
 from .netsec import NetSecMold
 from .profiles import ProfilesMold
+from .resources import ResourcesMold
 from .system import SystemMold
 from .tor import TorMold
+from .tunnel import TunnelMold
 from .user import UserMold
 from .warp import WarpMold
 from .xray import XrayCoreMold
@@ -20,8 +22,10 @@ __all__ = [
     "HaproxyMold",
     "NetSecMold",
     "ProfilesMold",
+    "ResourcesMold",
     "SystemMold",
     "TorMold",
+    "TunnelMold",
     "UserMold",
     "WarpMold",
     "XrayCoreMold",
@@ -1,16 +1,44 @@
 """Containers configuration mold."""
 
+from ipaddress import IPv4Address
 from typing import TYPE_CHECKING
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
-from nullforge.models.containers import ContainersBackendType, containers_backend_factory
+from nullforge.models.containers import (
+    ContainersBackendType,
+    GvisorNetwork,
+    GvisorPlatform,
+    RegistryCacheUpstream,
+    containers_backend_factory,
+)
 
 
 if TYPE_CHECKING:
     from nullforge.models.containers import ContainersBackend
 
 
+def _default_ulimits() -> dict[str, int]:
+    return {"nofile": 1048576}
+
+
+def _default_registry_cache_upstreams() -> list[RegistryCacheUpstream]:
+    return [
+        RegistryCacheUpstream(
+            name="dockerhub",
+            registry="docker.io",
+            remote_url="https://registry-1.docker.io",
+            port=5000,
+        ),
+        RegistryCacheUpstream(
+            name="ghcr",
+            registry="ghcr.io",
+            remote_url="https://ghcr.io",
+            port=5001,
+        ),
+    ]
+
+
 class ContainersMold(BaseModel):
     """Containers configuration mold."""
 
@@ -26,6 +54,147 @@ class ContainersMold(BaseModel):
         default=True,
         description="Whether to install skopeo",
     )
+    preload_images: list[str] = Field(
+        default_factory=list,
+        description="Images (name:tag) fetched once on the controller and loaded into the backend's image store",
+    )
+    gvisor: bool = Field(
+        default=True,
+        description="Whether to install gVisor and register runsc as a Docker runtime",
+    )
+    gvisor_default_runtime: bool = Field(
+        default=False,
+        description="Whether runsc is Docker's default runtime instead of runc",
+    )
+    gvisor_platform: GvisorPlatform = Field(
+        default=GvisorPlatform.AUTO,
+        description="gVisor platform; auto picks KVM when /dev/kvm exists and systrap otherwise",
+    )
+    gvisor_network: GvisorNetwork = Field(
+        default=GvisorNetwork.SANDBOX,
+        description="gVisor network stack; host trades isolation for throughput",
+    )
+    gvisor_overlay: str = Field(
+        default="root:self",
+        description="runsc --overlay2 value, e.g. root:self (file-backed), root:memory or none",
+    )
+    gvisor_extra_args: list[str] = Field(
+        default_factory=list,
+        description="Extra runsc flags passed through the Docker runtime registration",
+    )
+    gvisor_bench_image: str = Field(
+        default="alpine:3",
+        description="Image the runc vs runsc microbenchmark runs in",
+    )
+    gvisor_bench_url: str = Field(
+        default="https://speed.cloudflare.com/__down?bytes=25000000",
+        description="URL the runc vs runsc microbenchmark downloads to measure network throughput",
+    )
+    storage_driver: str | None = Field(
+        default=None,
+        description="Docker storage driver; unset leaves the choice to dockerd and keeps existing images usable",
+    )
+    log_driver: str = Field(
+        default="local",
+        description="Docker log driver; 'local' is compressed and rotated by default",
+    )
+    log_max_size: str = Field(
+        default="20m",
+        description="Size at which a container log file is rotated",
+    )
+    log_max_file: int = Field(
+        default=5,
+        ge=1,
+        description="Number of rotated log files kept per container",
+    )
+    log_compress: bool = Field(
+        default=True,
+        description="Whether rotated container logs are compressed",
+    )
+    max_concurrent_downloads: int = Field(
+        default=10,
+        ge=1,
+        description="Maximum concurrent layer downloads per pull",
+    )
+    max_concurrent_uploads: int = Field(
+        default=10,
+        ge=1,
+        description="Maximum concurrent layer uploads per push",
+    )
+    live_restore: bool = Field(
+        default=True,
+        description="Keep containers running while the Docker daemon restarts (not compatible with swarm mode)",
+    )
+    userland_proxy: bool = Field(
+        default=False,
+        description="Whether to use docker-proxy for published ports instead of iptables/hairpin NAT only",
+    )
+    default_ulimits: dict[str, int] = Field(
+        default_factory=_default_ulimits,
+        description="Default container ulimits (soft and hard), e.g. {'nofile': 1048576}",
+    )
+    registry_mirrors: list[str] = Field(
+        default_factory=list,
+        description="Docker Hub registry mirror URLs",
+    )
+    registry_cache: bool = Field(
+        default=False,
+        description="Whether this node serves a pull-through registry cache for the other nodes",
+    )
+    registry_cache_image: str = Field(
+        default="registry:2",
+        description="Registry image the pull-through cache runs",
+    )
+    registry_cache_upstreams: list[RegistryCacheUpstream] = Field(
+        default_factory=_default_registry_cache_upstreams,
+        description="Upstream registries proxied by the cache, one listening port each",
+    )
+    registry_cache_dir: str = Field(
+        default="/var/lib/nullforge/registry-cache",
+        description="Where the cached blobs are stored",
+    )
+    registry_cache_ttl: str = Field(
+        default="168h",
+        description="How long a cached image is kept after it was last pulled (proxy.ttl)",
+    )
+    registry_cache_max_size_gb: int = Field(
+        default=50,
+        ge=1,
+        description="Size cap of the cache; the cache is reset once it grows past it",
+    )
+    registry_cache_listen: IPv4Address = Field(
+        default=IPv4Address("127.0.0.1"),
+        description="Address the cache ports are published on; set a routable one to serve other nodes",
+    )
+    registry_cache_allow_from: list[str] = Field(
+        default_factory=list,
+        description="Networks allowed to the cache ports when not published on loopback; empty keeps them closed",
+    )
+    registry_cache_host: str | None = Field(
+        default=None,
+        description="Host of the pull-through cache this node pulls through; defaults to itself when serving",
+    )
+
+    @field_validator("preload_images")
+    @classmethod
+    def _valid_preload_images(cls, v: list[str]) -> list[str]:
+        for image in v:
+            if "@" in image:
+                raise ValueError(
+                    f"preload image {image} is a digest reference; docker load can only store images under a "
+                    "name:tag, so pin a tag instead"
+                )
+        return v
+
+    @property
+    def registry_cache_endpoint(self) -> str | None:
+        """Host clients reach the pull-through cache on, or None when no cache is used."""
+
+        if self.registry_cache_host:
+            return self.registry_cache_host
+        if not self.registry_cache:
+            return None
+        return "127.0.0.1" if self.registry_cache_listen.is_unspecified else str(self.registry_cache_listen)
 
     @property
     def backend(self) -> "ContainersBackend":
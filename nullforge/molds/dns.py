@@ -1,8 +1,25 @@
 """DNS configuration mold."""
 
-from pydantic import BaseModel, Field
+from typing import Annotated
 
-from nullforge.models.dns import DnsMode, DnsProtocol, DnsProvider, DnsServer
+from pydantic import BaseModel, Field, conlist
+
+from nullforge.models.dns import DnsCacheMode, DnsMode, DnsProtocol, DnsProvider, DnsServer
+
+
+def _default_bench_domains() -> list[str]:
+    """Get the default DNS benchmark query names."""
+
+    return [
+        "cloudflare.com",
+        "google.com",
+        "github.com",
+        "wikipedia.org",
+        "debian.org",
+        "ubuntu.com",
+        "apple.com",
+        "microsoft.com",
+    ]
 
 
 class DnsMold(BaseModel):
@@ -20,6 +37,58 @@ class DnsMold(BaseModel):
         default=False,
         description="Enable ECS (EDNS Client Subnet) for Quad9 provider.",
     )
+    cache: DnsCacheMode = Field(
+        default=DnsCacheMode.YES,
+        description="systemd-resolved cache mode; 'no-negative' disables caching of negative answers.",
+    )
+    cache_from_localhost: bool = Field(
+        default=True,
+        description="Cache answers from localhost upstreams (required to cache DoH via cloudflared).",
+    )
+    stale_retention_sec: int = Field(
+        default=0,
+        ge=0,
+        description="Serve expired records for up to this many seconds while refreshing them (0 disables).",
+    )
+    warm_domains: list[str] = Field(
+        default_factory=list,
+        description="Hot domains pre-resolved into the local cache at boot and after DNS service restarts",
+    )
+    warm_interval: int = Field(
+        default=0,
+        ge=0,
+        description="Re-warm the hot domains every this many seconds, ideally below their TTLs (0 disables)",
+    )
+    warm_parallelism: int = Field(
+        default=8,
+        ge=1,
+        description="Number of hot domains resolved in parallel",
+    )
+    bench_domains: Annotated[list[str], conlist(str, min_length=1)] = Field(
+        default_factory=_default_bench_domains,
+        description="Query names the DNS benchmark cycles through",
+    )
+    bench_queries: int = Field(
+        default=2000,
+        ge=1,
+        description="Total number of queries per benchmark run",
+    )
+    bench_concurrency: int = Field(
+        default=16,
+        ge=1,
+        description="Number of concurrent benchmark clients",
+    )
+    bench_miss_ratio: float = Field(
+        default=0.1,
+        ge=0,
+        le=1,
+        description="Share of benchmark queries using unique, uncacheable names",
+    )
+    bench_offline: bool = Field(
+        default=False,
+        description="Point the resolvers under test at a bundled local stand-in instead of their real upstreams "
+        "(other lookups fail while it runs)",
+    )
 
     # Internal fields
     upstreams: list[DnsServer] | None = Field(
@@ -27,8 +96,32 @@ class DnsMold(BaseModel):
         description="Primary upstream servers.",
     )
 
+    @property
+    def proxy_port(self) -> int | None:
+        """Port the cloudflared DoH proxy listens on, if the mode uses it."""
+
+        match self.mode:
+            case DnsMode.DOH_RESOLVED:
+                return 5053
+            case DnsMode.DOH_RAW:
+                return 53
+            case _:
+                return None
+
+    @property
+    def resolver_address(self) -> str:
+        """Local address that answers system DNS queries in this mode."""
+
+        return "127.0.0.1" if self.mode == DnsMode.DOH_RAW else "127.0.0.53"
+
     @property
     def upstream_dns(self) -> list[str]:
         """List of upstream DNS servers urls."""
 
         return [str(srv.url) for srv in self.upstreams or [] if srv.protocol == DnsProtocol.DOH]
+
+    @property
+    def upstream_dot(self) -> list[str]:
+        """List of upstream DoT servers in systemd-resolved notation."""
+
+        return [srv.resolved_address for srv in self.upstreams or [] if srv.protocol == DnsProtocol.DOT]
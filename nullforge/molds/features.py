@@ -7,7 +7,9 @@ from .dns import DnsMold
 from .haproxy import HaproxyMold
 from .netsec import NetSecMold
 from .profiles import ProfilesMold
+from .resources import ResourcesMold
 from .tor import TorMold
+from .tunnel import TunnelMold
 from .user import UserMold
 from .warp import WarpMold
 from .xray import XrayCoreMold
@@ -19,7 +21,9 @@ ALLOWED_FEATURES_LAYERS = (
     HaproxyMold,
     NetSecMold,
     ProfilesMold,
+    ResourcesMold,
     TorMold,
+    TunnelMold,
     UserMold,
     WarpMold,
     XrayCoreMold,
@@ -35,7 +39,29 @@ class FeaturesMold(BaseModel):
     haproxy: HaproxyMold = Field(default=HaproxyMold())
     netsec: NetSecMold = Field(default=NetSecMold())
     profiles: ProfilesMold = Field(default=ProfilesMold())
+    resources: ResourcesMold = Field(default=ResourcesMold())
     tor: TorMold = Field(default=TorMold())
+    tunnel: TunnelMold = Field(default=TunnelMold())
     users: UserMold = Field(default=UserMold())
     warp: WarpMold = Field(default=WarpMold())
     xray: XrayCoreMold = Field(default=XrayCoreMold())
+
+    @property
+    def proxy_units(self) -> list[str]:
+        """systemd units of the enabled proxy and tunnel services."""
+
+        units = []
+        if self.dns.proxy_port:
+            units.append("cloudflare-dns.service")
+        if self.warp.install:
+            units += self.warp.service_units
+        if self.tunnel.install:
+            units.append("cloudflare-tunnel.service")
+        if self.haproxy.install:
+            units.append("haproxy.service")
+        if self.tor.install:
+            # tor.service is only a wrapper; the daemon runs in the default instance
+            units.append("tor@default.service")
+        if self.xray.install:
+            units.append("xray.service")
+        return units
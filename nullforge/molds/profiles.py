@@ -1,6 +1,29 @@
 """Profiles configuration mold."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from nullforge.models.profiles import ShellFramework, ShellFrameworkKind
+
+
+def _default_frameworks() -> list[ShellFramework]:
+    return [
+        ShellFramework(name="oh-my-zsh", kind=ShellFrameworkKind.OH_MY_ZSH, src="https://github.com/ohmyzsh/ohmyzsh"),
+        ShellFramework(
+            name="zsh-autosuggestions",
+            kind=ShellFrameworkKind.ZSH_PLUGIN,
+            src="https://github.com/zsh-users/zsh-autosuggestions",
+        ),
+        ShellFramework(
+            name="zsh-syntax-highlighting",
+            kind=ShellFrameworkKind.ZSH_PLUGIN,
+            src="https://github.com/zsh-users/zsh-syntax-highlighting",
+        ),
+        ShellFramework(name="tpm", kind=ShellFrameworkKind.TPM, src="https://github.com/tmux-plugins/tpm"),
+    ]
+
+
+def _default_nerd_fonts() -> list[str]:
+    return ["FiraCode"]
 
 
 class ProfilesMold(BaseModel):
@@ -18,3 +41,43 @@ class ProfilesMold(BaseModel):
         default=False,
         description="Whether to install the profiles for the user",
     )
+    frameworks: list[ShellFramework] = Field(
+        default_factory=_default_frameworks,
+        description="oh-my-zsh, zsh plugins and TPM checkouts, kept as shallow clones",
+    )
+    shared_frameworks: bool = Field(
+        default=False,
+        description="Whether to keep one system-wide checkout under /usr/local/share linked from each home",
+    )
+    frameworks_bundle: bool = Field(
+        default=False,
+        description="Whether the controller fetches the checkouts once and pushes them instead of hosts cloning",
+    )
+    nerd_fonts: list[str] = Field(
+        default_factory=_default_nerd_fonts,
+        description="Nerd Fonts families installed system-wide under /usr/local/share/fonts",
+    )
+    zsh_defer_plugins: bool = Field(
+        default=True,
+        description="Whether zsh plugins load after the first prompt instead of during startup",
+    )
+    zsh_benchmark: bool = Field(
+        default=False,
+        description="Whether to time zsh startup before and after the profile deploy",
+    )
+    plugins_bootstrap: bool = Field(
+        default=True,
+        description="Whether to install lazy.nvim and TPM plugins during deploy instead of on first launch",
+    )
+    plugins_bundle: bool = Field(
+        default=False,
+        description="Whether plugin trees are built once per arch and config, kept on the controller and pushed",
+    )
+
+    @field_validator("frameworks")
+    @classmethod
+    def _single_framework_roots(cls, v: list[ShellFramework]) -> list[ShellFramework]:
+        for kind in (ShellFrameworkKind.OH_MY_ZSH, ShellFrameworkKind.TPM):
+            if sum(framework.kind == kind for framework in v) > 1:
+                raise ValueError(f"Only one {kind} checkout can be installed")
+        return v
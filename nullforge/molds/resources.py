@@ -0,0 +1,34 @@
+"""Resource partitioning configuration mold."""
+
+from pydantic import BaseModel, Field
+
+from nullforge.models.resources import SliceLimits
+
+
+def _default_proxy_limits() -> SliceLimits:
+    return SliceLimits(cpu_weight=1000, io_weight=1000, memory_low="256M")
+
+
+def _default_containers_limits() -> SliceLimits:
+    return SliceLimits(cpu_weight=100, memory_high="75%")
+
+
+class ResourcesMold(BaseModel):
+    """cgroup v2 resource partitioning between proxy services and containers."""
+
+    partition: bool = Field(
+        default=False,
+        description="Whether to move proxy services and containers into their own slices",
+    )
+    proxy: SliceLimits = Field(
+        default_factory=_default_proxy_limits,
+        description="Resource controls of proxy.slice",
+    )
+    containers: SliceLimits = Field(
+        default_factory=_default_containers_limits,
+        description="Resource controls of containers.slice",
+    )
+    extra_proxy_units: list[str] = Field(
+        default_factory=list,
+        description="Additional units moved into proxy.slice",
+    )
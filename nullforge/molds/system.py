@@ -4,6 +4,8 @@ from typing import Annotated
 
 from pydantic import BaseModel, Field, conlist, field_validator
 
+from nullforge.models.system import AptUpgradePolicy, DpkgSyncMode, MemoryProfile
+
 
 def _default_packages_base() -> list[str]:
     """Get the default base packages to install."""
@@ -45,6 +47,25 @@ def _default_packages_base() -> list[str]:
     ]
 
 
+def _default_apt_mirrors() -> list[str]:
+    """Get the default apt mirror candidates (only those carrying the host's release qualify)."""
+
+    return [
+        "http://deb.debian.org/debian",
+        "http://cdn-fastly.deb.debian.org/debian",
+        "http://ftp.de.debian.org/debian",
+        "http://ftp.nl.debian.org/debian",
+        "http://ftp.us.debian.org/debian",
+        "http://mirrors.edge.kernel.org/debian",
+        "http://archive.ubuntu.com/ubuntu",
+        "http://de.archive.ubuntu.com/ubuntu",
+        "http://nl.archive.ubuntu.com/ubuntu",
+        "http://us.archive.ubuntu.com/ubuntu",
+        "http://mirrors.edge.kernel.org/ubuntu",
+        "http://ports.ubuntu.com/ubuntu-ports",
+    ]
+
+
 def _default_locales() -> list[str]:
     """Get the default locales to generate."""
 
@@ -64,6 +85,95 @@ class SystemMold(BaseModel):
         default_factory=_default_packages_base,
         description="System-wide base packages to install",
     )
+    apt_upgrade: AptUpgradePolicy = Field(
+        default=AptUpgradePolicy.ALWAYS,
+        description="When a cast runs a full apt upgrade; ttl skips it while the last upgrade is recent",
+    )
+    apt_upgrade_ttl_hours: int = Field(
+        default=24,
+        ge=1,
+        description="Age of the last successful cast upgrade after which the ttl policy upgrades again",
+    )
+    unattended_upgrades: bool = Field(
+        default=False,
+        description="Whether to run unattended-upgrades inside the maintenance window",
+    )
+    unattended_upgrades_window: str = Field(
+        default="03:00",
+        description="Start of the daily maintenance window (HH:MM, host time)",
+    )
+    unattended_upgrades_window_minutes: int = Field(
+        default=60,
+        ge=1,
+        description="Length of the maintenance window; each host upgrades at a fixed random point inside it",
+    )
+    unattended_upgrades_reboot: bool = Field(
+        default=False,
+        description="Whether unattended-upgrades reboots when an upgrade requires it",
+    )
+    unattended_upgrades_reboot_time: str = Field(
+        default="04:30",
+        description="When a required reboot happens (HH:MM, host time)",
+    )
+    fast_provisioning: bool = Field(
+        default=False,
+        description="Whether to tune apt fetching and relax dpkg syncing for the initial cast",
+    )
+    provisioning_baseline_seconds: int | None = Field(
+        default=None,
+        ge=1,
+        description="Default-mode initial package install time measured on comparable hosts; fast initial casts "
+        "report the time saved against it (a host only times its own initial cast)",
+    )
+    dpkg_sync: DpkgSyncMode = Field(
+        default=DpkgSyncMode.UNSAFE_IO,
+        description="How dpkg syncs to disk during the initial cast when fast_provisioning is enabled",
+    )
+    apt_pipeline_depth: int = Field(
+        default=10,
+        ge=0,
+        description="HTTP requests apt keeps in flight per mirror connection when fast_provisioning is enabled",
+    )
+    dpkg_path_excludes: bool = Field(
+        default=False,
+        description="Whether dpkg skips docs, man pages and translations of languages outside `locales`",
+    )
+    apt_mirror_select: bool = Field(
+        default=False,
+        description="Whether to measure the candidate mirrors from the host and switch the sources to the fastest",
+    )
+    apt_mirrors: list[str] = Field(
+        default_factory=_default_apt_mirrors,
+        description="Debian/Ubuntu mirror candidates; source entries pointing at any of them are rewritten",
+    )
+    apt_mirror_recheck_days: int = Field(
+        default=7,
+        ge=0,
+        description="How long a mirror selection is reused before the mirrors are measured again",
+    )
+    apt_cache: bool = Field(
+        default=False,
+        description="Whether this node serves an apt-cacher-ng proxy for the other nodes",
+    )
+    apt_cache_port: int = Field(
+        default=3142,
+        ge=1,
+        le=65535,
+        description="Port apt-cacher-ng listens on",
+    )
+    apt_cache_expire_days: int = Field(
+        default=4,
+        ge=1,
+        description="Days an unreferenced package is kept in the apt cache",
+    )
+    apt_cache_allow_from: list[str] = Field(
+        default_factory=list,
+        description="Networks allowed through UFW to the apt cache; empty keeps it closed",
+    )
+    apt_cache_host: str | None = Field(
+        default=None,
+        description="Host of the apt cache this node fetches through (set in group data for the fleet)",
+    )
     locales: Annotated[list[str], conlist(str, min_length=1)] = Field(
         default_factory=_default_locales,
         description="Locales to generate",
@@ -72,11 +182,33 @@ class SystemMold(BaseModel):
         default_factory=_default_timezone,
         description="System timezone (e.g. 'UTC' or 'Europe/Amsterdam')",
     )
+    memory: MemoryProfile = Field(
+        default_factory=MemoryProfile,
+        description="Memory-pressure profile: compressed swap, VM sysctls and OOM protection",
+    )
     hostname: str | None = Field(
         default=None,
         description="System hostname (FQDN). If None, hostname is not configured.",
     )
 
+    @property
+    def apt_proxy_endpoint(self) -> str | None:
+        """Host the node reaches the apt cache on, or None when no cache is used."""
+
+        if self.apt_cache_host:
+            return self.apt_cache_host
+        return "127.0.0.1" if self.apt_cache else None
+
+    @field_validator("unattended_upgrades_window", "unattended_upgrades_reboot_time")
+    @classmethod
+    def _validate_time_of_day(cls, v: str) -> str:
+        """Validate HH:MM times."""
+
+        hours, sep, minutes = v.partition(":")
+        if not (sep and hours.isdigit() and minutes.isdigit() and int(hours) < 24 and int(minutes) < 60):
+            raise ValueError("time must be HH:MM")
+        return v
+
     @field_validator("hostname")
     @classmethod
     def _validate_hostname(cls, v: str | None) -> str | None:
@@ -0,0 +1,73 @@
+"""Cloudflare Zero Trust tunnel configuration mold."""
+
+from pydantic import BaseModel, Field
+
+from nullforge.models.tunnel import TunnelEdgeIpVersion, TunnelProtocol
+
+
+class TunnelMold(BaseModel):
+    """Cloudflare Zero Trust tunnel (cloudflared) configuration mold."""
+
+    install: bool = Field(
+        default=False,
+        description="Whether to deploy a cloudflared Zero Trust tunnel",
+    )
+    token: str = Field(
+        default="",
+        description="The tunnel token from the Zero Trust dashboard",
+    )
+    protocol: TunnelProtocol = Field(
+        default=TunnelProtocol.QUIC,
+        description="Transport to the Cloudflare edge; http2 works where UDP is filtered",
+    )
+    ha_connections: int = Field(
+        default=4,
+        ge=1,
+        le=8,
+        description="Number of connections to the Cloudflare edge",
+    )
+    edge_ip_version: TunnelEdgeIpVersion = Field(
+        default=TunnelEdgeIpVersion.AUTO,
+        description="IP version used to reach the Cloudflare edge",
+    )
+    compression_quality: int = Field(
+        default=0,
+        ge=0,
+        le=3,
+        description="Cross-stream compression level (0 disables it)",
+    )
+    retries: int = Field(
+        default=5,
+        ge=0,
+        description="Maximum retries for connection and protocol errors",
+    )
+    grace_period: str = Field(
+        default="30s",
+        description="Time to wait for in-flight requests on shutdown",
+    )
+    metrics_address: str = Field(
+        default="127.0.0.1:20241",
+        description="Prometheus metrics endpoint (edge RTT, connections, requests); empty disables",
+    )
+    via_warp: bool = Field(
+        default=False,
+        description="Route the connections to the Cloudflare edge through the WARP interface",
+    )
+    cpu_quota: str = Field(
+        default="200%",
+        description="systemd CPUQuota for the tunnel service",
+    )
+    memory_max: str = Field(
+        default="512M",
+        description="systemd MemoryMax for the tunnel service",
+    )
+    tasks_max: int = Field(
+        default=4096,
+        ge=1,
+        description="systemd TasksMax for the tunnel service",
+    )
+    nofile_limit: int = Field(
+        default=1048576,
+        ge=1024,
+        description="Open file descriptor limit (LimitNOFILE) for the tunnel service",
+    )
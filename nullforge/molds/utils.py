@@ -9,8 +9,10 @@ from .features import ALLOWED_FEATURES_LAYERS, FeaturesMold
 from .haproxy import HaproxyMold
 from .netsec import NetSecMold
 from .profiles import ProfilesMold
+from .resources import ResourcesMold
 from .system import SystemMold
 from .tor import TorMold
+from .tunnel import TunnelMold
 from .user import UserMold
 from .warp import WarpMold
 from .xray import XrayCoreMold
@@ -51,13 +53,17 @@ def _to_features_fragment(value: object) -> dict[str, Any]:
         case WarpMold():
             return {"warp": value.model_dump()}
         case ContainersMold():
-            return {"docker": value.model_dump()}
+            return {"containers": value.model_dump()}
         case HaproxyMold():
             return {"haproxy": value.model_dump()}
         case NetSecMold():
-            return {"inet": value.model_dump()}
+            return {"netsec": value.model_dump()}
+        case ResourcesMold():
+            return {"resources": value.model_dump()}
         case TorMold():
             return {"tor": value.model_dump()}
+        case TunnelMold():
+            return {"tunnel": value.model_dump()}
         case XrayCoreMold():
             return {"xray": value.model_dump()}
         case Mapping():
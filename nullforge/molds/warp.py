@@ -1,16 +1,45 @@
 """WARP configuration mold."""
 
-from typing import TYPE_CHECKING
+from ipaddress import ip_address, ip_network
+from typing import TYPE_CHECKING, Annotated
 
 from pydantic import BaseModel, Field, field_validator
 
-from nullforge.models.warp import WarpEngineType, warp_engine_factory
+from nullforge.models.warp import WarpEngineType, WarpTunnel, warp_engine_factory
+from nullforge.smithy.state import STATE_DIR
 
 
 if TYPE_CHECKING:
     from nullforge.models.warp import WarpEngine
 
 
+def _default_masque_endpoint_candidates() -> list[str]:
+    return [
+        "162.159.198.1",
+        "162.159.198.2",
+        "2606:4700:103::1",
+        "2606:4700:103::2",
+    ]
+
+
+def _default_wireguard_endpoint_candidates() -> list[str]:
+    return [
+        "162.159.192.1",
+        "162.159.193.1",
+        "162.159.195.1",
+        "188.114.96.1",
+        "188.114.97.1",
+        "188.114.98.1",
+        "188.114.99.1",
+        "2606:4700:d0::a29f:c001",
+        "2606:4700:d1::a29f:c001",
+    ]
+
+
+def _default_endpoint_ports() -> list[int]:
+    return [443, 500, 1701, 4443, 4500, 8095, 8443]
+
+
 class WarpMold(BaseModel):
     """WARP configuration mold."""
 
@@ -30,12 +59,159 @@ class WarpMold(BaseModel):
         default=False,
         description="Whether to enable ZeroTrust enrollment for WARP",
     )
+    tunnels: int = Field(
+        default=1,
+        ge=1,
+        le=8,
+        description="Number of parallel WARP tunnels; more than one spreads flows across them with ECMP",
+    )
+    fwmark: int = Field(
+        default=0x5750,
+        ge=1,
+        description="Firewall mark that steers traffic into the shared WARP routing table",
+    )
+    auto_latency_url: str = Field(
+        default="https://cloudflare.com/cdn-cgi/trace",
+        description="Small target used to measure tunnel latency when selecting the auto engine",
+    )
+    auto_throughput_url: str = Field(
+        default="https://speed.cloudflare.com/__down?bytes=25000000",
+        description="Download target used to measure tunnel throughput when selecting the auto engine",
+    )
+    auto_reselect: bool = Field(
+        default=False,
+        description="Re-measure the engines even if a selection is already recorded on the host",
+    )
+    mtu_discovery: bool = Field(
+        default=True,
+        description="Probe the path MTU to the WARP endpoint and size the tunnel interface to match",
+    )
+    mtu_probe_ttl_hours: int = Field(
+        default=24,
+        ge=0,
+        description="Age after which a recorded path MTU is probed again; a new endpoint or engine always re-probes",
+    )
+    mtu: int | None = Field(
+        default=None,
+        ge=1280,
+        le=1500,
+        description="Fixed tunnel MTU; skips discovery when set",
+    )
+    mss_clamping: bool = Field(
+        default=True,
+        description="Clamp the TCP MSS of connections leaving through the WARP interface",
+    )
+    route_cidrs: list[str] = Field(
+        default_factory=list,
+        description="Destination networks (IPv4/IPv6 CIDRs) routed through WARP by fwmark",
+    )
+    route_domains: list[str] = Field(
+        default_factory=list,
+        description="Domains whose addresses are resolved into nft sets and routed through WARP",
+    )
+    route_users: list[str] = Field(
+        default_factory=list,
+        description="Local users (names or uids) whose traffic is routed through WARP",
+    )
+    route_units: list[str] = Field(
+        default_factory=list,
+        description="Systemd units whose traffic is routed through WARP (matched by cgroup)",
+    )
+    route_refresh_interval: int = Field(
+        default=600,
+        ge=60,
+        description="Seconds between re-resolving route_domains into the nft sets",
+    )
+    endpoint_scan: bool = Field(
+        default=True,
+        description="Scan candidate WARP endpoints and pin the one with the lowest RTT and loss",
+    )
+    masque_endpoint_candidates: list[str] = Field(
+        default_factory=_default_masque_endpoint_candidates,
+        description="Cloudflare anycast endpoint IPs serving MASQUE to scan",
+    )
+    wireguard_endpoint_candidates: list[str] = Field(
+        default_factory=_default_wireguard_endpoint_candidates,
+        description="Cloudflare anycast endpoint IPs serving WireGuard to scan; pinned only after a handshake",
+    )
+    endpoint_handshake_timeout: float = Field(
+        default=15.0,
+        gt=0,
+        description="Seconds a newly pinned WireGuard endpoint has to complete a handshake before it is reverted",
+    )
+    endpoint_ports: list[Annotated[int, Field(ge=1, le=65535)]] = Field(
+        default_factory=_default_endpoint_ports,
+        description="Ports to scan for MASQUE; WireGuard keeps the port of its profile",
+    )
+    endpoint_min_gain_ms: float = Field(
+        default=5.0,
+        ge=0,
+        description="RTT improvement (ms) required before re-pinning a different endpoint",
+    )
+    health_check: bool = Field(
+        default=True,
+        description="Whether to run the resident WARP health checker",
+    )
+    health_check_interval: float = Field(
+        default=10.0,
+        gt=0,
+        le=60,
+        description="Seconds between health check rounds",
+    )
+    health_check_timeout: float = Field(
+        default=5.0,
+        gt=0,
+        description="Timeout in seconds for a single health probe",
+    )
+    health_check_fall: int = Field(
+        default=3,
+        ge=1,
+        description="Consecutive failed rounds before the tunnel is considered down and restarted",
+    )
+    health_check_rise: int = Field(
+        default=2,
+        ge=1,
+        description="Consecutive good rounds before the tunnel is considered up again",
+    )
+    health_check_backoff_base: int = Field(
+        default=30,
+        ge=1,
+        description="Seconds to wait after a restart before restarting again; doubles on every retry",
+    )
+    health_check_backoff_max: int = Field(
+        default=600,
+        ge=1,
+        description="Upper bound in seconds for the restart backoff",
+    )
+    health_check_targets: list[str] = Field(
+        default_factory=list,
+        description="Probe targets as 'url|expect' (status code or body substring); empty uses built-in targets",
+    )
+    health_check_metrics_path: str = Field(
+        default=f"{STATE_DIR}/warp-health.prom",
+        description="Prometheus textfile with tunnel latency and loss metrics (empty disables)",
+    )
 
     @field_validator("iface")
     @classmethod
     def _valid_iface(cls, v: str) -> str:
         if not v or any(ch.isspace() for ch in v):
             raise ValueError("iface must be a non-empty string without spaces")
+        # Leave room for the instance index of multi-tunnel interfaces (IFNAMSIZ is 16)
+        if len(v) > 14:
+            raise ValueError("iface must be at most 14 characters long")
+        return v
+
+    @field_validator("route_cidrs")
+    @classmethod
+    def _valid_route_cidrs(cls, v: list[str]) -> list[str]:
+        return [str(ip_network(cidr, strict=False)) for cidr in v]
+
+    @field_validator("masque_endpoint_candidates", "wireguard_endpoint_candidates")
+    @classmethod
+    def _valid_endpoint_candidates(cls, v: list[str]) -> list[str]:
+        for candidate in v:
+            ip_address(candidate)
         return v
 
     # TODO: Implement ZeroTrust enrollment
@@ -49,3 +225,74 @@ class WarpMold(BaseModel):
     @property
     def engine(self) -> "WarpEngine":
         return warp_engine_factory(self.engine_type)
+
+    @property
+    def tunnel_iface(self) -> str:
+        """Name of the tunnel interface the selected engine brings up."""
+
+        if self.engine_type == WarpEngineType.WIREGUARD:
+            return "warp"
+        return self.iface
+
+    @property
+    def selective_routing(self) -> bool:
+        """Whether only the configured destinations, users and units are routed through WARP."""
+
+        return bool(self.route_cidrs or self.route_domains or self.route_users or self.route_units)
+
+    @property
+    def endpoint_candidates(self) -> list[str]:
+        """Endpoint IPs to scan for the selected engine."""
+
+        if self.engine_type == WarpEngineType.WIREGUARD:
+            return self.wireguard_endpoint_candidates
+        return self.masque_endpoint_candidates
+
+    @property
+    def multi_tunnel(self) -> bool:
+        return self.tunnels > 1
+
+    @property
+    def tunnel_instances(self) -> list[WarpTunnel]:
+        """Tunnel instances of the selected engine, each with its own registration and interface."""
+
+        engine = self.engine
+        if not self.multi_tunnel:
+            return [
+                WarpTunnel(
+                    iface=self.tunnel_iface,
+                    config_dir=engine.config_dir,
+                    systemd_service_name=engine.systemd_service_name,
+                    health_check_service_name=engine.health_check_service_name,
+                )
+            ]
+
+        instances = []
+        for index in range(self.tunnels):
+            iface = f"{self.iface}{index}"
+            if self.engine_type == WarpEngineType.WIREGUARD:
+                service_name = f"wg-quick@{iface}"
+            else:
+                service_name = f"{engine.systemd_service_name}-{iface}"
+            instances.append(
+                WarpTunnel(
+                    index=index,
+                    iface=iface,
+                    config_dir=f"{engine.config_dir}/{iface}",
+                    systemd_service_name=service_name,
+                    health_check_service_name=f"{engine.health_check_service_name}-{iface}",
+                )
+            )
+        return instances
+
+    @property
+    def service_units(self) -> list[str]:
+        """systemd units of the tunnel services; both engines' units while the engine is auto."""
+
+        if self.engine_type != WarpEngineType.AUTO:
+            return [f"{tunnel.systemd_service_name}.service" for tunnel in self.tunnel_instances]
+
+        units = []
+        for engine_type in (WarpEngineType.MASQUE, WarpEngineType.WIREGUARD):
+            units += self.model_copy(update={"engine_type": engine_type}).service_units
+        return units
@@ -1,14 +1,44 @@
 """Base system configuration deployment module."""
 
+import re
 from contextlib import suppress
 
 from pyinfra.context import host
-from pyinfra.facts.files import File, FileContents
+from pyinfra.facts.files import Directory, File, FileContents
 from pyinfra.facts.server import Command, Hostname
-from pyinfra.operations import apt, files, server
+from pyinfra.operations import apt, files, server, systemd
+from pyinfra.operations.util import any_changed
 
+from nullforge.models.system import AptUpgradePolicy, DpkgSyncMode
 from nullforge.molds import SystemMold
+from nullforge.smithy.state import STATE_DIR
 from nullforge.smithy.versions import Versions
+from nullforge.templates import get_etc_template, get_script_template, get_systemd_template
+
+
+APT_MIRROR_SELECT_PATH = "/usr/local/lib/nullforge/apt-mirror-select.sh"
+"""Where the apt mirror selection script is installed on the host."""
+
+APT_MIRROR_REPORT_PATH = f"{STATE_DIR}/apt-mirror.json"
+"""Where the last apt mirror measurement is kept on the host."""
+
+APT_PROXY_DETECT_PATH = "/usr/local/lib/nullforge/apt-proxy-detect.sh"
+"""Where the apt proxy auto-detect hook is installed on the host."""
+
+APT_PROXY_CONF_PATH = "/etc/nullforge/apt-proxy.env"
+"""Where the apt cache host and port read by the proxy detection hook are rendered."""
+
+PROVISION_TIMER_PATH = "/usr/local/lib/nullforge/provision-timer.sh"
+"""Where the initial package install timer is installed on the host."""
+
+PROVISIONED_PATH = f"{STATE_DIR}/provisioned"
+"""Stamp recording that the initial cast has completed on the host."""
+
+DPKG_UNSAFE_IO_PATH = "/etc/dpkg/dpkg.cfg.d/nullforge-unsafe-io"
+"""dpkg drop-in that skips fsync while the initial cast unpacks packages."""
+
+APT_UPGRADED_PATH = f"{STATE_DIR}/apt-upgraded"
+"""Stamp touched after every successful cast upgrade."""
 
 
 def deploy_base_system() -> None:
@@ -19,7 +49,29 @@ def deploy_base_system() -> None:
     if system.hostname:
         _configure_hostname(system.hostname)
 
-    _install_packages(system)
+    initial_cast = _is_initial_cast()
+    apt_env: dict[str, str] = {}
+    if system.fast_provisioning:
+        apt_env = _configure_fast_provisioning(system, initial_cast)
+
+    if system.dpkg_path_excludes:
+        _configure_dpkg_excludes(system)
+
+    if system.apt_mirror_select:
+        _select_apt_mirror(system)
+
+    if system.apt_proxy_endpoint:
+        _configure_apt_proxy(system)
+
+    _install_packages(system, apt_env, initial_cast)
+
+    if system.apt_cache:
+        _deploy_apt_cache(system)
+
+    if system.unattended_upgrades:
+        _configure_unattended_upgrades(system)
+
+    _finish_provisioning()
 
     _set_locale(system)
 
@@ -51,30 +103,329 @@ def _configure_hostname(hostname: str) -> None:
     )
 
 
-def _install_packages(system: SystemMold) -> None:
-    """Install base system packages."""
+def _is_initial_cast() -> bool:
+    """Whether the host has never been cast, not merely missing the provisioning stamp.
 
-    apt.update(
-        name="Update package repositories",
+    Hosts provisioned before the stamp existed still carry earlier NullForge
+    state (the state directory, its configuration or the static curl); the
+    stamp is seeded for them at the end of the cast instead.
+    """
+
+    if host.get_fact(File, PROVISIONED_PATH):
+        return False
+    return not any(
+        [
+            host.get_fact(Directory, STATE_DIR),
+            host.get_fact(Directory, "/etc/nullforge"),
+            host.get_fact(File, "/usr/local/bin/curl"),
+        ]
+    )
+
+
+def _configure_fast_provisioning(system: SystemMold, initial_cast: bool) -> dict[str, str]:
+    """Tune apt fetching and relax dpkg syncing for the initial cast; return the env for apt operations."""
+
+    files.template(
+        name="Configure apt acquire pipelining",
+        src=get_etc_template("apt-acquire.conf.j2"),
+        dest="/etc/apt/apt.conf.d/02nullforge-acquire",
+        mode="0644",
+        PIPELINE_DEPTH=system.apt_pipeline_depth,
+        _sudo=True,
+    )
+
+    if not initial_cast:
+        return {}
+
+    match system.dpkg_sync:
+        case DpkgSyncMode.UNSAFE_IO:
+            files.line(
+                name="Let dpkg skip fsync for the initial cast",
+                path=DPKG_UNSAFE_IO_PATH,
+                line="force-unsafe-io",
+                _sudo=True,
+            )
+        case DpkgSyncMode.EATMYDATA:
+            apt.packages(
+                name="Install eatmydata for the initial cast",
+                packages=["eatmydata"],
+                update=True,
+                _sudo=True,
+            )
+            return {"LD_PRELOAD": "libeatmydata.so"}
+
+    return {}
+
+
+def _configure_dpkg_excludes(system: SystemMold) -> None:
+    """Keep dpkg from unpacking docs, man pages and translations of unused languages."""
+
+    langs = set()
+    for locale in system.locales:
+        lang = locale.split(".")[0].split()[0]
+        langs.update([lang, lang.split("_")[0]])
+
+    files.template(
+        name="Configure dpkg path excludes",
+        src=get_etc_template("dpkg-excludes.cfg.j2"),
+        dest="/etc/dpkg/dpkg.cfg.d/01nullforge-excludes",
+        mode="0644",
+        LANGS=sorted(langs),
+        _sudo=True,
+    )
+
+
+def _finish_provisioning() -> None:
+    """Drop the initial-cast dpkg relaxations and record that the host is provisioned."""
+
+    files.file(
+        name="Restore dpkg fsync",
+        path=DPKG_UNSAFE_IO_PATH,
+        present=False,
         _sudo=True,
     )
 
-    apt.upgrade(
-        name="Update packages",
-        auto_remove=True,
+    files.file(
+        name="Record initial provisioning",
+        path=PROVISIONED_PATH,
+        present=True,
+        touch=False,
         _sudo=True,
     )
 
+
+def _select_apt_mirror(system: SystemMold) -> None:
+    """Switch the main archive to the candidate mirror that is fastest from this host."""
+
+    if not host.get_fact(File, "/usr/local/bin/curl"):
+        apt.packages(
+            name="Install curl for apt mirror selection",
+            packages=["curl", "ca-certificates"],
+            update=True,
+            _sudo=True,
+        )
+
+    files.put(
+        name="Deploy apt mirror selection script",
+        src=get_script_template("apt-mirror-select.sh"),
+        dest=APT_MIRROR_SELECT_PATH,
+        user="root",
+        group="root",
+        mode="0755",
+        _sudo=True,
+    )
+
+    server.shell(
+        name="Select the fastest apt mirror",
+        commands=[
+            f"{APT_MIRROR_SELECT_PATH} {APT_MIRROR_REPORT_PATH} {system.apt_mirror_recheck_days} "
+            + " ".join(system.apt_mirrors),
+        ],
+        _sudo=True,
+    )
+
+
+def _configure_apt_proxy(system: SystemMold) -> None:
+    """Fetch plain HTTP repositories through the fleet apt cache, falling back to direct while it is down."""
+
+    files.directory(
+        name="Ensure NullForge configuration directory exists",
+        path="/etc/nullforge",
+        mode="0755",
+        _sudo=True,
+    )
+
+    files.template(
+        name="Configure apt cache endpoint",
+        src=get_etc_template("apt-proxy.env.j2"),
+        dest=APT_PROXY_CONF_PATH,
+        mode="0644",
+        HOST=system.apt_proxy_endpoint,
+        PORT=system.apt_cache_port,
+        _sudo=True,
+    )
+
+    files.put(
+        name="Deploy apt proxy auto-detect hook",
+        src=get_script_template("apt-proxy-detect.sh"),
+        dest=APT_PROXY_DETECT_PATH,
+        user="root",
+        group="root",
+        mode="0755",
+        _sudo=True,
+    )
+
+    files.template(
+        name="Point apt at the fleet apt cache",
+        src=get_etc_template("apt-proxy.conf.j2"),
+        dest="/etc/apt/apt.conf.d/01nullforge-proxy",
+        mode="0644",
+        DETECT_PATH=APT_PROXY_DETECT_PATH,
+        _sudo=True,
+    )
+
+
+def _deploy_apt_cache(system: SystemMold) -> None:
+    """Run apt-cacher-ng for the other nodes."""
+
+    apt.packages(
+        name="Install apt-cacher-ng",
+        packages=["apt-cacher-ng"],
+        _sudo=True,
+    )
+
+    config_template = files.template(
+        name="Configure apt-cacher-ng",
+        src=get_etc_template("apt-cacher-ng.conf.j2"),
+        dest="/etc/apt-cacher-ng/zz-nullforge.conf",
+        mode="0644",
+        PORT=system.apt_cache_port,
+        EXPIRE_DAYS=system.apt_cache_expire_days,
+        _sudo=True,
+    )
+
+    systemd.service(
+        name="Enable and start apt-cacher-ng",
+        service="apt-cacher-ng",
+        running=True,
+        enabled=True,
+        restarted=True,
+        _sudo=True,
+        _if=config_template.did_change,
+    )
+
+
+def _install_packages(system: SystemMold, apt_env: dict[str, str], initial_cast: bool) -> None:
+    """Install base system packages, timing the initial install."""
+
+    if initial_cast:
+        files.put(
+            name="Deploy provisioning timer",
+            src=get_script_template("provision-timer.sh"),
+            dest=PROVISION_TIMER_PATH,
+            user="root",
+            group="root",
+            mode="0755",
+            _sudo=True,
+        )
+        server.shell(
+            name="Start timing the initial package install",
+            commands=[f"{PROVISION_TIMER_PATH} start"],
+            _sudo=True,
+        )
+
+    apt.update(
+        name="Update package repositories",
+        _sudo=True,
+        _env=apt_env,
+    )
+
+    if _upgrade_due(system):
+        apt.upgrade(
+            name="Update packages",
+            auto_remove=True,
+            _sudo=True,
+            _env=apt_env,
+        )
+
+        files.file(
+            name="Record successful package upgrade",
+            path=APT_UPGRADED_PATH,
+            touch=True,
+            _sudo=True,
+        )
+
     apt.packages(
         name="Install base system packages",
         packages=system.packages_base,
         no_recommends=True,
         _sudo=True,
+        _env=apt_env,
     )
 
+    if initial_cast:
+        mode = "fast" if system.fast_provisioning else "default"
+        baseline = system.provisioning_baseline_seconds or ""
+        server.shell(
+            name="Report initial package install time",
+            commands=[f"{PROVISION_TIMER_PATH} stop {mode} {baseline}".rstrip()],
+            _sudo=True,
+        )
+
     _install_curl()
 
 
+def _upgrade_due(system: SystemMold) -> bool:
+    """Whether this cast should run a full upgrade under the configured policy."""
+
+    match system.apt_upgrade:
+        case AptUpgradePolicy.NEVER:
+            return False
+        case AptUpgradePolicy.TTL:
+            # Only the cast's own upgrade counts: unattended-upgrades installs security updates only by default
+            minutes = system.apt_upgrade_ttl_hours * 60
+            recent = host.get_fact(
+                Command,
+                f"find {APT_UPGRADED_PATH} -maxdepth 0 -mmin -{minutes} 2>/dev/null || true",
+            )
+            return not recent
+        case _:
+            return True
+
+
+def _configure_unattended_upgrades(system: SystemMold) -> None:
+    """Run unattended-upgrades from apt's daily timers, moved into the maintenance window."""
+
+    apt.packages(
+        name="Install unattended-upgrades",
+        packages=["unattended-upgrades"],
+        _sudo=True,
+    )
+
+    files.template(
+        name="Configure unattended upgrades",
+        src=get_etc_template("apt-unattended.conf.j2"),
+        dest="/etc/apt/apt.conf.d/52nullforge-unattended",
+        mode="0644",
+        REBOOT=system.unattended_upgrades_reboot,
+        REBOOT_TIME=system.unattended_upgrades_reboot_time,
+        _sudo=True,
+    )
+
+    # Package lists refresh at the window start; the upgrade itself lands at a
+    # fixed per-host point inside the window so the fleet does not upgrade at once
+    windows = {"apt-daily.timer": 0, "apt-daily-upgrade.timer": system.unattended_upgrades_window_minutes}
+    window_templates = []
+    for timer, spread in windows.items():
+        window_templates.append(
+            files.template(
+                name=f"Move {timer} into the maintenance window",
+                src=get_systemd_template("apt-window.conf.j2"),
+                dest=f"/etc/systemd/system/{timer}.d/50-nullforge-window.conf",
+                mode="0644",
+                create_remote_dir=True,
+                START=system.unattended_upgrades_window,
+                SPREAD=f"{spread}min",
+                _sudo=True,
+            )
+        )
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon for the maintenance window",
+        _sudo=True,
+        _if=any_changed(*window_templates),
+    )
+
+    for timer in windows:
+        systemd.service(
+            name=f"Enable {timer}",
+            service=timer,
+            running=True,
+            enabled=True,
+            _sudo=True,
+        )
+
+
 def _install_curl() -> None:
     """Install curl package."""
 
@@ -115,33 +466,49 @@ def _install_curl() -> None:
         _sudo=True,
     )
 
-    apt.upgrade(
+    server.shell(
         name="Clean up unused packages",
-        auto_remove=True,
+        commands=["apt-get -y autoremove"],
         _sudo=True,
     )
 
 
 def _set_locale(system: SystemMold) -> None:
-    """Set system locale."""
+    """Enable every missing locale in one edit of locale.gen and regenerate once."""
 
-    for locale in system.locales:
-        if locale in host.get_fact(FileContents, "/etc/locale.gen"):
-            continue
+    enabled = {line.strip() for line in host.get_fact(FileContents, "/etc/locale.gen") or []}
+    missing = [locale for locale in system.locales if locale not in enabled]
+    if not missing:
+        return
 
-        server.locale(
-            name=f"Enable locale {locale}",
-            locale=locale,
-            present=True,
-            _sudo=True,
+    commands = []
+    for locale in missing:
+        pattern = re.sub(r"([][.*+?^$(){}|\\])", r"\\\1", locale)
+        commands.append(
+            f"sed -i -E 's/^#[[:space:]]*{pattern}[[:space:]]*$/{locale}/' /etc/locale.gen && "
+            f"(grep -qxF '{locale}' /etc/locale.gen || echo '{locale}' >> /etc/locale.gen)"
         )
+    commands.append("locale-gen")
+
+    server.shell(
+        name=f"Enable locales {', '.join(missing)}",
+        commands=commands,
+        _sudo=True,
+    )
 
 
 def _set_timezone(system: SystemMold) -> None:
-    """Set system timezone."""
+    """Set system timezone unless it is already current."""
+
+    current = host.get_fact(
+        Command,
+        "timedatectl show --property=Timezone --value 2>/dev/null || readlink /etc/localtime | sed 's#.*/zoneinfo/##'",
+    )
+    if current == system.timezone:
+        return
 
     server.shell(
-        name="Set system timezone",
+        name=f"Set system timezone to {system.timezone}",
         commands=f"timedatectl set-timezone {system.timezone}",
         _sudo=True,
     )
@@ -1,7 +1,12 @@
-"""Cloudflare service user management module."""
+"""Cloudflare service user and shared binaries management module."""
 
+from pyinfra.context import host
+from pyinfra.facts.files import File
 from pyinfra.operations import files, server
 
+from nullforge.smithy.http import CURL_ARGS_STR
+from nullforge.smithy.versions import Versions
+
 
 def ensure_cloudflare_user() -> None:
     """Ensure cloudflare system user and group exist with proper permissions."""
@@ -33,3 +38,32 @@ def ensure_cloudflare_user() -> None:
         mode="0755",
         _sudo=True,
     )
+
+
+def install_cloudflared() -> None:
+    """Install cloudflared binary used by the DNS proxy and the Zero Trust tunnel."""
+
+    if host.get_fact(File, "/usr/bin/cloudflared"):
+        host.noop("cloudflared binary is already installed")
+        return
+
+    curl_cmd = f"curl -L {CURL_ARGS_STR} {Versions(host).cloudflared()} -o /tmp/cloudflared"
+    server.shell(
+        name="Download cloudflared binary",
+        commands=[curl_cmd],
+    )
+
+    server.shell(
+        name="Install cloudflared binary",
+        commands=["mv /tmp/cloudflared /usr/bin/cloudflared"],
+        _sudo=True,
+    )
+
+    files.file(
+        name="Set cloudflared binary as executable",
+        path="/usr/bin/cloudflared",
+        mode="0755",
+        user="root",
+        group="cloudflare",
+        _sudo=True,
+    )
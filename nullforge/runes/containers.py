@@ -1,13 +1,36 @@
 """Containers deployment module."""
 
 from pyinfra.context import host
-from pyinfra.facts.files import File
-from pyinfra.operations import apt, files, git, server
+from pyinfra.facts.files import Directory, File
+from pyinfra.facts.server import Command
+from pyinfra.operations import apt, files, git, server, systemd
+from pyinfra.operations.util import any_changed
 
-from nullforge.models.containers import ContainersBackendType
+from nullforge.models.containers import ContainersBackendType, GvisorPlatform
+from nullforge.models.resources import CONTAINERS_SLICE
 from nullforge.molds import ContainersMold, FeaturesMold
+from nullforge.smithy.arch import arch_id
+from nullforge.smithy.bundles import OCI_ARCHES, fetch_image_archive
 from nullforge.smithy.http import CURL_ARGS_STR
-from nullforge.smithy.versions import GPG_KEYS, STATIC_URLS, Versions
+from nullforge.smithy.state import STATE_DIR
+from nullforge.smithy.versions import GPG_KEYS, KEYRING_DIR, STATIC_URLS, Versions
+from nullforge.templates import get_containers_template, get_script_template, get_systemd_template
+
+
+REGISTRY_CACHE_PRUNE_PATH = "/usr/local/lib/nullforge/registry-cache-prune.sh"
+"""Where the registry cache size cap script is installed on the host."""
+
+REGISTRY_CACHE_FIREWALL_PATH = "/usr/local/lib/nullforge/registry-cache-firewall.sh"
+"""Where the registry cache port filter script is installed on the host."""
+
+REGISTRY_CACHE_CONF_DIR = "/etc/nullforge/registry-cache"
+"""Where the per-upstream registry cache configurations are rendered on the host."""
+
+REGISTRY_MIRROR_CONF_PATH = "/etc/containers/registries.conf.d/50-nullforge-mirror.conf"
+"""Podman/skopeo drop-in pointing pulls at the registry cache."""
+
+IMAGE_ARCHIVE_DIR = f"{STATE_DIR}/images"
+"""Where pre-seeded image archives are kept on the host."""
 
 
 def deploy_containers() -> None:
@@ -22,41 +45,63 @@ def deploy_containers() -> None:
             _install_docker()
             if users_opts.manage:
                 _add_user_to_docker_group(users_opts.name)
-            _install_gvisor()
+            if containers_opts.gvisor:
+                _install_gvisor()
+            _configure_docker_daemon(containers_opts, features.resources.partition)
         case ContainersBackendType.PODMAN:
             _install_crun()
             _install_podman()
         case ContainersBackendType.CRIO:
             raise ValueError("CRIO is not supported yet")
 
-    if containers_opts.skopeo:
+    if containers_opts.skopeo or containers_opts.preload_images:
         _install_skopeo()
 
+    if containers_opts.registry_cache:
+        _deploy_registry_cache(containers_opts)
+    _configure_registry_mirror(containers_opts)
+
+    if containers_opts.preload_images:
+        _preload_images(containers_opts)
+
 
 def _install_gvisor() -> None:
     """Install gVisor runtime."""
 
-    gvisor_key_path = "/usr/share/keyrings/gvisor-archive-keyring.gpg"
-    curl_cmd = f"curl -L {CURL_ARGS_STR} {GPG_KEYS['gvisor_key']} -o {gvisor_key_path}"
-    server.shell(
-        name="Download gVisor GPG key",
-        commands=[curl_cmd],
-    )
+    if not host.get_fact(Directory, KEYRING_DIR):
+        files.directory(
+            name="Create keyring directory",
+            path=KEYRING_DIR,
+            user="root",
+            group="root",
+            mode="0755",
+            _sudo=True,
+        )
 
-    if not host.get_fact(File, "/etc/apt/sources.list.d/gvisor.list"):
-        files.line(
-            name="Add gVisor repository",
-            path="/etc/apt/sources.list.d/gvisor.list",
-            line=(
-                f"deb [arch=$(dpkg --print-architecture) signed-by={gvisor_key_path}] "
-                "https://storage.googleapis.com/gvisor/releases release main"
-            ),
+    gvisor_key_path = f"{KEYRING_DIR}/gvisor-archive-keyring.gpg"
+    if not host.get_fact(File, gvisor_key_path):
+        # The key is published ASCII-armored; signed-by needs the binary keyring
+        curl_cmd = f"curl -L {CURL_ARGS_STR} {GPG_KEYS['gvisor']} | gpg --dearmor -o {gvisor_key_path}"
+        server.shell(
+            name="Download gVisor GPG key",
+            commands=[curl_cmd],
             _sudo=True,
         )
 
+    sources_list = files.template(
+        name="Add gVisor repository",
+        src=get_containers_template("gvisor.list.j2"),
+        dest="/etc/apt/sources.list.d/gvisor.list",
+        mode="0644",
+        ARCH=OCI_ARCHES.get(arch_id(host), arch_id(host)),
+        KEYRING=gvisor_key_path,
+        _sudo=True,
+    )
+
     apt.update(
         name="Update package repositories after adding gVisor repository",
         _sudo=True,
+        _if=sources_list.did_change,
     )
 
     apt.packages(
@@ -69,6 +114,10 @@ def _install_gvisor() -> None:
 def _install_docker() -> None:
     """Install Docker using official installation script."""
 
+    if host.get_fact(File, "/usr/bin/dockerd"):
+        host.noop("Docker is already installed")
+        return
+
     get_docker_path = "/tmp/get-docker.sh"
     curl_cmd = f"curl -L {CURL_ARGS_STR} {STATIC_URLS['docker_install']} -o {get_docker_path}"
     server.shell(
@@ -95,6 +144,323 @@ def _install_docker() -> None:
     )
 
 
+def _gvisor_platform(opts: ContainersMold) -> str:
+    """Resolve the gVisor platform, preferring KVM when the host exposes it."""
+
+    if opts.gvisor_platform != GvisorPlatform.AUTO:
+        return str(opts.gvisor_platform)
+
+    has_kvm = host.get_fact(Command, "test -c /dev/kvm && echo yes || echo no")
+    return str(GvisorPlatform.KVM if has_kvm == "yes" else GvisorPlatform.SYSTRAP)
+
+
+def _gvisor_runtime_args(opts: ContainersMold) -> list[str]:
+    """Get the runsc flags Docker passes to every sandbox."""
+
+    return [
+        f"--platform={_gvisor_platform(opts)}",
+        f"--network={opts.gvisor_network}",
+        f"--overlay2={opts.gvisor_overlay}",
+        *opts.gvisor_extra_args,
+    ]
+
+
+def _docker_daemon_config(opts: ContainersMold, partition: bool) -> dict:
+    """Build /etc/docker/daemon.json from the containers options."""
+
+    log_opts = {"max-size": opts.log_max_size, "max-file": str(opts.log_max_file)}
+    if opts.log_driver == "local":
+        log_opts["compress"] = str(opts.log_compress).lower()
+
+    config = {
+        "log-driver": opts.log_driver,
+        "log-opts": log_opts,
+        "max-concurrent-downloads": opts.max_concurrent_downloads,
+        "max-concurrent-uploads": opts.max_concurrent_uploads,
+        "live-restore": opts.live_restore,
+        "userland-proxy": opts.userland_proxy,
+        "default-ulimits": {
+            name: {"Name": name, "Soft": limit, "Hard": limit} for name, limit in opts.default_ulimits.items()
+        },
+    }
+    if opts.storage_driver:
+        config["storage-driver"] = opts.storage_driver
+    if opts.gvisor:
+        # The file is owned here, so the runtime `runsc install` would add is registered here too
+        config["runtimes"] = {"runsc": {"path": "/usr/bin/runsc", "runtimeArgs": _gvisor_runtime_args(opts)}}
+        if opts.gvisor_default_runtime:
+            config["default-runtime"] = "runsc"
+    if partition:
+        config["cgroup-parent"] = CONTAINERS_SLICE
+
+    registry_mirrors = list(opts.registry_mirrors)
+    if opts.registry_cache_endpoint:
+        # Docker only supports mirrors for Docker Hub; other registries go through registries.conf
+        registry_mirrors += [
+            f"http://{opts.registry_cache_endpoint}:{upstream.port}"
+            for upstream in opts.registry_cache_upstreams
+            if upstream.registry == "docker.io"
+        ]
+    if registry_mirrors:
+        config["registry-mirrors"] = list(dict.fromkeys(registry_mirrors))
+    return config
+
+
+def _configure_docker_daemon(opts: ContainersMold, partition: bool) -> None:
+    """Render the Docker daemon performance profile and restart Docker only when it changes."""
+
+    files.directory(
+        name="Ensure /etc/docker directory exists",
+        path="/etc/docker",
+        mode="0755",
+        _sudo=True,
+    )
+
+    daemon_template = files.template(
+        name="Configure Docker daemon.json",
+        src=get_containers_template("daemon.json.j2"),
+        dest="/etc/docker/daemon.json",
+        mode="0644",
+        DAEMON_CONFIG=_docker_daemon_config(opts, partition),
+        _sudo=True,
+    )
+
+    systemd.service(
+        name="Restart Docker to apply daemon.json",
+        service="docker",
+        running=True,
+        enabled=True,
+        restarted=True,
+        _sudo=True,
+        _if=daemon_template.did_change,
+    )
+
+
+def _deploy_registry_cache(opts: ContainersMold) -> None:
+    """Run a registry:2 pull-through cache per upstream registry, capped in size."""
+
+    match opts.backend_type:
+        case ContainersBackendType.DOCKER:
+            engine, engine_unit, chain = "/usr/bin/docker", "docker.service", "DOCKER-USER"
+        case _:
+            engine, engine_unit, chain = "/usr/bin/podman", "", "FORWARD"
+
+    # Published ports bypass UFW, so anything beyond loopback is filtered in the forward path
+    firewall = "" if opts.registry_cache_listen.is_loopback else REGISTRY_CACHE_FIREWALL_PATH
+    if firewall:
+        files.put(
+            name="Deploy registry cache firewall script",
+            src=get_script_template("registry-cache-firewall.sh"),
+            dest=REGISTRY_CACHE_FIREWALL_PATH,
+            user="root",
+            group="root",
+            mode="0755",
+            _sudo=True,
+        )
+
+    files.directory(
+        name="Ensure registry cache configuration directory exists",
+        path=REGISTRY_CACHE_CONF_DIR,
+        mode="0700",
+        _sudo=True,
+    )
+
+    units = []
+    for upstream in opts.registry_cache_upstreams:
+        unit = f"registry-cache-{upstream.name}.service"
+        config_path = f"{REGISTRY_CACHE_CONF_DIR}/{upstream.name}.yml"
+        data_dir = f"{opts.registry_cache_dir}/{upstream.name}"
+        units.append(unit)
+
+        files.directory(
+            name=f"Ensure registry cache storage for {upstream.registry} exists",
+            path=data_dir,
+            mode="0755",
+            _sudo=True,
+        )
+
+        config_template = files.template(
+            name=f"Configure registry cache for {upstream.registry}",
+            src=get_containers_template("registry-cache.yml.j2"),
+            dest=config_path,
+            mode="0600",
+            UPSTREAM=upstream,
+            TTL=opts.registry_cache_ttl,
+            _sudo=True,
+        )
+
+        unit_template = files.template(
+            name=f"Deploy registry cache service for {upstream.registry}",
+            src=get_systemd_template("registry-cache.service.j2"),
+            dest=f"/etc/systemd/system/{unit}",
+            mode="0644",
+            UPSTREAM=upstream,
+            NAME=f"nullforge-registry-{upstream.name}",
+            ENGINE=engine,
+            ENGINE_UNIT=engine_unit,
+            IMAGE=opts.registry_cache_image,
+            DATA_DIR=data_dir,
+            CONFIG_PATH=config_path,
+            LISTEN=opts.registry_cache_listen,
+            FIREWALL=firewall,
+            CHAIN=chain,
+            ALLOW_FROM=opts.registry_cache_allow_from,
+            _sudo=True,
+        )
+
+        systemd.daemon_reload(
+            name=f"Reload systemd daemon for registry cache {upstream.registry}",
+            _sudo=True,
+            _if=unit_template.did_change,
+        )
+
+        systemd.service(
+            name=f"Enable and start registry cache for {upstream.registry}",
+            service=unit,
+            running=True,
+            enabled=True,
+            restarted=True,
+            _sudo=True,
+            _if=any_changed(config_template, unit_template),
+        )
+
+    _deploy_registry_cache_prune(opts, units)
+
+
+def _deploy_registry_cache_prune(opts: ContainersMold, units: list[str]) -> None:
+    """Deploy the hourly size check that resets the registry cache past its cap."""
+
+    files.put(
+        name="Deploy registry cache size cap script",
+        src=get_script_template("registry-cache-prune.sh"),
+        dest=REGISTRY_CACHE_PRUNE_PATH,
+        user="root",
+        group="root",
+        mode="0755",
+        _sudo=True,
+    )
+
+    unit_templates = [
+        files.template(
+            name="Deploy registry cache size cap service",
+            src=get_systemd_template("registry-cache-prune.service.j2"),
+            dest="/etc/systemd/system/registry-cache-prune.service",
+            mode="0644",
+            PRUNE_SCRIPT=REGISTRY_CACHE_PRUNE_PATH,
+            CACHE_DIR=opts.registry_cache_dir,
+            MAX_SIZE_GB=opts.registry_cache_max_size_gb,
+            UNITS=units,
+            _sudo=True,
+        ),
+        files.template(
+            name="Deploy registry cache size cap timer",
+            src=get_systemd_template("registry-cache-prune.timer.j2"),
+            dest="/etc/systemd/system/registry-cache-prune.timer",
+            mode="0644",
+            _sudo=True,
+        ),
+    ]
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon for registry cache size cap",
+        _sudo=True,
+        _if=any_changed(*unit_templates),
+    )
+
+    systemd.service(
+        name="Enable and start registry cache size cap timer",
+        service="registry-cache-prune.timer",
+        running=True,
+        enabled=True,
+        _sudo=True,
+    )
+
+
+def _configure_registry_mirror(opts: ContainersMold) -> None:
+    """Point Podman and skopeo pulls at the registry cache via registries.conf.d."""
+
+    if not opts.registry_cache_endpoint:
+        files.file(
+            name="Remove registry cache mirror configuration",
+            path=REGISTRY_MIRROR_CONF_PATH,
+            present=False,
+            _sudo=True,
+        )
+        return
+
+    files.directory(
+        name="Ensure /etc/containers/registries.conf.d directory exists",
+        path="/etc/containers/registries.conf.d",
+        mode="0755",
+        _sudo=True,
+    )
+
+    files.template(
+        name="Configure registry cache mirror for Podman and skopeo",
+        src=get_containers_template("registries-mirror.conf.j2"),
+        dest=REGISTRY_MIRROR_CONF_PATH,
+        mode="0644",
+        HOST=opts.registry_cache_endpoint,
+        UPSTREAMS=opts.registry_cache_upstreams,
+        _sudo=True,
+    )
+
+
+def _tagged_ref(image: str) -> str:
+    """Get the name:tag reference an image is stored under locally."""
+
+    if ":" not in image.rsplit("/", 1)[-1]:
+        return f"{image}:latest"
+    return image
+
+
+def _preload_images(opts: ContainersMold) -> None:
+    """Load controller-fetched OCI archives into the local image store.
+
+    The archive is only uploaded when it differs from the host copy, and only
+    loaded when the image is missing or the archive changed since the last load.
+    Both docker load and containers-storage skip layers that are already present.
+    """
+
+    match opts.backend_type:
+        case ContainersBackendType.DOCKER:
+            transport, exists_cmd = "docker-daemon", "docker image inspect"
+        case _:
+            transport, exists_cmd = "containers-storage", "podman image exists"
+
+    files.directory(
+        name="Ensure image archive directory exists",
+        path=IMAGE_ARCHIVE_DIR,
+        mode="0700",
+        _sudo=True,
+    )
+
+    arch = arch_id(host)
+    for image in opts.preload_images:
+        local_path = fetch_image_archive(image, arch)
+        archive_path = f"{IMAGE_ARCHIVE_DIR}/{local_path.name}"
+        loaded_path = f"{archive_path}.loaded"
+        ref = _tagged_ref(image)
+
+        files.put(
+            name=f"Upload image archive for {image}",
+            src=str(local_path),
+            dest=archive_path,
+            mode="0600",
+            _sudo=True,
+        )
+
+        server.shell(
+            name=f"Load {image} into the image store",
+            commands=[
+                f"{{ {exists_cmd} {ref} && sha256sum < {archive_path} | cmp -s - {loaded_path}; }} >/dev/null 2>&1 "
+                f"|| {{ skopeo copy --quiet oci-archive:{archive_path} {transport}:{ref} "
+                f"&& sha256sum < {archive_path} > {loaded_path}; }}",
+            ],
+            _sudo=True,
+        )
+
+
 def _add_user_to_docker_group(username: str) -> None:
     """Add user to docker group."""
 
@@ -7,11 +7,19 @@ from pyinfra.operations.util import any_changed
 
 from nullforge.models.dns import DnsMode, DnsProtocol, dns_providers
 from nullforge.molds import DnsMold, FeaturesMold
-from nullforge.runes.cloudflare import ensure_cloudflare_user
-from nullforge.smithy.http import CURL_ARGS_STR
+from nullforge.runes.cloudflare import ensure_cloudflare_user, install_cloudflared
 from nullforge.smithy.network import has_ipv6
-from nullforge.smithy.versions import Versions
-from nullforge.templates import get_dns_template, get_systemd_template
+from nullforge.templates import get_dns_template, get_script_template, get_systemd_template
+
+
+DNS_WARM_PATH = "/usr/local/bin/nullforge-dns-warm"
+"""Where the DNS cache warming script is installed on the host."""
+
+DNS_WARM_LIST_PATH = "/etc/nullforge/dns-warm.list"
+"""Where the hot domain list is rendered on the host."""
+
+DNS_WARM_SERVICE_PATH = "/etc/systemd/system/dns-warm.service"
+DNS_WARM_TIMER_PATH = "/etc/systemd/system/dns-warm.timer"
 
 
 def deploy_dns_configuration() -> None:
@@ -46,36 +54,10 @@ def deploy_dns_configuration() -> None:
         case DnsMode.DOH_RESOLVED | DnsMode.DOH_RAW:
             _deploy_doh_configuration(dns_opts)
         case DnsMode.NONE | _:
+            _remove_dns_warming()
             return
 
-
-def _install_cloudflared() -> None:
-    """Install cloudflared binary for DNS over HTTPS."""
-
-    if host.get_fact(File, "/usr/bin/cloudflared"):
-        host.noop("cloudflared binary is already installed")
-        return
-
-    curl_cmd = f"curl -L {CURL_ARGS_STR} {Versions(host).cloudflared()} -o /tmp/cloudflared"
-    server.shell(
-        name="Download cloudflared binary",
-        commands=[curl_cmd],
-    )
-
-    server.shell(
-        name="Install cloudflared binary",
-        commands=["mv /tmp/cloudflared /usr/bin/cloudflared"],
-        _sudo=True,
-    )
-
-    files.file(
-        name="Set cloudflared binary as executable",
-        path="/usr/bin/cloudflared",
-        mode="0755",
-        user="root",
-        group="cloudflare",
-        _sudo=True,
-    )
+    _deploy_dns_warming(dns_opts)
 
 
 # TODO: Disable DoH service if DoT is used
@@ -89,6 +71,10 @@ def _deploy_dot_resolved(opts: DnsMold) -> None:
         mode="0644",
         DOT=True,
         DOH=False,
+        DNS_SERVERS=opts.upstream_dot,
+        CACHE=opts.cache,
+        CACHE_FROM_LOCALHOST=opts.cache_from_localhost,
+        STALE_RETENTION_SEC=opts.stale_retention_sec,
         _sudo=True,
     )
 
@@ -124,17 +110,17 @@ def _deploy_doh_configuration(opts: DnsMold) -> None:
     """Deploy DNS over HTTPS configuration."""
 
     ensure_cloudflare_user()
-    _install_cloudflared()
+    install_cloudflared()
 
     mode_config = {
-        DnsMode.DOH_RESOLVED: (5053, _configure_doh_with_resolved),
-        DnsMode.DOH_RAW: (53, _configure_doh_raw),
+        DnsMode.DOH_RESOLVED: _configure_doh_with_resolved,
+        DnsMode.DOH_RAW: _configure_doh_raw,
     }
 
     if opts.mode not in mode_config:
         raise ValueError(f"Unsupported DNS mode: {opts.mode}")
 
-    stub_port, configure = mode_config[opts.mode]
+    configure = mode_config[opts.mode]
 
     config_path = "/etc/cloudflare/dns.yaml"
 
@@ -146,7 +132,7 @@ def _deploy_doh_configuration(opts: DnsMold) -> None:
         user="cloudflare",
         group="cloudflare",
         UPSTREAMS=opts.upstream_dns,
-        PORT=stub_port,
+        PORT=opts.proxy_port,
         _sudo=True,
     )
 
@@ -195,6 +181,10 @@ def _configure_doh_with_resolved(opts: DnsMold) -> None:
         mode="0644",
         DOT=False,
         DOH=True,
+        PROXY_PORT=opts.proxy_port,
+        CACHE=opts.cache,
+        CACHE_FROM_LOCALHOST=opts.cache_from_localhost,
+        STALE_RETENTION_SEC=opts.stale_retention_sec,
         _sudo=True,
     )
 
@@ -269,4 +259,147 @@ def _configure_doh_raw(opts: DnsMold) -> None:
     )
 
 
+def _deploy_dns_warming(opts: DnsMold) -> None:
+    """Deploy boot-time DNS cache warming for the hot domains."""
+
+    if not opts.warm_domains:
+        _remove_dns_warming()
+        return
+
+    files.directory(
+        name="Ensure /etc/nullforge directory exists",
+        path="/etc/nullforge",
+        mode="0755",
+        _sudo=True,
+    )
+
+    list_template = files.template(
+        name="Deploy DNS cache warming domain list",
+        src=get_dns_template("dns-warm.list.j2"),
+        dest=DNS_WARM_LIST_PATH,
+        mode="0644",
+        DOMAINS=opts.warm_domains,
+        _sudo=True,
+    )
+
+    files.put(
+        name="Deploy DNS cache warming script",
+        src=get_script_template("dns-warm.sh"),
+        dest=DNS_WARM_PATH,
+        mode="0755",
+        _sudo=True,
+    )
+
+    service_template = files.template(
+        name="Deploy DNS cache warming service",
+        src=get_systemd_template("dns-warm.service.j2"),
+        dest=DNS_WARM_SERVICE_PATH,
+        mode="0644",
+        WARM_SCRIPT=DNS_WARM_PATH,
+        SERVER=opts.resolver_address,
+        PORT=53,
+        LIST_PATH=DNS_WARM_LIST_PATH,
+        PARALLELISM=opts.warm_parallelism,
+        _sudo=True,
+    )
+
+    unit_templates = [service_template]
+    if opts.warm_interval:
+        unit_templates.append(
+            files.template(
+                name="Deploy DNS cache re-warming timer",
+                src=get_systemd_template("dns-warm.timer.j2"),
+                dest=DNS_WARM_TIMER_PATH,
+                mode="0644",
+                INTERVAL=opts.warm_interval,
+                _sudo=True,
+            )
+        )
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon for DNS cache warming",
+        _sudo=True,
+        _if=any_changed(*unit_templates),
+    )
+
+    # Oneshot without RemainAfterExit: starting it runs a warming pass right away
+    systemd.service(
+        name="Enable DNS cache warming and warm the cache",
+        service="dns-warm.service",
+        running=True,
+        enabled=True,
+        _sudo=True,
+        _if=any_changed(list_template, service_template),
+    )
+
+    if opts.warm_interval:
+        systemd.service(
+            name="Enable and start DNS cache re-warming timer",
+            service="dns-warm.timer",
+            running=True,
+            enabled=True,
+            restarted=True,
+            _sudo=True,
+            _if=any_changed(*unit_templates),
+        )
+    else:
+        _remove_dns_warming_timer()
+
+
+def _remove_dns_warming() -> None:
+    """Disable DNS cache warming and remove its units, script and domain list."""
+
+    _remove_dns_warming_timer()
+
+    if not host.get_fact(File, DNS_WARM_SERVICE_PATH):
+        return
+
+    systemd.service(
+        name="Disable DNS cache warming",
+        service="dns-warm.service",
+        enabled=False,
+        _sudo=True,
+    )
+
+    for path in (DNS_WARM_SERVICE_PATH, DNS_WARM_PATH, DNS_WARM_LIST_PATH):
+        files.file(
+            name=f"Remove DNS cache warming {path}",
+            path=path,
+            present=False,
+            _sudo=True,
+        )
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon after removing DNS cache warming",
+        _sudo=True,
+    )
+
+
+def _remove_dns_warming_timer() -> None:
+    """Stop the DNS cache re-warming timer and remove its unit."""
+
+    if not host.get_fact(File, DNS_WARM_TIMER_PATH):
+        return
+
+    systemd.service(
+        name="Disable DNS cache re-warming timer",
+        service="dns-warm.timer",
+        running=False,
+        enabled=False,
+        _sudo=True,
+    )
+
+    files.file(
+        name="Remove DNS cache re-warming timer",
+        path=DNS_WARM_TIMER_PATH,
+        present=False,
+        _sudo=True,
+    )
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon after removing the DNS cache re-warming timer",
+        _sudo=True,
+    )
+
+
 deploy_dns_configuration()
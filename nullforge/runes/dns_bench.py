@@ -0,0 +1,103 @@
+"""DNS benchmark module."""
+
+from pyinfra.context import host
+from pyinfra.operations import apt, files, server
+
+from nullforge.models.dns import DnsMode
+from nullforge.molds import DnsMold, FeaturesMold
+from nullforge.smithy.state import STATE_DIR
+from nullforge.templates import get_script_template
+
+
+DNS_BENCH_PATH = "/usr/local/bin/nullforge-dns-bench"
+"""Where the benchmark tool is installed on the host."""
+
+DNS_BENCH_STUB_PORT = 5354
+"""Loopback port for the bundled stand-in authoritative server; the two ports above it are used as well."""
+
+
+def run_dns_benchmark() -> None:
+    """Benchmark the local resolver and record the results on the host."""
+
+    features: FeaturesMold = host.data.features
+    dns_opts = features.dns
+
+    _install_dns_bench()
+
+    results_dir = f"{STATE_DIR}/dns-bench"
+    files.directory(
+        name="Ensure DNS benchmark results directory exists",
+        path=results_dir,
+        mode="0755",
+        _sudo=True,
+    )
+
+    for label, target_args in _bench_targets(dns_opts):
+        server.shell(
+            name=f"Benchmark DNS resolver ({label})",
+            commands=[
+                f"{DNS_BENCH_PATH} {target_args} {_bench_mix_args(dns_opts)} --label {label} "
+                f'--output "{results_dir}/{label}-$(date +%Y%m%dT%H%M%S).json"',
+            ],
+            _sudo=True,
+        )
+
+
+def _install_dns_bench() -> None:
+    """Install the DNS benchmark tool."""
+
+    apt.packages(
+        name="Install python3 for DNS benchmark",
+        packages=["python3"],
+        no_recommends=True,
+        _sudo=True,
+    )
+
+    files.put(
+        name="Deploy DNS benchmark tool",
+        src=get_script_template("dns-bench.py"),
+        dest=DNS_BENCH_PATH,
+        mode="0755",
+        _sudo=True,
+    )
+
+
+def _bench_targets(opts: DnsMold) -> list[tuple[str, str]]:
+    """Get benchmark labels and target arguments for the configured DNS mode."""
+
+    if opts.bench_offline:
+        # The resolvers under test are put in front of the stand-in instead of their real upstreams
+        stub = f"--stub {DNS_BENCH_STUB_PORT}"
+        match opts.mode:
+            case DnsMode.DOU | DnsMode.DOT_RESOLVED:
+                return [(str(opts.mode), f"{stub} --via resolved")]
+            case DnsMode.DOH_RESOLVED:
+                return [
+                    (str(opts.mode), f"{stub} --via resolved,cloudflared"),
+                    ("doh_proxy", f"{stub} --via cloudflared"),
+                ]
+            case DnsMode.DOH_RAW:
+                return [(str(opts.mode), f"{stub} --via cloudflared")]
+            case _:
+                return [("stub", stub)]
+
+    targets = [(str(opts.mode), f"--server {opts.resolver_address} --port 53")]
+    if opts.mode == DnsMode.DOH_RESOLVED:
+        # Measure cloudflared directly too, to separate the resolved cache from the DoH path
+        targets.append(("doh_proxy", f"--server 127.0.0.1 --port {opts.proxy_port}"))
+
+    return targets
+
+
+def _bench_mix_args(opts: DnsMold) -> str:
+    """Get benchmark query mix arguments."""
+
+    return (
+        f"--domains {','.join(opts.bench_domains)} "
+        f"--queries {opts.bench_queries} "
+        f"--concurrency {opts.bench_concurrency} "
+        f"--miss-ratio {opts.bench_miss_ratio}"
+    )
+
+
+run_dns_benchmark()
@@ -0,0 +1,77 @@
+"""gVisor benchmark module."""
+
+from urllib.parse import parse_qs, urlsplit
+
+from pyinfra.context import host
+from pyinfra.operations import apt, files, server
+
+from nullforge.models.containers import ContainersBackendType
+from nullforge.molds import ContainersMold, FeaturesMold
+from nullforge.smithy.state import STATE_DIR
+from nullforge.templates import get_script_template
+
+
+GVISOR_BENCH_PATH = "/usr/local/bin/nullforge-gvisor-bench"
+"""Where the benchmark tool is installed on the host."""
+
+
+def run_gvisor_benchmark() -> None:
+    """Compare runc against runsc on the host and record the results."""
+
+    features: FeaturesMold = host.data.features
+    containers_opts = features.containers
+
+    if containers_opts.backend_type != ContainersBackendType.DOCKER or not containers_opts.gvisor:
+        host.noop("gVisor benchmark needs the Docker backend with gVisor enabled")
+        return
+
+    _install_gvisor_bench()
+
+    results_dir = f"{STATE_DIR}/gvisor-bench"
+    files.directory(
+        name="Ensure gVisor benchmark results directory exists",
+        path=results_dir,
+        mode="0755",
+        _sudo=True,
+    )
+
+    server.shell(
+        name="Benchmark runc against runsc",
+        commands=[
+            f"{GVISOR_BENCH_PATH} {_bench_args(containers_opts)} "
+            f'--output "{results_dir}/runsc-$(date +%Y%m%dT%H%M%S).json"',
+        ],
+        _sudo=True,
+    )
+
+
+def _install_gvisor_bench() -> None:
+    """Install the gVisor benchmark tool."""
+
+    apt.packages(
+        name="Install python3 for gVisor benchmark",
+        packages=["python3"],
+        no_recommends=True,
+        _sudo=True,
+    )
+
+    files.put(
+        name="Deploy gVisor benchmark tool",
+        src=get_script_template("gvisor-bench.py"),
+        dest=GVISOR_BENCH_PATH,
+        mode="0755",
+        _sudo=True,
+    )
+
+
+def _bench_args(opts: ContainersMold) -> str:
+    """Get benchmark arguments."""
+
+    args = f"--image {opts.gvisor_bench_image} --label {opts.gvisor_platform}-{opts.gvisor_network}"
+    if opts.gvisor_bench_url:
+        url_bytes = parse_qs(urlsplit(opts.gvisor_bench_url).query).get("bytes", ["25000000"])[0]
+        args += f" --url '{opts.gvisor_bench_url}' --url-bytes {url_bytes}"
+    return args
+
+
+run_gvisor_benchmark()
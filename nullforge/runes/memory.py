@@ -0,0 +1,364 @@
+"""Memory-pressure profile deployment module."""
+
+from pyinfra.api.operation import OperationMeta
+from pyinfra.context import host
+from pyinfra.facts.files import Directory, File
+from pyinfra.facts.hardware import Memory
+from pyinfra.facts.server import Command
+from pyinfra.operations import apt, files, server, systemd
+from pyinfra.operations.util import any_changed
+
+from nullforge.models.system import MemoryProfile, OomKiller, SwapMode
+from nullforge.molds import FeaturesMold, SystemMold
+from nullforge.smithy.state import STATE_DIR
+from nullforge.templates import get_etc_template, get_systemd_template
+
+
+ZRAM_CONF_PATH = "/etc/systemd/zram-generator.conf"
+"""zram-generator configuration describing the compressed swap device."""
+
+ZSWAP_TMPFILES_PATH = "/etc/tmpfiles.d/nullforge-zswap.conf"
+"""tmpfiles.d entry that sets the zswap module parameters at boot."""
+
+SWAPFILE_PATH = "/swapfile"
+"""Disk swap created behind zswap when the host has none."""
+
+SWAPFILE_CREATED_PATH = f"{STATE_DIR}/swapfile-created"
+"""Stamp recording that the swapfile was created here, so switching to zram may remove it."""
+
+SYSCTL_MEMORY_PATH = "/etc/sysctl.d/60-nullforge-memory.conf"
+"""Where the memory pressure sysctls are rendered."""
+
+OOM_DROPIN_NAME = "50-nullforge-oom.conf"
+"""Name of the drop-ins carrying OOM settings for units and slices."""
+
+
+def deploy_memory_profile() -> None:
+    """Keep small hosts responsive under memory spikes and the proxies alive through them."""
+
+    features: FeaturesMold = host.data.features
+    system: SystemMold = host.data.system
+    profile = system.memory
+    ram_mb = host.get_fact(Memory) or 0
+
+    match profile.swap:
+        case SwapMode.ZRAM:
+            _configure_zram(profile)
+        case SwapMode.ZSWAP:
+            _configure_zswap(profile)
+
+    _apply_memory_sysctls(profile, ram_mb)
+
+    match profile.oom_killer:
+        case OomKiller.EARLYOOM:
+            _configure_earlyoom(profile)
+        case OomKiller.SYSTEMD_OOMD:
+            _configure_systemd_oomd(profile)
+
+    _protect_proxy_units(profile, features.proxy_units + features.resources.extra_proxy_units)
+
+
+def _memory_sysctls(profile: MemoryProfile, ram_mb: int) -> dict[str, int]:
+    """Derive the VM sysctls from the swap mode and RAM, keeping explicitly set values.
+
+    Hosts with 1 GB or less favour swapping cold anonymous pages to compressed
+    swap over dropping page cache, reclaim dentry/inode caches sooner and keep
+    a larger free reserve for network buffer allocations.
+    """
+
+    small = ram_mb <= 1024
+    match profile.swap:
+        case SwapMode.ZRAM:
+            swappiness = 180 if small else 100
+        case SwapMode.ZSWAP:
+            swappiness = 60 if small else 30
+        case _:
+            swappiness = 10
+
+    sysctls = {
+        "vm.swappiness": profile.swappiness if profile.swappiness is not None else swappiness,
+        "vm.vfs_cache_pressure": profile.vfs_cache_pressure or (150 if small else 100),
+        "vm.min_free_kbytes": profile.min_free_kbytes or min(max(ram_mb * 1024 * 15 // 1000, 8192), 65536),
+    }
+    if profile.swap == SwapMode.ZRAM:
+        # Readahead only adds latency when swap is in RAM
+        sysctls["vm.page-cluster"] = 0
+    return sysctls
+
+
+def _apply_memory_sysctls(profile: MemoryProfile, ram_mb: int) -> None:
+    """Deploy and load the memory sysctls."""
+
+    sysctl_template = files.template(
+        name="Deploy memory pressure sysctls",
+        src=get_etc_template("sysctl-memory.conf.j2"),
+        dest=SYSCTL_MEMORY_PATH,
+        mode="0644",
+        RAM_MB=ram_mb,
+        SYSCTLS=_memory_sysctls(profile, ram_mb),
+        _sudo=True,
+    )
+
+    server.shell(
+        name="Apply memory pressure sysctls",
+        commands=[f"sysctl -p {SYSCTL_MEMORY_PATH}"],
+        _sudo=True,
+        _if=sysctl_template.did_change,
+    )
+
+
+def _configure_zram(profile: MemoryProfile) -> None:
+    """Set up a compressed swap device in RAM with zram-generator."""
+
+    if host.get_fact(File, ZSWAP_TMPFILES_PATH):
+        files.file(
+            name="Remove zswap settings",
+            path=ZSWAP_TMPFILES_PATH,
+            present=False,
+            _sudo=True,
+        )
+
+        server.shell(
+            name="Disable zswap",
+            commands=["echo N > /sys/module/zswap/parameters/enabled"],
+            _sudo=True,
+        )
+
+    # Only a swapfile created for zswap is removed; one the host came with stays
+    if host.get_fact(File, SWAPFILE_CREATED_PATH):
+        server.shell(
+            name="Stop swapping to the zswap swapfile",
+            commands=[f"swapoff {SWAPFILE_PATH} 2>/dev/null || true"],
+            _sudo=True,
+        )
+
+        files.line(
+            name="Remove swapfile from fstab",
+            path="/etc/fstab",
+            line=f"{SWAPFILE_PATH} none swap sw 0 0",
+            present=False,
+            _sudo=True,
+        )
+
+        for path in (SWAPFILE_PATH, SWAPFILE_CREATED_PATH):
+            files.file(
+                name=f"Remove {path}",
+                path=path,
+                present=False,
+                _sudo=True,
+            )
+
+    apt.packages(
+        name="Install zram-generator",
+        packages=["systemd-zram-generator"],
+        _sudo=True,
+    )
+
+    zram_template = files.template(
+        name="Configure zram swap",
+        src=get_etc_template("zram-generator.conf.j2"),
+        dest=ZRAM_CONF_PATH,
+        mode="0644",
+        PERCENT=profile.zram_percent,
+        COMPRESSOR=profile.compressor,
+        _sudo=True,
+    )
+
+    server.shell(
+        name="Recreate zram swap",
+        commands=[
+            "systemctl daemon-reload",
+            "systemctl restart systemd-zram-setup@zram0.service",
+            # Setting up the device does not swap on it; on the first cast the swap unit is not active yet
+            "systemctl start dev-zram0.swap",
+        ],
+        _sudo=True,
+        _if=zram_template.did_change,
+    )
+
+
+def _configure_zswap(profile: MemoryProfile) -> None:
+    """Put a compressed zswap pool in front of disk swap, adding a swapfile when there is none."""
+
+    if not host.get_fact(Directory, "/sys/module/zswap/parameters"):
+        return
+
+    if host.get_fact(File, ZRAM_CONF_PATH):
+        server.shell(
+            name="Stop swapping to zram",
+            commands=[
+                "swapoff /dev/zram0 2>/dev/null || true",
+                "systemctl stop systemd-zram-setup@zram0.service",
+            ],
+            _sudo=True,
+        )
+
+        files.file(
+            name="Remove zram swap settings",
+            path=ZRAM_CONF_PATH,
+            present=False,
+            _sudo=True,
+        )
+
+    # zram swap is going away above, so it does not count as a backing device
+    active_swap = host.get_fact(Command, "swapon --noheadings --show=NAME | grep -v '^/dev/zram' || true")
+    if not active_swap and not host.get_fact(File, SWAPFILE_PATH):
+        server.shell(
+            name=f"Create {profile.swapfile_mb} MB swapfile for zswap",
+            commands=[
+                f"fallocate -l {profile.swapfile_mb}M {SWAPFILE_PATH} "
+                f"|| dd if=/dev/zero of={SWAPFILE_PATH} bs=1M count={profile.swapfile_mb}",
+                f"chmod 600 {SWAPFILE_PATH}",
+                f"mkswap {SWAPFILE_PATH}",
+                f"swapon {SWAPFILE_PATH}",
+            ],
+            _sudo=True,
+        )
+
+        files.line(
+            name="Enable swapfile at boot",
+            path="/etc/fstab",
+            line=f"{SWAPFILE_PATH} none swap sw 0 0",
+            _sudo=True,
+        )
+
+        files.file(
+            name="Record that the swapfile was created for zswap",
+            path=SWAPFILE_CREATED_PATH,
+            touch=True,
+            _sudo=True,
+        )
+
+    zswap_template = files.template(
+        name="Configure zswap",
+        src=get_etc_template("zswap.tmpfiles.j2"),
+        dest=ZSWAP_TMPFILES_PATH,
+        mode="0644",
+        COMPRESSOR=profile.compressor,
+        POOL_PERCENT=profile.zswap_pool_percent,
+        _sudo=True,
+    )
+
+    server.shell(
+        name="Apply zswap settings",
+        commands=[f"systemd-tmpfiles --create {ZSWAP_TMPFILES_PATH}"],
+        _sudo=True,
+        _if=zswap_template.did_change,
+    )
+
+
+def _configure_earlyoom(profile: MemoryProfile) -> None:
+    """Run earlyoom, sparing the proxy and tunnel daemons."""
+
+    apt.packages(
+        name="Install earlyoom",
+        packages=["earlyoom"],
+        _sudo=True,
+    )
+
+    config_template = files.template(
+        name="Configure earlyoom",
+        src=get_etc_template("earlyoom.j2"),
+        dest="/etc/default/earlyoom",
+        mode="0644",
+        AVOID=profile.earlyoom_avoid,
+        _sudo=True,
+    )
+
+    systemd.service(
+        name="Enable and start earlyoom",
+        service="earlyoom",
+        running=True,
+        enabled=True,
+        _sudo=True,
+    )
+
+    systemd.service(
+        name="Restart earlyoom with the new configuration",
+        service="earlyoom",
+        restarted=True,
+        _sudo=True,
+        _if=config_template.did_change,
+    )
+
+
+def _configure_systemd_oomd(profile: MemoryProfile) -> None:
+    """Run systemd-oomd on swap exhaustion and sustained memory pressure."""
+
+    apt.packages(
+        name="Install systemd-oomd",
+        packages=["systemd-oomd"],
+        _sudo=True,
+    )
+
+    slice_templates = [
+        _deploy_oomd_slice("-.slice", swap=profile.swap != SwapMode.NONE, pressure=""),
+        _deploy_oomd_slice("system.slice", swap=False, pressure="80%"),
+        _deploy_oomd_slice("user.slice", swap=False, pressure="60%"),
+    ]
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon for systemd-oomd",
+        _sudo=True,
+        _if=any_changed(*slice_templates),
+    )
+
+    systemd.service(
+        name="Enable and start systemd-oomd",
+        service="systemd-oomd",
+        running=True,
+        enabled=True,
+        _sudo=True,
+    )
+
+
+def _deploy_oomd_slice(slice_name: str, swap: bool, pressure: str) -> OperationMeta:
+    """Let systemd-oomd act on a slice through a drop-in."""
+
+    return files.template(
+        name=f"Monitor {slice_name} with systemd-oomd",
+        src=get_systemd_template("oomd-slice.conf.j2"),
+        dest=f"/etc/systemd/system/{slice_name}.d/{OOM_DROPIN_NAME}",
+        mode="0644",
+        create_remote_dir=True,
+        SWAP=swap,
+        PRESSURE=pressure,
+        _sudo=True,
+    )
+
+
+def _protect_proxy_units(profile: MemoryProfile, units: list[str]) -> None:
+    """Give the proxy and tunnel services a negative OOM score through drop-ins."""
+
+    dropin_templates = {
+        unit: files.template(
+            name=f"Protect {unit} from the OOM killer",
+            src=get_systemd_template("oom-protect.conf.j2"),
+            dest=f"/etc/systemd/system/{unit}.d/{OOM_DROPIN_NAME}",
+            mode="0644",
+            create_remote_dir=True,
+            SCORE_ADJUST=profile.proxy_oom_score_adjust,
+            OOMD=profile.oom_killer == OomKiller.SYSTEMD_OOMD,
+            _sudo=True,
+        )
+        for unit in dict.fromkeys(units)
+    }
+    if not dropin_templates:
+        return
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon for OOM protection",
+        _sudo=True,
+        _if=any_changed(*dropin_templates.values()),
+    )
+
+    for unit, dropin_template in dropin_templates.items():
+        server.shell(
+            name=f"Restart {unit} with its OOM score",
+            commands=[f"systemctl try-restart {unit}"],
+            _sudo=True,
+            _if=dropin_template.did_change,
+        )
+
+
+deploy_memory_profile()
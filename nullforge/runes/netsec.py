@@ -4,7 +4,7 @@ from pyinfra.context import host
 from pyinfra.facts.files import File, FileContents
 from pyinfra.operations import apt, files, server, systemd
 
-from nullforge.molds import FeaturesMold, NetSecMold, UserMold
+from nullforge.molds import FeaturesMold, NetSecMold, SystemMold, UserMold
 from nullforge.templates import get_etc_template
 
 
@@ -18,13 +18,13 @@ def deploy_network_security() -> None:
     _enhance_ssh_daemon(users)
 
     if netsec_opts.ufw:
-        _configure_ufw_firewall(netsec_opts)
+        _configure_ufw_firewall(netsec_opts, host.data.system)
 
     if netsec_opts.sysctl_tuning:
         _apply_sysctl_tuning()
 
 
-def _configure_ufw_firewall(opts: NetSecMold) -> None:
+def _configure_ufw_firewall(opts: NetSecMold, system: SystemMold) -> None:
     """Configure UFW firewall with specified rules."""
 
     apt.packages(
@@ -60,6 +60,14 @@ def _configure_ufw_firewall(opts: NetSecMold) -> None:
             _sudo=True,
         )
 
+    if system.apt_cache:
+        for source in system.apt_cache_allow_from:
+            server.shell(
+                name=f"Allow {source} to the apt cache",
+                commands=[f"ufw allow from {source} to any port {system.apt_cache_port} proto tcp"],
+                _sudo=True,
+            )
+
     server.shell(
         name="Enable UFW firewall",
         commands=[
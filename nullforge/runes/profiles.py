@@ -1,20 +1,54 @@
 """Shell profiles and tools deployment module."""
 
-from pyinfra.context import host
-from pyinfra.facts.files import Directory, File
-from pyinfra.facts.server import LinuxDistribution
-from pyinfra.operations import apt, files, git, server
+from hashlib import sha256
 
-from nullforge.molds import FeaturesMold
+from pyinfra.api.operation import OperationMeta
+from pyinfra.context import host
+from pyinfra.facts.files import Directory, File, FileContents
+from pyinfra.facts.server import Command
+from pyinfra.operations import apt, files, server
+from pyinfra.operations.util import any_changed
+
+from nullforge.models.profiles import ShellFramework, ShellFrameworkKind
+from nullforge.molds import FeaturesMold, ProfilesMold
+from nullforge.smithy.arch import arch_id
+from nullforge.smithy.bundles import bundle_path, fetch_git_tarball, resolve_git_ref
 from nullforge.smithy.http import CURL_ARGS_STR
-from nullforge.smithy.versions import STATIC_URLS, Versions
-from nullforge.templates import get_nvim_template, get_profile_template
+from nullforge.smithy.state import STATE_DIR
+from nullforge.smithy.versions import Versions
+from nullforge.templates import get_nvim_template, get_profile_template, get_script_template
+
+
+SHARED_FRAMEWORKS_DIR = "/usr/local/share/nullforge"
+"""Where the shared shell framework checkouts live on the host."""
+
+GIT_SYNC_PATH = "/usr/local/lib/nullforge/git-sync.sh"
+"""Where the shallow checkout sync script is installed on the host."""
+
+BUNDLES_DIR = f"{STATE_DIR}/bundles"
+"""Where controller-built checkout tarballs are uploaded on the host."""
+
+RELEASES_DIR = f"{STATE_DIR}/releases"
+"""Stamp files recording the release archive each system-wide tool was installed from."""
+
+FONTS_DIR = "/usr/local/share/fonts/NerdFonts"
+"""Where Nerd Fonts families are installed system-wide."""
+
+ZSH_BENCH_PATH = "/usr/local/bin/nullforge-zsh-bench"
+"""Where the zsh startup benchmark is installed on the host."""
+
+NVCHAD_STARTER_SRC = "https://github.com/NvChad/starter"
+"""NvChad starter configuration repository."""
+
+NVIM_THEME = "tokyonight"
+"""NvChad theme set in chadrc.lua."""
 
 
 def deploy_shell_profiles() -> None:
     """Deploy shell profiles and tools configuration."""
 
     features: FeaturesMold = host.data.features
+    profiles_opts = features.profiles
 
     _install_eza()
 
@@ -22,8 +56,29 @@ def deploy_shell_profiles() -> None:
 
     _install_nvim()
 
-    for user, home_dir in _get_profile_targets(features):
-        _install_user_profiles(user, home_dir)
+    _install_starship()
+
+    _install_atuin()
+
+    _install_fonts(profiles_opts)
+
+    _install_git_sync()
+
+    if profiles_opts.shared_frameworks:
+        _install_shared_frameworks(profiles_opts)
+
+    targets = _get_profile_targets(features)
+    if profiles_opts.zsh_benchmark:
+        _install_zsh_bench()
+        for user, home_dir in targets:
+            _benchmark_zsh_startup(user, home_dir, "before")
+
+    for user, home_dir in targets:
+        _install_user_profiles(profiles_opts, user, home_dir)
+
+    if profiles_opts.zsh_benchmark:
+        for user, home_dir in targets:
+            _benchmark_zsh_startup(user, home_dir, "after")
 
 
 def _get_profile_targets(features: FeaturesMold) -> list[tuple[str, str]]:
@@ -42,53 +97,142 @@ def _get_profile_targets(features: FeaturesMold) -> list[tuple[str, str]]:
     return targets
 
 
-def _install_user_profiles(user: str, home_dir: str) -> None:
+def _install_user_profiles(opts: ProfilesMold, user: str, home_dir: str) -> None:
     """Configure user profile."""
 
-    _configure_user_oh_my_zsh(user, home_dir)
-    _configure_user_shell_profiles(user, home_dir)
-    _install_firacode_font(user, home_dir)
-    _install_user_tmux(user, home_dir)
-    _install_user_nvim(user, home_dir)
-    _install_starship(user)
-    _install_atuin(user)
+    _configure_user_oh_my_zsh(opts, user, home_dir)
+    _configure_user_shell_profiles(opts, user, home_dir)
+    _install_user_tmux(opts, user, home_dir)
+    _install_user_nvim(opts, user, home_dir)
+    if opts.plugins_bootstrap:
+        _bootstrap_user_plugins(opts, user, home_dir)
 
 
-def _configure_user_oh_my_zsh(user: str, home_dir: str) -> None:
-    """Install oh-my-zsh and its plugins for a specific user."""
+def _framework_path(framework: ShellFramework, root: str, shared: bool) -> str:
+    """Get where a framework checkout lives under the shared directory or a home directory."""
 
-    oh_my_zsh_dir = f"{home_dir}/.oh-my-zsh"
-    plugins_dir = f"{oh_my_zsh_dir}/custom/plugins"
+    match framework.kind:
+        case ShellFrameworkKind.OH_MY_ZSH:
+            return f"{root}/oh-my-zsh" if shared else f"{root}/.oh-my-zsh"
+        case ShellFrameworkKind.ZSH_PLUGIN:
+            if shared:
+                return f"{root}/zsh-custom/plugins/{framework.name}"
+            return f"{root}/.oh-my-zsh/custom/plugins/{framework.name}"
+        case ShellFrameworkKind.TPM:
+            return f"{root}/tpm" if shared else f"{root}/.tmux/plugins/tpm"
 
-    if not host.get_fact(Directory, oh_my_zsh_dir):
-        git.repo(
-            name=f"Install oh-my-zsh for {user}",
-            src="https://github.com/ohmyzsh/ohmyzsh",
-            dest=oh_my_zsh_dir,
+
+def _install_git_sync() -> None:
+    """Install the shallow checkout sync script."""
+
+    files.put(
+        name="Deploy shallow checkout sync script",
+        src=get_script_template("git-sync.sh"),
+        dest=GIT_SYNC_PATH,
+        user="root",
+        group="root",
+        mode="0755",
+        _sudo=True,
+    )
+
+
+def _sync_checkout(opts: ProfilesMold, name: str, src: str, ref: str, dest: str, user: str) -> None:
+    """Converge a depth-1 checkout, from the controller bundle or by fetching only when the remote moved.
+
+    Refs are resolved to commits on the controller, so a host already at the
+    current commit gets no operation at all.
+    """
+
+    # Read as the checkout owner; as root, git's safe.directory check rejects another user's checkout
+    head = host.get_fact(
+        Command,
+        f"git -C {dest} rev-parse -q --verify HEAD 2>/dev/null || true",
+        _sudo=True,
+        _sudo_user=user,
+    )
+
+    if opts.frameworks_bundle:
+        tarball, revision = fetch_git_tarball(name, src, ref)
+        if head == revision:
+            host.noop(f"{dest} is already at {revision[:12]}")
+            return
+
+        bundle_path = f"{BUNDLES_DIR}/{tarball.name}"
+        files.put(
+            name=f"Upload {name} bundle",
+            src=str(tarball),
+            dest=bundle_path,
+            mode="0644",
             _sudo=True,
-            _sudo_user=user,
         )
-
-    if not host.get_fact(Directory, f"{plugins_dir}/zsh-autosuggestions"):
-        git.repo(
-            name=f"Install zsh-autosuggestions plugin for {user}",
-            src="https://github.com/zsh-users/zsh-autosuggestions",
-            dest=f"{plugins_dir}/zsh-autosuggestions",
+        server.shell(
+            name=f"Unpack {name} for {user}",
+            commands=[f"{GIT_SYNC_PATH} unpack {bundle_path} {revision} {dest}"],
             _sudo=True,
             _sudo_user=user,
         )
+        return
+
+    revision = resolve_git_ref(src, ref)
+    if head == revision:
+        host.noop(f"{dest} is already at {revision[:12]}")
+        return
+
+    server.shell(
+        name=f"Sync {name} for {user}",
+        commands=[f"{GIT_SYNC_PATH} clone {src} {revision} {dest}"],
+        _sudo=True,
+        _sudo_user=user,
+    )
+
+
+def _install_shared_frameworks(opts: ProfilesMold) -> None:
+    """Keep one system-wide checkout of each shell framework."""
 
-    if not host.get_fact(Directory, f"{plugins_dir}/zsh-syntax-highlighting"):
-        git.repo(
-            name=f"Install zsh-syntax-highlighting plugin for {user}",
-            src="https://github.com/zsh-users/zsh-syntax-highlighting",
-            dest=f"{plugins_dir}/zsh-syntax-highlighting",
+    for framework in opts.frameworks:
+        dest = _framework_path(framework, SHARED_FRAMEWORKS_DIR, shared=True)
+        _sync_checkout(opts, framework.name, framework.src, framework.ref, dest, "root")
+
+
+def _install_user_framework(opts: ProfilesMold, framework: ShellFramework, user: str, home_dir: str) -> None:
+    """Install a shell framework for a user, as its own checkout or as a link to the shared one."""
+
+    path = _framework_path(framework, home_dir, shared=False)
+    if not opts.shared_frameworks:
+        _sync_checkout(opts, framework.name, framework.src, framework.ref, path, user)
+        return
+
+    if framework.kind == ShellFrameworkKind.ZSH_PLUGIN:
+        # Loaded straight from the shared ZSH_CUSTOM
+        return
+
+    if host.get_fact(Directory, path):
+        files.directory(
+            name=f"Remove per-user {framework.name} checkout for {user}",
+            path=path,
+            present=False,
             _sudo=True,
-            _sudo_user=user,
         )
 
+    files.link(
+        name=f"Link shared {framework.name} for {user}",
+        path=path,
+        target=_framework_path(framework, SHARED_FRAMEWORKS_DIR, shared=True),
+        create_remote_dir=True,
+        _sudo=True,
+        _sudo_user=user,
+    )
+
+
+def _configure_user_oh_my_zsh(opts: ProfilesMold, user: str, home_dir: str) -> None:
+    """Install oh-my-zsh and its plugins for a specific user."""
+
+    for framework in opts.frameworks:
+        if framework.kind in (ShellFrameworkKind.OH_MY_ZSH, ShellFrameworkKind.ZSH_PLUGIN):
+            _install_user_framework(opts, framework, user, home_dir)
+
 
-def _configure_user_shell_profiles(user: str, home_dir: str) -> None:
+def _configure_user_shell_profiles(opts: ProfilesMold, user: str, home_dir: str) -> None:
     """Configure shell profiles (.zshrc, starship, direnv) for a specific user."""
 
     files.template(
@@ -97,6 +241,11 @@ def _configure_user_shell_profiles(user: str, home_dir: str) -> None:
         dest=f"{home_dir}/.zshrc",
         mode="0644",
         home=home_dir,
+        zsh_custom=f"{SHARED_FRAMEWORKS_DIR}/zsh-custom" if opts.shared_frameworks else None,
+        zsh_plugins=[
+            framework.name for framework in opts.frameworks if framework.kind == ShellFrameworkKind.ZSH_PLUGIN
+        ],
+        zsh_defer=opts.zsh_defer_plugins,
         _sudo=True,
         _sudo_user=user,
     )
@@ -122,60 +271,38 @@ def _configure_user_shell_profiles(user: str, home_dir: str) -> None:
         )
 
 
-def _install_firacode_font(user: str, home_dir: str) -> None:
-    """Install FiraCode NerdFont for the user."""
-
-    if host.get_fact(File, f"{home_dir}/.fonts/FiraCode/FiraCodeNerdFont-Regular.ttf"):
-        return
-
-    nerd_fonts_installer_path = "/tmp/nerd-fonts-installer.sh"
-    if not host.get_fact(File, nerd_fonts_installer_path):
-        curl_cmd = f"curl -L {CURL_ARGS_STR} {STATIC_URLS['nerd_fonts_installer']} -o {nerd_fonts_installer_path}"
-        server.shell(
-            name="Download nerd fonts installer",
-            commands=[curl_cmd],
-        )
-
-        files.file(
-            name="Set nerd fonts installer as executable",
-            path=nerd_fonts_installer_path,
-            mode="0755",
-        )
+def _install_zsh_bench() -> None:
+    """Install the zsh startup benchmark."""
 
-    server.shell(
-        name=f"Install FiraCode NerdFont for {user}",
-        commands=[f"echo '14' | bash {nerd_fonts_installer_path}"],
+    files.put(
+        name="Deploy zsh startup benchmark",
+        src=get_script_template("zsh-bench.sh"),
+        dest=ZSH_BENCH_PATH,
+        mode="0755",
         _sudo=True,
-        _sudo_user=user,
     )
 
-    files.file(
-        name="Remove FiraCode NerdFont zip file",
-        path="FiraCode.zip",
-        present=False,
-    )
 
-
-def _install_user_tmux(user: str, home_dir: str) -> None:
-    """Install and configure tmux for a specific user."""
+def _benchmark_zsh_startup(user: str, home_dir: str, label: str) -> None:
+    """Time interactive zsh startup for a user and record it in the user's state directory."""
 
     server.shell(
-        name="Remove existing tmux",
+        name=f"Benchmark zsh startup for {user} ({label})",
         commands=[
-            f"rm -rf {home_dir}/.tmux",
-            f"rm -rf {home_dir}/.config/tmux",
+            f"{ZSH_BENCH_PATH} {label} "
+            f'"{home_dir}/.local/state/nullforge/zsh-bench/{label}-$(date +%Y%m%dT%H%M%S).json"',
         ],
         _sudo=True,
         _sudo_user=user,
     )
 
-    git.repo(
-        name="Install TPM (Tmux Plugin Manager)",
-        src="https://github.com/tmux-plugins/tpm",
-        dest=f"{home_dir}/.tmux/plugins/tpm",
-        _sudo=True,
-        _sudo_user=user,
-    )
+
+def _install_user_tmux(opts: ProfilesMold, user: str, home_dir: str) -> None:
+    """Install and configure tmux for a specific user."""
+
+    for framework in opts.frameworks:
+        if framework.kind == ShellFrameworkKind.TPM:
+            _install_user_framework(opts, framework, user, home_dir)
 
     files.directory(
         name="Create tmux config directory",
@@ -195,124 +322,227 @@ def _install_user_tmux(user: str, home_dir: str) -> None:
     )
 
 
-def _install_user_nvim(user: str, home_dir: str) -> None:
-    """Install and configure nvim/NvChad for a specific user."""
+def _nvchad_revision(opts: ProfilesMold) -> str:
+    """Get the NvChad starter commit the nvim config is built from."""
 
-    server.shell(
-        name="Remove existing nvim",
-        commands=[
-            f"rm -rf {home_dir}/.config/nvim",
-            f"rm -rf {home_dir}/.local/state/nvim",
-            f"rm -rf {home_dir}/.local/share/nvim",
-        ],
-        _sudo=True,
-        _sudo_user=user,
-    )
+    ref = Versions(host).nvchad()
+    if opts.frameworks_bundle:
+        return fetch_git_tarball("nvchad-starter", NVCHAD_STARTER_SRC, ref)[1]
+    return resolve_git_ref(NVCHAD_STARTER_SRC, ref)
 
-    git.repo(
-        name="Install NvChad",
-        src="https://github.com/NvChad/starter",
-        dest=f"{home_dir}/.config/nvim",
-        _sudo=True,
-        _sudo_user=user,
-    )
+
+def _install_user_nvim(opts: ProfilesMold, user: str, home_dir: str) -> None:
+    """Install and configure nvim/NvChad for a specific user, converging in place."""
+
+    config_dir = f"{home_dir}/.config/nvim"
+    state_dir = f"{home_dir}/.local/state/nullforge"
+    patch_path = f"{state_dir}/nvim_patch.lua"
+    hash_path = f"{state_dir}/nvim-config.sha256"
+
+    ref = Versions(host).nvchad()
+    revision = _nvchad_revision(opts)
 
     with open(get_nvim_template("nvim_patch.lua.j2")) as f:
         nvim_patch = f.read()
 
-    files.block(
-        name="Apply nvim patch to init.lua",
-        path=f"{home_dir}/.config/nvim/init.lua",
-        content=nvim_patch,
-        marker="-- {mark} Change cursor to original after exiting vim",
+    # Plugins in ~/.local/share/nvim are kept; only the config is rebuilt on drift
+    config_hash = sha256(f"{revision}\n{NVIM_THEME}\n{nvim_patch}".encode()).hexdigest()
+    if host.get_fact(FileContents, path=hash_path, _sudo=True) == [config_hash]:
+        host.noop(f"nvim config for {user} is already at {revision[:12]}")
+        return
+
+    _sync_checkout(opts, "nvchad-starter", NVCHAD_STARTER_SRC, ref, config_dir, user)
+
+    files.put(
+        name=f"Stage nvim patch for {user}",
+        src=get_nvim_template("nvim_patch.lua.j2"),
+        dest=patch_path,
+        mode="0644",
+        create_remote_dir=True,
         _sudo=True,
         _sudo_user=user,
     )
 
+    marker = "Change cursor to original after exiting vim"
     server.shell(
-        name="Change theme to tokyo-night",
-        commands=[f'sed -i "s/onedark/tokyonight/" {home_dir}/.config/nvim/lua/chadrc.lua'],
+        name=f"Apply nvim patch and {NVIM_THEME} theme for {user}",
+        commands=[
+            f"cd {config_dir} && git checkout -q -- init.lua lua/chadrc.lua",
+            f'{{ echo "-- BEGIN {marker}"; cat {patch_path}; echo "-- END {marker}"; }} >> {config_dir}/init.lua',
+            f'sed -i "s/onedark/{NVIM_THEME}/" {config_dir}/lua/chadrc.lua',
+            f"echo {config_hash} > {hash_path}",
+        ],
         _sudo=True,
         _sudo_user=user,
     )
 
 
-def _install_starship(user: str) -> None:
-    """Install starship prompt."""
+def _bootstrap_user_plugins(opts: ProfilesMold, user: str, home_dir: str) -> None:
+    """Pre-install lazy.nvim and TPM plugins so the first editor session starts instantly."""
 
-    if host.get_fact(File, "/usr/local/bin/starship"):
-        return
+    with open(get_profile_template("tmux.conf"), "rb") as f:
+        tmux_conf_hash = sha256(f.read()).hexdigest()[:16]
 
-    distro = host.get_fact(LinuxDistribution)
+    arch = arch_id(host)
+    _bootstrap_plugin_tree(
+        opts,
+        user,
+        home_dir,
+        kind="nvim-plugins",
+        key=f"{arch}-{_nvchad_revision(opts)[:12]}",
+        tree_dir=f"{home_dir}/.local/share/nvim/lazy",
+        command='nvim --headless "+Lazy! sync" +qa',
+    )
+    _bootstrap_plugin_tree(
+        opts,
+        user,
+        home_dir,
+        kind="tmux-plugins",
+        key=f"{arch}-{tmux_conf_hash}",
+        tree_dir=f"{home_dir}/.tmux/plugins",
+        command=f"TMUX_PLUGIN_MANAGER_PATH={home_dir}/.tmux/plugins/ {home_dir}/.tmux/plugins/tpm/bin/install_plugins",
+        exclude="./tpm",
+    )
 
-    distro_name: str = distro.get("name", "") or "unknown"
-    distro_major: int = distro.get("major", 0) or 0
 
-    if distro_name.lower() in ["debian", "ubuntu"] and distro_major in [13, 25]:
-        _install_starship_from_apt()
-    else:
-        _install_starship_from_script(user)
+def _bootstrap_plugin_tree(
+    opts: ProfilesMold,
+    user: str,
+    home_dir: str,
+    kind: str,
+    key: str,
+    tree_dir: str,
+    command: str,
+    exclude: str | None = None,
+) -> None:
+    """Populate a plugin tree from the controller bundle, or bootstrap it on the host and keep the result.
+
+    The tree is only touched when the recorded key (arch plus config revision) differs.
+    """
+
+    key_path = f"{home_dir}/.local/state/nullforge/{kind}.key"
+    if host.get_fact(FileContents, path=key_path, _sudo=True) == [key]:
+        host.noop(f"{kind} for {user} are already at {key}")
+        return
 
+    local_bundle = bundle_path("plugins", f"{kind}-{key}.tar.gz")
+    remote_bundle = f"{BUNDLES_DIR}/{local_bundle.name}"
+    record_key = f"mkdir -p {home_dir}/.local/state/nullforge && echo {key} > {key_path}"
 
-def _install_starship_from_apt() -> None:
-    """Install starship prompt from apt."""
+    if opts.plugins_bundle and local_bundle.exists():
+        files.put(
+            name=f"Upload {kind} bundle",
+            src=str(local_bundle),
+            dest=remote_bundle,
+            mode="0644",
+            _sudo=True,
+        )
+        server.shell(
+            name=f"Unpack {kind} for {user}",
+            commands=[f"mkdir -p {tree_dir} && tar -xzf {remote_bundle} -C {tree_dir}", record_key],
+            _sudo=True,
+            _sudo_user=user,
+        )
+        return
 
-    apt.packages(
-        name="Install starship from apt",
-        packages=["starship"],
+    server.shell(
+        name=f"Bootstrap {kind} for {user}",
+        commands=[command, record_key],
         _sudo=True,
+        _sudo_user=user,
     )
 
+    if opts.plugins_bundle:
+        exclude_arg = f"--exclude={exclude} " if exclude else ""
+        server.shell(
+            name=f"Pack {kind} bundle",
+            commands=[f"mkdir -p {BUNDLES_DIR} && tar -czf {remote_bundle} {exclude_arg}-C {tree_dir} ."],
+            _sudo=True,
+        )
+        files.get(
+            name=f"Keep {kind} bundle on the controller",
+            src=remote_bundle,
+            dest=str(local_bundle),
+            _sudo=True,
+        )
+
 
-def _install_starship_from_script(user: str) -> None:
-    """Install starship prompt from script."""
+def _install_release(name: str, url: str, checksums_url: str, install: list[str]) -> OperationMeta | None:
+    """Download a release archive, verify it against the published checksum and install it once per version.
 
-    starship_install_path = "/tmp/starship.sh"
-    curl_cmd = f"curl -L {CURL_ARGS_STR} {STATIC_URLS['starship_install']} -o {starship_install_path}"
-    server.shell(
-        name="Download starship installation script",
-        commands=[curl_cmd],
-    )
+    The installed URL is recorded in a stamp file, so a host only downloads
+    again when the pinned version (or the architecture) changes.
+    """
 
-    files.file(
-        name="Set starship installation script as executable",
-        path=starship_install_path,
-        mode="0755",
-    )
+    stamp_path = f"{RELEASES_DIR}/{name}"
+    if host.get_fact(FileContents, stamp_path) == [url]:
+        return None
 
-    server.shell(
-        name="Install starship prompt",
-        commands=[f"sh {starship_install_path} -s -- -y"],
+    asset = url.rsplit("/", 1)[-1]
+    archive_path = f"/tmp/nullforge-{asset}"
+    select_checksum = f"awk -v f={asset} 'NF == 1 || $2 == f || $2 == \"*\" f {{ print $1; exit }}'"
+    return server.shell(
+        name=f"Install {name} from {asset}",
+        commands=[
+            f"curl -L {CURL_ARGS_STR} {url} -o {archive_path}",
+            f"expected=$(curl -L {CURL_ARGS_STR} {checksums_url} | {select_checksum}) "
+            f'&& [ -n "$expected" ] && echo "$expected  {archive_path}" | sha256sum -c --quiet - '
+            f"|| {{ rm -f {archive_path}; exit 1; }}",
+            *(command.format(archive=archive_path) for command in install),
+            f"rm -f {archive_path}",
+            f"mkdir -p {RELEASES_DIR} && echo {url} > {stamp_path}",
+        ],
         _sudo=True,
-        _sudo_user=user,
     )
 
 
-def _install_atuin(user: str) -> None:
-    """Install atuin for better shell history."""
+def _install_binary_release(name: str, url: str, member: str) -> None:
+    """Install a single binary from a release tarball into /usr/local/bin."""
 
-    if host.get_fact(File, f"/home/{user}/.local/bin/atuin"):
-        return
+    _install_release(
+        name,
+        url,
+        f"{url}.sha256",
+        [
+            f"tar -xzOf {{archive}} --wildcards '{member}' > /usr/local/bin/{name}.new",
+            f"chmod 0755 /usr/local/bin/{name}.new && mv -f /usr/local/bin/{name}.new /usr/local/bin/{name}",
+        ],
+    )
 
-    atuin_install_path = "/tmp/atuin.sh"
-    if not host.get_fact(File, atuin_install_path):
-        curl_cmd = f"curl -L {CURL_ARGS_STR} {STATIC_URLS['atuin_install']} -o {atuin_install_path}"
-        server.shell(
-            name="Download atuin installation script",
-            commands=[curl_cmd],
+
+def _install_fonts(opts: ProfilesMold) -> None:
+    """Install Nerd Fonts system-wide and refresh the font cache once."""
+
+    versions = Versions(host)
+    font_ops = [
+        _install_release(
+            f"font-{font}",
+            versions.nerd_font_tar(font),
+            versions.nerd_fonts_checksums(),
+            [f"rm -rf {FONTS_DIR}/{font} && mkdir -p {FONTS_DIR}/{font} && tar -xJf {{archive}} -C {FONTS_DIR}/{font}"],
         )
-        files.file(
-            name="Set atuin installation script as executable",
-            path=atuin_install_path,
-            mode="0755",
+        for font in opts.nerd_fonts
+    ]
+    font_ops = [op for op in font_ops if op]
+    if font_ops:
+        server.shell(
+            name="Refresh font cache",
+            commands=["fc-cache -f /usr/local/share/fonts"],
+            _sudo=True,
+            _if=any_changed(*font_ops),
         )
 
-    server.shell(
-        name=f"Install atuin for {user}",
-        commands=[f"sh {atuin_install_path}"],
-        _sudo=True,
-        _sudo_user=user,
-    )
+
+def _install_starship() -> None:
+    """Install starship prompt from the pinned release."""
+
+    _install_binary_release("starship", Versions(host).starship_tar(), "starship")
+
+
+def _install_atuin() -> None:
+    """Install atuin for better shell history from the pinned release."""
+
+    _install_binary_release("atuin", Versions(host).atuin_tar(), "*/atuin")
 
 
 def _install_eza() -> None:
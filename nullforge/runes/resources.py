@@ -0,0 +1,149 @@
+"""Resource partitioning deployment module."""
+
+from pathlib import PurePosixPath
+
+from pyinfra.api.operation import OperationMeta
+from pyinfra.context import host
+from pyinfra.facts.files import File, FindFiles
+from pyinfra.operations import files, server, systemd
+from pyinfra.operations.util import any_changed
+
+from nullforge.models.containers import ContainersBackendType
+from nullforge.models.resources import CONTAINERS_SLICE, PROXY_SLICE, SliceLimits
+from nullforge.molds import FeaturesMold
+from nullforge.templates import get_systemd_template
+
+
+SLICE_DROPIN_NAME = "50-nullforge-slice.conf"
+"""Name of the drop-ins placing units into, or limiting, a slice."""
+
+
+def deploy_resource_partitioning() -> None:
+    """Partition CPU, memory and IO between proxy services and containers with cgroup v2 slices."""
+
+    features: FeaturesMold = host.data.features
+    resources_opts = features.resources
+
+    if not resources_opts.partition:
+        _remove_resource_partitioning()
+        return
+
+    unit_templates = [
+        _deploy_slice(PROXY_SLICE, "NullForge proxy and tunnel services", resources_opts.proxy),
+    ]
+
+    members = dict.fromkeys(features.proxy_units + resources_opts.extra_proxy_units, PROXY_SLICE)
+    if features.containers.install:
+        if features.containers.backend_type == ContainersBackendType.DOCKER:
+            # Containers land here through daemon.json cgroup-parent, the engine itself through drop-ins
+            unit_templates.append(_deploy_slice(CONTAINERS_SLICE, "NullForge containers", resources_opts.containers))
+            members |= dict.fromkeys(["docker.service", "containerd.service"], CONTAINERS_SLICE)
+        else:
+            # Podman places containers under machine.slice, so the limits go there instead
+            unit_templates.append(_deploy_slice_limits("machine.slice", resources_opts.containers))
+
+    member_templates = {unit: _deploy_slice_member(unit, slice_name) for unit, slice_name in members.items()}
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon for resource slices",
+        _sudo=True,
+        _if=any_changed(*unit_templates, *member_templates.values()),
+    )
+
+    for unit, member_template in member_templates.items():
+        server.shell(
+            name=f"Restart {unit} into {members[unit]}",
+            commands=[f"systemctl try-restart {unit}"],
+            _sudo=True,
+            _if=member_template.did_change,
+        )
+
+
+def _remove_resource_partitioning() -> None:
+    """Take services back out of the NullForge slices and remove the slices and their limits."""
+
+    dropins = host.get_fact(FindFiles, path="/etc/systemd/system", fname=SLICE_DROPIN_NAME) or []
+    slices = [
+        slice_name
+        for slice_name in (PROXY_SLICE, CONTAINERS_SLICE)
+        if host.get_fact(File, f"/etc/systemd/system/{slice_name}")
+    ]
+    if not dropins and not slices:
+        return
+
+    for path in dropins:
+        files.file(
+            name=f"Remove {path}",
+            path=path,
+            present=False,
+            _sudo=True,
+        )
+
+    for slice_name in slices:
+        files.file(
+            name=f"Remove {slice_name}",
+            path=f"/etc/systemd/system/{slice_name}",
+            present=False,
+            _sudo=True,
+        )
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon after removing resource slices",
+        _sudo=True,
+    )
+
+    # Drop-in directories are named after their unit; slices only had limits, services move back out
+    units = [PurePosixPath(path).parent.name.removesuffix(".d") for path in dropins]
+    for unit in units:
+        if unit.endswith(".service"):
+            server.shell(
+                name=f"Restart {unit} out of its NullForge slice",
+                commands=[f"systemctl try-restart {unit}"],
+                _sudo=True,
+            )
+
+
+def _deploy_slice(slice_name: str, description: str, limits: SliceLimits) -> OperationMeta:
+    """Deploy a slice unit with its resource controls."""
+
+    return files.template(
+        name=f"Deploy {slice_name}",
+        src=get_systemd_template("slice.j2"),
+        dest=f"/etc/systemd/system/{slice_name}",
+        mode="0644",
+        DESCRIPTION=description,
+        LIMITS=limits,
+        _sudo=True,
+    )
+
+
+def _deploy_slice_limits(slice_name: str, limits: SliceLimits) -> OperationMeta:
+    """Apply resource controls to an existing slice through a drop-in."""
+
+    return files.template(
+        name=f"Limit {slice_name}",
+        src=get_systemd_template("slice.j2"),
+        dest=f"/etc/systemd/system/{slice_name}.d/{SLICE_DROPIN_NAME}",
+        mode="0644",
+        create_remote_dir=True,
+        DESCRIPTION="",
+        LIMITS=limits,
+        _sudo=True,
+    )
+
+
+def _deploy_slice_member(unit: str, slice_name: str) -> OperationMeta:
+    """Move a service into a slice through a drop-in."""
+
+    return files.template(
+        name=f"Place {unit} into {slice_name}",
+        src=get_systemd_template("slice-member.conf.j2"),
+        dest=f"/etc/systemd/system/{unit}.d/{SLICE_DROPIN_NAME}",
+        mode="0644",
+        create_remote_dir=True,
+        SLICE=slice_name,
+        _sudo=True,
+    )
+
+
+deploy_resource_partitioning()
@@ -0,0 +1,124 @@
+"""Cloudflare Zero Trust tunnel deployment module."""
+
+from pyinfra.context import host
+from pyinfra.operations import files, systemd
+from pyinfra.operations.util import any_changed
+
+from nullforge.molds import FeaturesMold, TunnelMold
+from nullforge.runes.cloudflare import ensure_cloudflare_user, install_cloudflared
+from nullforge.templates import get_cloudflare_template, get_script_template, get_systemd_template
+
+
+TUNNEL_DIR = "/etc/cloudflare/tunnel"
+"""Where the tunnel configuration, token and helper scripts are deployed on the host."""
+
+
+def deploy_tunnel() -> None:
+    """Deploy a cloudflared Zero Trust tunnel."""
+
+    features: FeaturesMold = host.data.features
+    tunnel_opts = features.tunnel
+
+    if not tunnel_opts.token:
+        raise ValueError("A tunnel token is required to deploy the Zero Trust tunnel")
+
+    ensure_cloudflare_user()
+    install_cloudflared()
+
+    warp_iface = ""
+    if tunnel_opts.via_warp:
+        warp_opts = features.warp
+        warp_iface = f"{warp_opts.iface}0" if warp_opts.multi_tunnel else warp_opts.tunnel_iface
+
+    _deploy_tunnel_service(tunnel_opts, warp_iface)
+
+
+def _deploy_tunnel_service(opts: TunnelMold, warp_iface: str) -> None:
+    """Render the tunnel configuration and service with connection tuning and resource limits."""
+
+    files.directory(
+        name=f"Ensure {TUNNEL_DIR} directory exists",
+        path=TUNNEL_DIR,
+        user="cloudflare",
+        group="cloudflare",
+        mode="0750",
+        _sudo=True,
+    )
+
+    config_path = f"{TUNNEL_DIR}/config.yaml"
+    config_template = files.template(
+        name="Configure cloudflared tunnel YAML config",
+        src=get_cloudflare_template("tunnel.yaml.j2"),
+        dest=config_path,
+        user="cloudflare",
+        group="cloudflare",
+        mode="0640",
+        PROTOCOL=opts.protocol,
+        HA_CONNECTIONS=opts.ha_connections,
+        EDGE_IP_VERSION=opts.edge_ip_version,
+        COMPRESSION_QUALITY=opts.compression_quality,
+        RETRIES=opts.retries,
+        GRACE_PERIOD=opts.grace_period,
+        METRICS_ADDRESS=opts.metrics_address,
+        _sudo=True,
+    )
+
+    # The token grants the tunnel identity, so only root and the service read it
+    env_path = f"{TUNNEL_DIR}/tunnel.env"
+    env_template = files.template(
+        name="Deploy cloudflared tunnel token",
+        src=get_cloudflare_template("tunnel.env.j2"),
+        dest=env_path,
+        user="root",
+        group="cloudflare",
+        mode="0640",
+        TOKEN=opts.token,
+        _sudo=True,
+    )
+
+    if warp_iface:
+        files.put(
+            name="Deploy Zero Trust tunnel WARP routing script",
+            src=get_script_template("zt-tunnel-warp.sh"),
+            dest=f"{TUNNEL_DIR}/zt-tunnel-warp.sh",
+            user="root",
+            group="cloudflare",
+            mode="0755",
+            _sudo=True,
+        )
+
+    service_name = "cloudflare-tunnel"
+    service_template = files.template(
+        name="Deploy cloudflared tunnel service",
+        src=get_systemd_template("cloudflare-tunnel.service.j2"),
+        dest=f"/etc/systemd/system/{service_name}.service",
+        mode="0644",
+        CONFIG_PATH=config_path,
+        ENV_PATH=env_path,
+        WORKDIR=TUNNEL_DIR,
+        WARP_IFACE=warp_iface,
+        CPU_QUOTA=opts.cpu_quota,
+        MEMORY_MAX=opts.memory_max,
+        TASKS_MAX=opts.tasks_max,
+        NOFILE_LIMIT=opts.nofile_limit,
+        _sudo=True,
+    )
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon for cloudflared tunnel",
+        _sudo=True,
+        _if=service_template.did_change,
+    )
+
+    systemd.service(
+        name="Enable and start cloudflared tunnel",
+        service=service_name,
+        running=True,
+        enabled=True,
+        restarted=True,
+        _sudo=True,
+        _if=any_changed(config_template, env_template, service_template),
+    )
+
+
+deploy_tunnel()
@@ -1,17 +1,50 @@
 """Cloudflare WARP deployment module."""
 
+from ipaddress import ip_network
+from pathlib import PurePosixPath
+
+from pyinfra.api.operation import OperationMeta
 from pyinfra.context import host
-from pyinfra.facts.files import File
-from pyinfra.operations import apt, files, server, systemd
+from pyinfra.facts.files import File, FindDirectories, FindInFile
+from pyinfra.operations import apt, files, python, server, systemd
 from pyinfra.operations.util import any_changed
 
-from nullforge.models.warp import WarpEngineType
+from nullforge.models.warp import WarpEngineType, WarpTunnel
 from nullforge.molds import FeaturesMold, WarpMold
 from nullforge.runes.cloudflare import ensure_cloudflare_user
 from nullforge.smithy.http import CURL_ARGS_STR
 from nullforge.smithy.network import has_ipv6
+from nullforge.smithy.state import STATE_DIR, read_state
 from nullforge.smithy.versions import Versions
-from nullforge.templates import get_script_template, get_systemd_template
+from nullforge.templates import get_etc_template, get_script_template, get_systemd_template
+
+
+WARP_ENGINE_STATE = "warp-engine.env"
+"""State file recording the auto-selected WARP engine and its measurements."""
+
+WARP_SELECT_PATH = "/usr/local/lib/nullforge/warp-select.sh"
+"""Where the WARP engine selection script is installed on the host."""
+
+WARP_MTU_PATH = "/usr/local/lib/nullforge/warp-mtu.sh"
+"""Where the WARP path MTU discovery script is installed on the host."""
+
+WARP_ENDPOINTS_PATH = "/usr/local/lib/nullforge/warp-endpoints.py"
+"""Where the WARP endpoint scanner is installed on the host."""
+
+WARP_ECMP_PATH = "/usr/local/lib/nullforge/warp-ecmp.sh"
+"""Where the WARP multi-tunnel ECMP routing script is installed on the host."""
+
+WARP_ECMP_CONF_PATH = "/etc/nullforge/warp-ecmp.env"
+
+WARP_ROUTE_PATH = "/usr/local/lib/nullforge/warp-route.sh"
+"""Where the WARP selective routing script is installed on the host."""
+
+WARP_ROUTE_CONF_PATH = "/etc/nullforge/warp-route.env"
+WARP_TABLE_ID = 123
+
+WARP_MSS_TABLE = "nullforge_warp_mss"
+WARP_MSS_RULES_PATH = "/etc/nullforge/warp-mss.nft"
+WARP_MSS_SERVICE_NAME = "warp-mss-clamp"
 
 
 def deploy_warp() -> None:
@@ -22,21 +55,192 @@ def deploy_warp() -> None:
 
     ensure_cloudflare_user()
 
-    files.directory(
-        name="Ensure WARP engine configuration directory exists",
-        path=warp_opts.engine.config_dir,
-        user="cloudflare",
-        group="cloudflare",
+    if warp_opts.engine_type == WarpEngineType.AUTO:
+        selected = read_state(host, WARP_ENGINE_STATE).get("WARP_ENGINE")
+        if not selected or warp_opts.auto_reselect:
+            _select_warp_engine(warp_opts)
+            # The winner is only recorded once the measurement has run, so the rest is deployed from there
+            python.call(
+                name="Deploy the selected WARP engine",
+                function=_deploy_selected_engine,
+                opts=warp_opts,
+            )
+            return
+        warp_opts.engine_type = WarpEngineType(selected)
+
+    _deploy_engine(warp_opts)
+
+
+def _deploy_selected_engine(opts: WarpMold) -> None:
+    """Resolve the auto engine from the selection just recorded on the host and deploy it."""
+
+    opts.engine_type = WarpEngineType(read_state(host, WARP_ENGINE_STATE)["WARP_ENGINE"])
+    _deploy_engine(opts)
+
+
+def _deploy_engine(opts: WarpMold) -> None:
+    """Deploy the tunnels of a concrete engine with their routing, tuning and health checks."""
+
+    _ensure_engine_config_dir(opts)
+    _remove_stale_tunnels(opts)
+
+    if opts.multi_tunnel:
+        _deploy_warp_ecmp(opts)
+    _deploy_warp_routing(opts)
+
+    match opts.engine_type:
+        case WarpEngineType.WIREGUARD:
+            _deploy_wireguard_warp(opts)
+        case WarpEngineType.MASQUE:
+            _deploy_masque_warp(opts)
+
+    if opts.endpoint_scan:
+        _deploy_warp_endpoint_scan(opts)
+    _deploy_warp_mtu(opts)
+    _deploy_warp_mss_clamping(opts)
+
+    _remove_legacy_health_check_timer()
+
+    if opts.health_check:
+        _deploy_warp_health_check(opts)
+    else:
+        _remove_warp_health_check(opts)
+
+
+def _ensure_engine_config_dir(opts: WarpMold) -> None:
+    """Ensure the WARP engine and tunnel instance configuration directories exist."""
+
+    config_dirs = [opts.engine.config_dir]
+    config_dirs += [tunnel.config_dir for tunnel in opts.tunnel_instances if tunnel.config_dir not in config_dirs]
+    for config_dir in config_dirs:
+        files.directory(
+            name=f"Ensure {opts.engine_type} WARP configuration directory {config_dir} exists",
+            path=config_dir,
+            user="cloudflare",
+            group="cloudflare",
+            mode="0755",
+            _sudo=True,
+        )
+
+
+def _remove_stale_tunnels(opts: WarpMold) -> None:
+    """Tear down tunnel instances of the selected engine left over from a larger tunnels setting.
+
+    The instances are stopped while the ECMP configuration still lists them, so their down
+    hooks drop their routing rules and take them out of the multipath route.
+    """
+
+    config_dir = opts.engine.config_dir
+    found = host.get_fact(FindDirectories, path=config_dir, maxdepth=1, fname=f"{opts.iface}[0-9]*") or []
+    found_ifaces = {PurePosixPath(path).name for path in found}
+    current_ifaces = {tunnel.iface for tunnel in opts.tunnel_instances}
+    suffixes = [iface.removeprefix(opts.iface) for iface in found_ifaces]
+    indexes = [int(suffix) for suffix in suffixes if suffix.isdigit()]
+    if not indexes:
+        return
+
+    # Instance names of every tunnel count up to the largest one found on the host
+    known = opts.model_copy(update={"tunnels": max(2, max(indexes) + 1)})
+    stale = [tunnel for tunnel in known.tunnel_instances if tunnel.iface in found_ifaces - current_ifaces]
+
+    for tunnel in stale:
+        for service in (tunnel.health_check_service_name, tunnel.systemd_service_name):
+            systemd.service(
+                name=f"Stop and disable stale WARP {service}",
+                service=service,
+                running=False,
+                enabled=False,
+                _sudo=True,
+            )
+
+        stale_paths = [
+            f"/etc/systemd/system/{tunnel.health_check_service_name}.service",
+            f"/etc/systemd/system/{tunnel.systemd_service_name}.service",
+            f"/etc/wireguard/{tunnel.iface}.conf",
+            f"{STATE_DIR}/{tunnel.state_name('mtu')}",
+            f"{STATE_DIR}/{tunnel.state_name('endpoint')}",
+        ]
+        for path in stale_paths:
+            files.file(
+                name=f"Remove stale WARP {path}",
+                path=path,
+                present=False,
+                _sudo=True,
+            )
+
+        files.directory(
+            name=f"Remove stale WARP configuration {tunnel.config_dir}",
+            path=tunnel.config_dir,
+            present=False,
+            _sudo=True,
+        )
+
+    if stale:
+        systemd.daemon_reload(
+            name="Reload systemd daemon after removing stale WARP tunnels",
+            _sudo=True,
+        )
+
+    if not opts.multi_tunnel and host.get_fact(File, WARP_ECMP_CONF_PATH):
+        server.shell(
+            name="Flush WARP ECMP routes",
+            commands=[f"{WARP_ECMP_PATH} flush"],
+            _sudo=True,
+        )
+
+        files.file(
+            name="Remove WARP ECMP configuration",
+            path=WARP_ECMP_CONF_PATH,
+            present=False,
+            _sudo=True,
+        )
+
+
+def _select_warp_engine(opts: WarpMold) -> None:
+    """Deploy every engine inactive, measure each through its tunnel and keep the faster one.
+
+    The decision and measurements are recorded on the host, so later casts deploy
+    the selected engine (and its health checker) directly.
+    """
+
+    # The candidates' tunnel hooks call the ECMP and routing scripts, so both go in first.
+    # Interface names only differ between engines for a single tunnel with a custom iface.
+    hook_opts = opts.model_copy(update={"engine_type": WarpEngineType.MASQUE})
+    if opts.multi_tunnel:
+        _deploy_warp_ecmp(hook_opts)
+    _deploy_warp_routing(hook_opts)
+
+    # Engines are compared on their first tunnel instance
+    candidates = []
+    for engine_type in (WarpEngineType.MASQUE, WarpEngineType.WIREGUARD):
+        engine_opts = opts.model_copy(update={"engine_type": engine_type})
+        _ensure_engine_config_dir(engine_opts)
+        if engine_type == WarpEngineType.MASQUE:
+            _deploy_masque_warp(engine_opts, activate=False)
+        else:
+            _deploy_wireguard_warp(engine_opts, activate=False)
+        tunnels = engine_opts.tunnel_instances
+        services = ",".join(tunnel.systemd_service_name for tunnel in tunnels)
+        candidates.append(f"{engine_type}:{tunnels[0].systemd_service_name}:{tunnels[0].iface}:{services}")
+
+    files.put(
+        name="Deploy WARP engine selection script",
+        src=get_script_template("warp-select.sh"),
+        dest=WARP_SELECT_PATH,
+        user="root",
+        group="root",
         mode="0755",
         _sudo=True,
     )
 
-    match warp_opts.engine_type:
-        case WarpEngineType.WIREGUARD:
-            _deploy_wireguard_warp(warp_opts)
-        case WarpEngineType.MASQUE:
-            _deploy_masque_warp(warp_opts)
-            _deploy_warp_health_check(warp_opts)
+    server.shell(
+        name="Measure WARP engines and keep the faster one",
+        commands=[
+            f"{WARP_SELECT_PATH} {STATE_DIR}/{WARP_ENGINE_STATE} "
+            f"'{opts.auto_latency_url}' '{opts.auto_throughput_url}' {' '.join(candidates)}",
+        ],
+        _sudo=True,
+    )
 
 
 def _install_wgcf(opts: WarpMold) -> None:
@@ -66,7 +270,7 @@ def _install_wgcf(opts: WarpMold) -> None:
     )
 
 
-def _deploy_wireguard_warp(opts: WarpMold) -> None:
+def _deploy_wireguard_warp(opts: WarpMold, activate: bool = True) -> None:
     """Deploy WARP using WireGuard."""
 
     apt.packages(
@@ -77,39 +281,79 @@ def _deploy_wireguard_warp(opts: WarpMold) -> None:
 
     _install_wgcf(opts)
 
-    wgcf_account_path = opts.engine.account_path
-    wgcf_profile_path = opts.engine.profile_path
+    for tunnel in opts.tunnel_instances:
+        _deploy_wireguard_tunnel(opts, tunnel, activate)
+
+
+def _deploy_wireguard_tunnel(opts: WarpMold, tunnel: WarpTunnel, activate: bool) -> None:
+    """Register and bring up a single WireGuard WARP tunnel."""
+
+    wgcf_account_path = tunnel.account_path
+    wgcf_profile_path = tunnel.profile_path
     if not host.get_fact(File, wgcf_account_path):
         server.shell(
-            name="Register wgcf account",
+            name=f"Register wgcf account for {tunnel.iface}",
             commands=f"wgcf register --accept-tos --config {wgcf_account_path}",
         )
 
-    if not host.get_fact(File, wgcf_profile_path):
+    generate_profile = not host.get_fact(File, wgcf_profile_path)
+    if generate_profile:
         server.shell(
-            name="Generate WireGuard profile",
+            name=f"Generate WireGuard profile for {tunnel.iface}",
             commands=f"wgcf generate --config {wgcf_account_path} --profile {wgcf_profile_path}",
         )
 
         server.shell(
-            name="Post-process WireGuard profile",
+            name=f"Post-process WireGuard profile for {tunnel.iface}",
             commands=f"sed -i '/^DNS = /d' {wgcf_profile_path} "
             rf"&& sed -i '/^\[Interface\]/a Table = off' {wgcf_profile_path}",
         )
 
         files.link(
-            name="Link WireGuard profile to /etc/wireguard/warp.conf",
-            path=wgcf_profile_path,
-            target="/etc/wireguard/warp.conf",
+            name=f"Link WireGuard profile to /etc/wireguard/{tunnel.iface}.conf",
+            path=f"/etc/wireguard/{tunnel.iface}.conf",
+            target=wgcf_profile_path,
+            _sudo=True,
+        )
+
+    # wg-quick substitutes %i with the interface name
+    hooks = {WARP_ECMP_PATH: opts.multi_tunnel, WARP_ROUTE_PATH: opts.selective_routing}
+    hook_commands = []
+    for script, wanted in hooks.items():
+        present = bool(host.get_fact(FindInFile, path=wgcf_profile_path, pattern=f"PostUp = {script} ", _sudo=True))
+        if wanted and not present:
+            hook_commands.append(
+                f"grep -qF 'PostUp = {script} up %i' {wgcf_profile_path} || "
+                rf"sed -i --follow-symlinks '/^Table = off/a PostUp = {script} up %i\nPostDown = {script} down %i' "
+                f"{wgcf_profile_path}"
+            )
+        elif present and not wanted:
+            hook_commands.append(rf"sed -i --follow-symlinks '\#{script}#d' {wgcf_profile_path}")
+
+    # wg-quick runs the PostDown hooks from the profile as it is when the tunnel goes down,
+    # so a running tunnel is stopped before its hooks change and started again after
+    restart = bool(hook_commands) and activate and not generate_profile
+    if restart:
+        systemd.service(
+            name=f"Stop WireGuard WARP {tunnel.iface} to change its hooks",
+            service=tunnel.systemd_service_name,
+            running=False,
+            _sudo=True,
+        )
+
+    if hook_commands:
+        server.shell(
+            name=f"Sync WireGuard profile hooks for {tunnel.iface}",
+            commands=hook_commands,
             _sudo=True,
         )
 
+    if activate:
         systemd.service(
-            name="Enable and start WireGuard WARP",
-            service=opts.engine.systemd_service_name,
+            name=f"Enable and start WireGuard WARP {tunnel.iface}",
+            service=tunnel.systemd_service_name,
             running=True,
             enabled=True,
-            reloaded=True,
             _sudo=True,
         )
 
@@ -146,21 +390,61 @@ def _install_usque(opts: WarpMold) -> None:
     )
 
 
-def _deploy_masque_warp(opts: WarpMold) -> None:
+def _deploy_masque_warp(opts: WarpMold, activate: bool = True) -> None:
     """Deploy WARP using Masque."""
 
     _install_usque(opts)
 
-    usque_config_path = opts.engine.config_path
+    ipv6_enabled = has_ipv6(host)
+    if ipv6_enabled:
+        rt_tables_dir = "/etc/iproute2"
+        rt_tables_path = f"{rt_tables_dir}/rt_tables"
+        files.directory(
+            name="Create /etc/iproute2 directory",
+            path=rt_tables_dir,
+            user="root",
+            group="root",
+            mode="0755",
+            _sudo=True,
+        )
+
+        files.file(
+            name=f"Set {rt_tables_path} group to cloudflare",
+            path=rt_tables_path,
+            group="cloudflare",
+            mode="0664",
+            _sudo=True,
+        )
+
+        # Multiple tunnels are routed by the ECMP script instead
+        if not opts.multi_tunnel:
+            files.put(
+                name="Deploy WARP v6 policy script",
+                src=get_script_template("warp-v6-policy.sh"),
+                dest=opts.engine.policy_script,
+                user="cloudflare",
+                group="cloudflare",
+                mode="0755",
+                _sudo=True,
+            )
+
+    for tunnel in opts.tunnel_instances:
+        _deploy_masque_tunnel(opts, tunnel, ipv6_enabled, activate)
+
+
+def _deploy_masque_tunnel(opts: WarpMold, tunnel: WarpTunnel, ipv6_enabled: bool, activate: bool) -> None:
+    """Register and bring up a single Masque WARP tunnel."""
+
+    usque_config_path = tunnel.config_path
     if not host.get_fact(File, usque_config_path):
         server.shell(
-            name="Enroll device in Warp",
+            name=f"Enroll device in Warp for {tunnel.iface}",
             commands=f"usque enroll -c {usque_config_path}",
             _sudo=True,
         )
 
         server.shell(
-            name="Register device in Warp",
+            name=f"Register device in Warp for {tunnel.iface}",
             commands=f"usque register -c {usque_config_path} --accept-tos",
             _sudo=True,
             _retries=3,  # type: ignore[reportCallIssue]
@@ -168,7 +452,7 @@ def _deploy_masque_warp(opts: WarpMold) -> None:
         )
 
     files.file(
-        name="Ensure WARP config file ownership to cloudflare",
+        name=f"Ensure WARP config file ownership to cloudflare for {tunnel.iface}",
         path=usque_config_path,
         user="cloudflare",
         group="cloudflare",
@@ -178,117 +462,517 @@ def _deploy_masque_warp(opts: WarpMold) -> None:
 
     if opts.zero_trust:
         server.shell(
-            name="Enroll device in Warp after ZeroTrust registration",
+            name=f"Enroll device in Warp after ZeroTrust registration for {tunnel.iface}",
             commands=f"usque enroll -c {usque_config_path}",
             _sudo=True,
         )
 
-    ipv6_enabled = has_ipv6(host)
-    if ipv6_enabled:
-        rt_tables_dir = "/etc/iproute2"
-        rt_tables_path = f"{rt_tables_dir}/rt_tables"
-        files.directory(
-            name="Create /etc/iproute2 directory",
-            path=rt_tables_dir,
-            user="root",
-            group="root",
-            mode="0755",
+    service_template = files.template(
+        name=f"Deploy Masque WARP service configuration for {tunnel.iface}",
+        src=get_systemd_template("cloudflare-warp.service.j2"),
+        dest=f"/etc/systemd/system/{tunnel.systemd_service_name}.service",
+        mode="0644",
+        INSTANCE=opts.multi_tunnel,
+        CONFIG_PATH=usque_config_path,
+        INET_NAME=tunnel.iface,
+        ENABLE_IPV6=ipv6_enabled,
+        POLICY_SCRIPT=opts.engine.policy_script,
+        ECMP_SCRIPT=WARP_ECMP_PATH if opts.multi_tunnel else "",
+        ROUTE_SCRIPT=WARP_ROUTE_PATH if opts.selective_routing else "",
+        MTU=opts.mtu or opts.engine.max_mtu,
+        MTU_STATE_PATH=f"{STATE_DIR}/{tunnel.state_name('mtu')}",
+        ENDPOINT_STATE_PATH=f"{STATE_DIR}/{tunnel.state_name('endpoint')}",
+        _sudo=True,
+    )
+
+    systemd.daemon_reload(
+        name=f"Reload systemd daemon for Masque WARP {tunnel.iface}",
+        _sudo=True,
+        _if=service_template.did_change,
+    )
+
+    if activate:
+        systemd.service(
+            name=f"Enable and start Masque WARP service {tunnel.iface}",
+            service=tunnel.systemd_service_name,
+            running=True,
+            enabled=True,
             _sudo=True,
         )
 
-        files.file(
-            name=f"Set {rt_tables_path} group to cloudflare",
-            path=rt_tables_path,
-            group="cloudflare",
-            mode="0664",
+        systemd.service(
+            name=f"Restart Masque WARP service {tunnel.iface} with its new unit",
+            service=tunnel.systemd_service_name,
+            restarted=True,
             _sudo=True,
+            _if=service_template.did_change,
         )
 
-        files.put(
-            name="Deploy WARP v6 policy script",
-            src=get_script_template("warp-v6-policy.sh"),
-            dest=opts.engine.policy_script,
-            user="cloudflare",
-            group="cloudflare",
-            mode="0755",
+
+def _tunnel_config_path(opts: WarpMold, tunnel: WarpTunnel) -> str:
+    """Engine configuration holding the tunnel endpoint and MTU."""
+
+    if opts.engine_type == WarpEngineType.MASQUE:
+        return tunnel.config_path
+    return tunnel.profile_path
+
+
+def _deploy_warp_ecmp(opts: WarpMold) -> None:
+    """Spread flows across multiple WARP tunnels with a multipath route in the shared WARP table."""
+
+    files.put(
+        name="Deploy WARP ECMP routing script",
+        src=get_script_template("warp-ecmp.sh"),
+        dest=WARP_ECMP_PATH,
+        user="root",
+        group="root",
+        mode="0755",
+        _sudo=True,
+    )
+
+    files.directory(
+        name="Ensure /etc/nullforge directory exists",
+        path=str(PurePosixPath(WARP_ECMP_CONF_PATH).parent),
+        mode="0755",
+        _sudo=True,
+    )
+
+    conf_template = files.template(
+        name="Deploy WARP ECMP configuration",
+        src=get_etc_template("warp-ecmp.env.j2"),
+        dest=WARP_ECMP_CONF_PATH,
+        mode="0644",
+        IFACES=[tunnel.iface for tunnel in opts.tunnel_instances],
+        TABLE_ID=WARP_TABLE_ID,
+        PRIO=12100,
+        FWMARK=opts.fwmark,
+        _sudo=True,
+    )
+
+    # Hash on the L4 5-tuple so a flow sticks to one tunnel while flows spread across all
+    for family in ("ipv4", "ipv6"):
+        server.sysctl(
+            name=f"Hash {family} multipath routes per flow",
+            key=f"net.{family}.fib_multipath_hash_policy",
+            value=1,
+            persist=True,
+            persist_file="/etc/sysctl.d/98-nullforge-warp.conf",
+            _sudo=True,
+        )
+
+    server.shell(
+        name="Sync WARP ECMP routes",
+        commands=[f"{WARP_ECMP_PATH} sync"],
+        _sudo=True,
+        _if=conf_template.did_change,
+    )
+
+
+def _deploy_warp_routing(opts: WarpMold) -> None:
+    """Route only the configured destinations, users and units through WARP by fwmark."""
+
+    timer_path = "/etc/systemd/system/warp-route-refresh.timer"
+    if not opts.selective_routing:
+        if host.get_fact(File, WARP_ROUTE_CONF_PATH):
+            server.shell(
+                name="Remove selective WARP routing rules",
+                commands=[f"{WARP_ROUTE_PATH} flush"],
+                _sudo=True,
+            )
+            files.file(
+                name="Remove selective WARP routing configuration",
+                path=WARP_ROUTE_CONF_PATH,
+                present=False,
+                _sudo=True,
+            )
+        if host.get_fact(File, timer_path):
+            systemd.service(
+                name="Disable WARP route refresh timer",
+                service="warp-route-refresh.timer",
+                running=False,
+                enabled=False,
+                _sudo=True,
+            )
+        return
+
+    apt.packages(
+        name="Install nftables for selective WARP routing",
+        packages=["nftables"],
+        no_recommends=True,
+        _sudo=True,
+    )
+
+    files.put(
+        name="Deploy WARP selective routing script",
+        src=get_script_template("warp-route.sh"),
+        dest=WARP_ROUTE_PATH,
+        user="root",
+        group="root",
+        mode="0755",
+        _sudo=True,
+    )
+
+    files.directory(
+        name="Ensure /etc/nullforge directory exists",
+        path=str(PurePosixPath(WARP_ROUTE_CONF_PATH).parent),
+        mode="0755",
+        _sudo=True,
+    )
+
+    cidrs = [ip_network(cidr) for cidr in opts.route_cidrs]
+    conf_template = files.template(
+        name="Deploy WARP selective routing configuration",
+        src=get_etc_template("warp-route.env.j2"),
+        dest=WARP_ROUTE_CONF_PATH,
+        mode="0644",
+        MEMBERS=[tunnel.iface for tunnel in opts.tunnel_instances],
+        MULTI=opts.multi_tunnel,
+        TABLE_ID=WARP_TABLE_ID,
+        FWMARK=opts.fwmark,
+        CIDRS4=[str(cidr) for cidr in cidrs if cidr.version == 4],
+        CIDRS6=[str(cidr) for cidr in cidrs if cidr.version == 6],
+        DOMAINS=opts.route_domains,
+        USERS=opts.route_users,
+        UNITS=opts.route_units,
+        _sudo=True,
+    )
+
+    # Tunnels already up pick up the new rules now; the up/down hooks handle later restarts
+    for tunnel in opts.tunnel_instances:
+        server.shell(
+            name=f"Apply selective WARP routing on {tunnel.iface}",
+            commands=[
+                f"if ip link show dev {tunnel.iface} up | grep -q .; then {WARP_ROUTE_PATH} up {tunnel.iface}; fi"
+            ],
+            _sudo=True,
+            _if=conf_template.did_change,
+        )
+
+    unit_templates = [
+        files.template(
+            name=f"Deploy WARP route refresh {unit}",
+            src=get_systemd_template(f"{unit}.j2"),
+            dest=f"/etc/systemd/system/{unit}",
+            mode="0644",
+            ROUTE_SCRIPT=WARP_ROUTE_PATH,
+            INTERVAL=opts.route_refresh_interval,
+            _sudo=True,
+        )
+        for unit in ("warp-route-refresh.service", "warp-route-refresh.timer")
+    ]
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon for WARP route refresh",
+        _sudo=True,
+        _if=any_changed(*unit_templates),
+    )
+
+    systemd.service(
+        name="Enable and start WARP route refresh timer",
+        service="warp-route-refresh.timer",
+        running=bool(opts.route_domains),
+        enabled=bool(opts.route_domains),
+        _sudo=True,
+    )
+
+
+def _deploy_warp_endpoint_scan(opts: WarpMold) -> None:
+    """Rank candidate WARP endpoints by RTT and loss and pin the best one in the engine config."""
+
+    apt.packages(
+        name="Install WARP endpoint scanner dependencies",
+        packages=["python3", "iputils-ping"],
+        no_recommends=True,
+        _sudo=True,
+    )
+
+    files.put(
+        name="Deploy WARP endpoint scanner",
+        src=get_script_template("warp-endpoints.py"),
+        dest=WARP_ENDPOINTS_PATH,
+        user="root",
+        group="root",
+        mode="0755",
+        _sudo=True,
+    )
+
+    for tunnel in opts.tunnel_instances:
+        server.shell(
+            name=f"Scan WARP endpoints and pin the best one for {tunnel.iface}",
+            commands=[
+                f"/usr/bin/python3 {WARP_ENDPOINTS_PATH} --engine {opts.engine_type} "
+                f"--config {_tunnel_config_path(opts, tunnel)} "
+                f"--candidates {','.join(opts.endpoint_candidates)} "
+                f"--ports {','.join(str(port) for port in opts.endpoint_ports)} "
+                f"--min-gain-ms {opts.endpoint_min_gain_ms} "
+                f"--iface {tunnel.iface} --handshake-timeout {opts.endpoint_handshake_timeout} "
+                f"--state {STATE_DIR}/{tunnel.state_name('endpoint')} --service {tunnel.systemd_service_name}",
+            ],
             _sudo=True,
         )
 
+
+def _deploy_warp_mtu(opts: WarpMold) -> None:
+    """Size the tunnel interface to the path MTU towards the WARP endpoint."""
+
+    if not opts.mtu_discovery and opts.mtu is None:
+        return
+
+    apt.packages(
+        name="Install WARP MTU discovery dependencies",
+        packages=["iputils-ping", "jq"],
+        no_recommends=True,
+        _sudo=True,
+    )
+
+    files.put(
+        name="Deploy WARP MTU discovery script",
+        src=get_script_template("warp-mtu.sh"),
+        dest=WARP_MTU_PATH,
+        user="root",
+        group="root",
+        mode="0755",
+        _sudo=True,
+    )
+
+    engine = opts.engine
+    for tunnel in opts.tunnel_instances:
+        args = (
+            f"{STATE_DIR}/{tunnel.state_name('mtu')} {tunnel.iface} {opts.engine_type} "
+            f"{_tunnel_config_path(opts, tunnel)}"
+        )
+        if opts.mtu is not None:
+            command = f"{WARP_MTU_PATH} set {args} {opts.mtu}"
+        else:
+            ttl = opts.mtu_probe_ttl_hours * 3600
+            command = f"{WARP_MTU_PATH} probe {args} {engine.mtu_overhead} {engine.max_mtu} {ttl}"
+
+        server.shell(
+            name=f"Discover and apply WARP tunnel MTU for {tunnel.iface}",
+            commands=[command],
+            _sudo=True,
+        )
+
+
+def _deploy_warp_mss_clamping(opts: WarpMold) -> None:
+    """Clamp the TCP MSS of connections leaving through the WARP interface."""
+
+    unit_path = f"/etc/systemd/system/{WARP_MSS_SERVICE_NAME}.service"
+    if not opts.mss_clamping:
+        if host.get_fact(File, unit_path):
+            systemd.service(
+                name="Stop and disable WARP MSS clamping",
+                service=WARP_MSS_SERVICE_NAME,
+                running=False,
+                enabled=False,
+                _sudo=True,
+            )
+        return
+
+    apt.packages(
+        name="Install nftables for WARP MSS clamping",
+        packages=["nftables"],
+        no_recommends=True,
+        _sudo=True,
+    )
+
+    files.directory(
+        name="Ensure /etc/nullforge directory exists",
+        path=str(PurePosixPath(WARP_MSS_RULES_PATH).parent),
+        mode="0755",
+        _sudo=True,
+    )
+
+    rules_template = files.template(
+        name="Deploy WARP MSS clamping rules",
+        src=get_etc_template("warp-mss.nft.j2"),
+        dest=WARP_MSS_RULES_PATH,
+        mode="0644",
+        TABLE=WARP_MSS_TABLE,
+        IFACES=[tunnel.iface for tunnel in opts.tunnel_instances],
+        _sudo=True,
+    )
+
     service_template = files.template(
-        name="Deploy Masque WARP service configuration",
-        src=get_systemd_template("cloudflare-warp.service.j2"),
-        dest=f"/etc/systemd/system/{opts.engine.systemd_service_name}.service",
+        name="Deploy WARP MSS clamping service",
+        src=get_systemd_template("warp-mss-clamp.service.j2"),
+        dest=unit_path,
         mode="0644",
-        WORKDIR=opts.engine.config_dir,
-        CONFIG_PATH=opts.engine.config_path,
-        INET_NAME=opts.iface,
-        ENABLE_IPV6=ipv6_enabled,
+        TABLE=WARP_MSS_TABLE,
+        RULES_PATH=WARP_MSS_RULES_PATH,
+        SERVICE_NAMES=[tunnel.systemd_service_name for tunnel in opts.tunnel_instances],
         _sudo=True,
     )
 
     systemd.daemon_reload(
-        name="Reload systemd daemon for Masque WARP",
+        name="Reload systemd daemon for WARP MSS clamping",
         _sudo=True,
         _if=service_template.did_change,
     )
 
     systemd.service(
-        name="Enable and start Masque WARP service",
-        service=opts.engine.systemd_service_name,
+        name="Enable and start WARP MSS clamping",
+        service=WARP_MSS_SERVICE_NAME,
         running=True,
         enabled=True,
+        restarted=True,
         _sudo=True,
-        _if=service_template.did_change,
+        _if=any_changed(rules_template, service_template),
     )
 
 
 def _deploy_warp_health_check(opts: WarpMold) -> None:
-    """Deploy periodic health check for WARP with auto-restart on failure."""
+    """Deploy the resident WARP health checker with restart hysteresis and backoff."""
 
-    if not host.get_fact(File, opts.engine.health_check_script):
-        files.put(
-            name="Deploy WARP health check script",
-            src=get_script_template("warp-check.sh"),
-            dest=opts.engine.health_check_script,
-            user="cloudflare",
-            group="cloudflare",
+    apt.packages(
+        name="Install python3 for WARP health checker",
+        packages=["python3"],
+        no_recommends=True,
+        _sudo=True,
+    )
+
+    if opts.health_check_metrics_path:
+        files.directory(
+            name="Ensure WARP health metrics directory exists",
+            path=str(PurePosixPath(opts.health_check_metrics_path).parent),
             mode="0755",
             _sudo=True,
         )
 
-    service_template = files.template(
-        name="Deploy WARP health check service",
-        src=get_systemd_template(f"{opts.engine.systemd_service_name}-check.service.j2"),
-        dest=f"/etc/systemd/system/{opts.engine.systemd_service_name}-check.service",
-        mode="0644",
-        HEALTH_CHECK_SCRIPT=opts.engine.health_check_script,
-        IFACE=opts.iface,
-        SERVICE_NAME=opts.engine.systemd_service_name,
+    # The checker runs as root to restart the tunnel, so it must not be writable by cloudflare
+    script_put = files.put(
+        name="Deploy WARP health checker",
+        src=get_script_template("warp-health.py"),
+        dest=opts.engine.health_check_script,
+        user="root",
+        group="root",
+        mode="0755",
         _sudo=True,
     )
 
-    timer_template = files.template(
-        name="Deploy WARP health check timer",
-        src=get_systemd_template(f"{opts.engine.systemd_service_name}-check.timer.j2"),
-        dest=f"/etc/systemd/system/{opts.engine.systemd_service_name}-check.timer",
+    for tunnel in opts.tunnel_instances:
+        _deploy_warp_tunnel_health_check(opts, tunnel, script_put)
+
+
+def _deploy_warp_tunnel_health_check(opts: WarpMold, tunnel: WarpTunnel, script_put: OperationMeta) -> None:
+    """Deploy the health checker service of a single tunnel.
+
+    With multiple tunnels, a failing tunnel is taken out of the ECMP rotation until it recovers.
+    """
+
+    metrics_path = opts.health_check_metrics_path
+    if metrics_path and opts.multi_tunnel:
+        path = PurePosixPath(metrics_path)
+        metrics_path = str(path.with_name(f"{path.stem}-{tunnel.iface}{path.suffix}"))
+
+    service_name = tunnel.health_check_service_name
+    service_template = files.template(
+        name=f"Deploy WARP health checker service for {tunnel.iface}",
+        src=get_systemd_template("cloudflare-warp-health.service.j2"),
+        dest=f"/etc/systemd/system/{service_name}.service",
         mode="0644",
-        SERVICE_NAME=opts.engine.systemd_service_name,
+        INSTANCE=opts.multi_tunnel,
+        HEALTH_CHECK_SCRIPT=opts.engine.health_check_script,
+        IFACE=tunnel.iface,
+        SERVICE_NAME=tunnel.systemd_service_name,
+        INTERVAL=opts.health_check_interval,
+        TIMEOUT=opts.health_check_timeout,
+        FALL=opts.health_check_fall,
+        RISE=opts.health_check_rise,
+        BACKOFF_BASE=opts.health_check_backoff_base,
+        BACKOFF_MAX=opts.health_check_backoff_max,
+        TARGETS=opts.health_check_targets,
+        METRICS_PATH=metrics_path,
+        UP_HOOK=f"{WARP_ECMP_PATH} healthy {tunnel.iface}" if opts.multi_tunnel else "",
+        DOWN_HOOK=f"{WARP_ECMP_PATH} unhealthy {tunnel.iface}" if opts.multi_tunnel else "",
         _sudo=True,
     )
 
     systemd.daemon_reload(
-        name="Reload systemd daemon for Masque WARP health check",
+        name=f"Reload systemd daemon for WARP health checker {tunnel.iface}",
         _sudo=True,
-        _if=any_changed(service_template, timer_template),
+        _if=service_template.did_change,
     )
 
     systemd.service(
-        name="Enable and start Masque WARP health check timer",
-        service="cloudflare-warp-check.timer",
+        name=f"Enable and start WARP health checker {tunnel.iface}",
+        service=service_name,
         running=True,
         enabled=True,
+        restarted=True,
+        _sudo=True,
+        _if=any_changed(script_put, service_template),
+    )
+
+
+def _remove_warp_health_check(opts: WarpMold) -> None:
+    """Stop the resident WARP health checkers and remove their units when health checking is off."""
+
+    removed = []
+    for tunnel in opts.tunnel_instances:
+        service_name = tunnel.health_check_service_name
+        unit_path = f"/etc/systemd/system/{service_name}.service"
+        if not host.get_fact(File, unit_path):
+            continue
+
+        systemd.service(
+            name=f"Stop and disable WARP health checker {tunnel.iface}",
+            service=service_name,
+            running=False,
+            enabled=False,
+            _sudo=True,
+        )
+
+        removed.append(
+            files.file(
+                name=f"Remove WARP health checker service for {tunnel.iface}",
+                path=unit_path,
+                present=False,
+                _sudo=True,
+            )
+        )
+
+    if removed:
+        systemd.daemon_reload(
+            name="Reload systemd daemon after removing WARP health checkers",
+            _sudo=True,
+            _if=any_changed(*removed),
+        )
+
+
+def _remove_legacy_health_check_timer() -> None:
+    """Remove the curl-based health check timer superseded by the resident checker."""
+
+    legacy_units = ["cloudflare-warp-check.timer", "cloudflare-warp-check.service"]
+    if not host.get_fact(File, f"/etc/systemd/system/{legacy_units[0]}"):
+        return
+
+    systemd.service(
+        name="Stop and disable legacy WARP health check timer",
+        service=legacy_units[0],
+        running=False,
+        enabled=False,
+        _sudo=True,
+    )
+
+    for unit in legacy_units:
+        files.file(
+            name=f"Remove legacy {unit}",
+            path=f"/etc/systemd/system/{unit}",
+            present=False,
+            _sudo=True,
+        )
+
+    files.file(
+        name="Remove legacy WARP health check script",
+        path="/etc/usque/warp-check.sh",
+        present=False,
+        _sudo=True,
+    )
+
+    systemd.daemon_reload(
+        name="Reload systemd daemon after removing legacy WARP health check",
         _sudo=True,
-        _if=any_changed(service_template, timer_template),
     )
 
 
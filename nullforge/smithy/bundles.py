@@ -0,0 +1,122 @@
+"""Controller-side artifact cache for NullForge.
+
+Artifacts that every host needs (container images, plugin bundles) are
+fetched once on the controller and pushed to hosts from there, so hosts
+do not each hit the upstream and isolated hosts can still be provisioned.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tarfile
+from pathlib import Path
+
+
+BUNDLE_CACHE_DIR = Path(os.environ.get("NULLFORGE_CACHE_DIR", "~/.cache/nullforge")).expanduser()
+"""Controller directory holding fetched artifacts (override with NULLFORGE_CACHE_DIR)."""
+
+OCI_ARCHES = {
+    "x86_64": "amd64",
+    "arm64": "arm64",
+}
+"""Map of NullForge arch ids to OCI platform architectures."""
+
+_GIT_REVISIONS: dict[tuple[str, str, str], str] = {}
+"""Revisions already fetched in this run, keyed by (name, src, ref)."""
+
+
+def bundle_path(kind: str, name: str) -> Path:
+    """Get the controller cache path of an artifact, creating its directory."""
+
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", name)
+    path = BUNDLE_CACHE_DIR / kind / safe_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def fetch_image_archive(image: str, arch: str) -> Path:
+    """Fetch an image into an OCI archive on the controller once and return its path.
+
+    Archives are keyed by image reference and architecture; delete the cached
+    file (or pin a new tag) to pick up a moved tag.
+    """
+
+    path = bundle_path("images", f"{image}-{OCI_ARCHES.get(arch, arch)}.tar")
+    if path.exists():
+        return path
+
+    skopeo = shutil.which("skopeo")
+    if not skopeo:
+        raise RuntimeError("skopeo is required on the controller to pre-seed container images")
+
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+    subprocess.run(  # noqa: S603
+        [
+            skopeo,
+            "copy",
+            "--override-os=linux",
+            f"--override-arch={OCI_ARCHES.get(arch, arch)}",
+            f"docker://{image}",
+            f"oci-archive:{tmp_path}",
+        ],
+        check=True,
+    )
+    tmp_path.replace(path)
+    return path
+
+
+def _git(*args: str) -> str:
+    git = shutil.which("git")
+    if not git:
+        raise RuntimeError("git is required on the controller to build checkout bundles")
+    return subprocess.run([git, *args], check=True, capture_output=True, text=True).stdout.strip()  # noqa: S603
+
+
+def resolve_git_ref(src: str, ref: str) -> str:
+    """Resolve a branch or tag to its current commit from the controller, once per run."""
+
+    if re.fullmatch(r"[0-9a-f]{40}", ref):
+        return ref
+
+    key = ("", src, ref)
+    if key not in _GIT_REVISIONS:
+        refs = {}
+        patterns = [f"refs/heads/{ref}", f"refs/tags/{ref}", f"refs/tags/{ref}^{{}}"]
+        for line in _git("ls-remote", src, *patterns).splitlines():
+            revision, _, name = line.partition("\t")
+            refs[name] = revision
+        revision = refs.get(f"refs/tags/{ref}^{{}}") or refs.get(f"refs/heads/{ref}") or refs.get(f"refs/tags/{ref}")
+        if not revision:
+            raise ValueError(f"{ref} not found in {src}")
+        _GIT_REVISIONS[key] = revision
+    return _GIT_REVISIONS[key]
+
+
+def fetch_git_tarball(name: str, src: str, ref: str) -> tuple[Path, str]:
+    """Shallow-fetch a git ref on the controller once per run; return a tarball of the checkout and its revision.
+
+    The tarball keeps the .git directory, so hosts can later switch to
+    fetching the same checkout themselves.
+    """
+
+    checkout = bundle_path("git", name)
+    key = (name, src, ref)
+    if key not in _GIT_REVISIONS:
+        if not (checkout / ".git").exists():
+            _git("init", "-q", str(checkout))
+            _git("-C", str(checkout), "remote", "add", "origin", src)
+        _git("-C", str(checkout), "remote", "set-url", "origin", src)
+        _git("-C", str(checkout), "fetch", "-q", "--depth", "1", "origin", ref)
+        _git("-C", str(checkout), "reset", "-q", "--hard", "FETCH_HEAD")
+        _GIT_REVISIONS[key] = _git("-C", str(checkout), "rev-parse", "HEAD")
+
+    revision = _GIT_REVISIONS[key]
+    tarball = bundle_path("git", f"{name}-{revision}.tar.gz")
+    if not tarball.exists():
+        tmp_path = tarball.with_suffix(".tmp")
+        with tarfile.open(tmp_path, "w:gz") as tar:
+            tar.add(checkout, arcname=".")
+        tmp_path.replace(tarball)
+    return tarball, revision
@@ -0,0 +1,25 @@
+"""Host state utilities for NullForge."""
+
+from typing import TYPE_CHECKING
+
+from pyinfra.facts.files import FileContents
+
+
+if TYPE_CHECKING:
+    from pyinfra.api.host import Host
+
+
+STATE_DIR = "/var/lib/nullforge"
+"""Directory on the host where NullForge records measurements and decisions."""
+
+
+def read_state(host: "Host", name: str) -> dict[str, str]:
+    """Read a KEY=VALUE state file recorded on the host; empty if it does not exist."""
+
+    lines = host.get_fact(FileContents, path=f"{STATE_DIR}/{name}") or []
+    state = {}
+    for line in lines:
+        key, sep, value = line.strip().partition("=")
+        if sep and key and not key.startswith("#"):
+            state[key] = value
+    return state
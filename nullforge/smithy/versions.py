@@ -19,15 +19,16 @@ DEFAULT_VERSIONS = {
     "cloudflared": "latest",
     "podman": "v5.6.2",
     "crun": "v1.24",
+    "nvchad": "main",
+    "starship": "1.23.0",
+    "atuin": "18.8.0",
+    "nerd_fonts": "v3.4.0",
 }
 """Version pins (override per-host via inventory if needed)."""
 
 STATIC_URLS = {
-    "starship_install": "https://starship.rs/install.sh",
     "docker_install": "https://get.docker.com",
     "xray_install_script": "https://github.com/XTLS/Xray-install/raw/main/install-release.sh",
-    "atuin_install": "https://setup.atuin.sh",
-    "nerd_fonts_installer": "https://raw.githubusercontent.com/officialrajdeepsingh/nerd-fonts-installer/main/install.sh",
 }
 """Static endpoints."""
 
@@ -134,6 +135,46 @@ class Versions:
             case _:
                 raise ValueError(f"Unsupported architecture: {arch}")
 
+    def starship_tar(self) -> str:
+        """starship tarball URL (checksum at the same URL with a .sha256 suffix)."""
+
+        base_url = "https://github.com/starship/starship/releases/download"
+        version = self.versions["starship"]
+        arch = arch_id(self.host)
+        match arch:
+            case "x86_64":
+                return f"{base_url}/v{version}/starship-x86_64-unknown-linux-musl.tar.gz"
+            case "arm64":
+                return f"{base_url}/v{version}/starship-aarch64-unknown-linux-musl.tar.gz"
+            case _:
+                raise ValueError(f"Unsupported architecture: {arch}")
+
+    def atuin_tar(self) -> str:
+        """atuin tarball URL (checksum at the same URL with a .sha256 suffix)."""
+
+        base_url = "https://github.com/atuinsh/atuin/releases/download"
+        version = self.versions["atuin"]
+        arch = arch_id(self.host)
+        match arch:
+            case "x86_64":
+                return f"{base_url}/v{version}/atuin-x86_64-unknown-linux-gnu.tar.gz"
+            case "arm64":
+                return f"{base_url}/v{version}/atuin-aarch64-unknown-linux-gnu.tar.gz"
+            case _:
+                raise ValueError(f"Unsupported architecture: {arch}")
+
+    def nerd_font_tar(self, font: str) -> str:
+        """Nerd Fonts tarball URL for a font family."""
+
+        base_url = "https://github.com/ryanoasis/nerd-fonts/releases/download"
+        return f"{base_url}/{self.versions['nerd_fonts']}/{font}.tar.xz"
+
+    def nerd_fonts_checksums(self) -> str:
+        """Nerd Fonts release checksum list URL."""
+
+        base_url = "https://github.com/ryanoasis/nerd-fonts/releases/download"
+        return f"{base_url}/{self.versions['nerd_fonts']}/SHA-256.txt"
+
     def podman(self) -> str:
         """Podman version."""
 
@@ -143,3 +184,8 @@ class Versions:
         """crun version."""
 
         return self.versions["crun"]
+
+    def nvchad(self) -> str:
+        """NvChad starter branch, tag or commit."""
+
+        return self.versions["nvchad"]
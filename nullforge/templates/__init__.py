@@ -59,3 +59,15 @@ def get_etc_template(name: str) -> str:
     """Get etc template file."""
 
     return get_template_path(f"etc/{name}")
+
+
+def get_containers_template(name: str) -> str:
+    """Get containers template file."""
+
+    return get_template_path(f"containers/{name}")
+
+
+def get_cloudflare_template(name: str) -> str:
+    """Get cloudflare template file."""
+
+    return get_template_path(f"cloudflare/{name}")
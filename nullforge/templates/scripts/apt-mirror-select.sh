@@ -0,0 +1,88 @@
+#!/bin/sh
+# Measure candidate apt mirrors from this host and point the main archive at the fastest one.
+# Usage: apt-mirror-select.sh REPORT MAX_AGE_DAYS MIRROR...
+#
+# A mirror qualifies only if it carries this release and architecture. Each
+# one is scored by the estimated time to fetch an average package: first-byte
+# latency plus 256 KiB at the measured throughput. Source entries that point
+# at any of the candidates are rewritten; security and third-party entries
+# are left alone. The measurement is reused until it is MAX_AGE_DAYS old or
+# the candidate list changes.
+set -eu
+
+report=$1
+max_age=$2
+shift 2
+apt_etc=${APT_ETC:-/etc/apt}
+
+. /etc/os-release
+codename=${VERSION_CODENAME:?VERSION_CODENAME missing from /etc/os-release}
+arch=$(dpkg --print-architecture)
+candidates=$(printf '%s\n' "$@" | sha256sum | cut -d' ' -f1)
+
+if [ -f "$report" ] && grep -q "\"candidates\": \"$candidates\"" "$report" \
+    && [ -n "$(find "$report" -mtime -"$max_age" 2>/dev/null)" ]; then
+    echo "Reusing the mirror selection in $report"
+    exit 0
+fi
+
+best=""
+best_time=""
+entries=""
+for mirror in "$@"; do
+    mirror=${mirror%/}
+    base="$mirror/dists/$codename/main/binary-$arch"
+    latency=$(curl -fsS -o /dev/null --connect-timeout 3 --max-time 5 -w '%{time_starttransfer}' "$base/Release" 2>/dev/null) \
+        || latency=""
+    speed=0
+    if [ -n "$latency" ]; then
+        speed=$(curl -fsS -o /dev/null --connect-timeout 3 --max-time 10 -r 0-1048575 -w '%{speed_download}' \
+            "$base/Packages.xz" 2>/dev/null) || speed=0
+    fi
+
+    if [ -z "$latency" ] || [ "${speed%.*}" = "0" ]; then
+        entries="$entries${entries:+,}
+    {\"url\": \"$mirror\", \"available\": false}"
+        continue
+    fi
+
+    fetch_time=$(awk -v l="$latency" -v s="$speed" 'BEGIN { printf "%.4f", l + 262144 / s }')
+    entries="$entries${entries:+,}
+    $(awk -v u="$mirror" -v l="$latency" -v s="$speed" -v t="$fetch_time" 'BEGIN {
+        printf "{\"url\": \"%s\", \"available\": true, \"latency_ms\": %.1f, \"mbps\": %.1f, \"fetch_ms\": %.1f}",
+            u, l * 1000, s * 8 / 1e6, t * 1000
+    }')"
+    if [ -z "$best" ] || awk -v a="$fetch_time" -v b="$best_time" 'BEGIN { exit !(a < b) }'; then
+        best=$mirror
+        best_time=$fetch_time
+    fi
+done
+
+mkdir -p "$(dirname "$report")"
+cat > "$report" <<EOF
+{
+  "selected": "$best",
+  "codename": "$codename",
+  "arch": "$arch",
+  "candidates": "$candidates",
+  "mirrors": [$entries
+  ],
+  "timestamp": $(date +%s)
+}
+EOF
+
+if [ -z "$best" ]; then
+    echo "No candidate mirror carries $codename/$arch, keeping the current sources" >&2
+    exit 0
+fi
+
+expr=""
+for mirror in "$@"; do
+    bare=$(printf '%s' "${mirror%/}" | sed -e 's#^[a-z]*://##' -e 's/[.]/\\./g')
+    expr="${expr}s#https?://$bare(/?)([[:space:]]|\$)#$best\\1\\2#g;"
+done
+
+for sources in "$apt_etc/sources.list" "$apt_etc"/sources.list.d/*.list "$apt_etc"/sources.list.d/*.sources; do
+    [ -f "$sources" ] && sed -E -i "$expr" "$sources"
+done
+echo "Selected $best for $codename/$arch"
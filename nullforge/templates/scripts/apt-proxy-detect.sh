@@ -0,0 +1,10 @@
+#!/bin/bash
+# apt Proxy-Auto-Detect hook: fetch through the fleet apt cache while it answers, go direct otherwise.
+
+. /etc/nullforge/apt-proxy.env
+
+if timeout 1 bash -c "exec 3<>/dev/tcp/$APT_PROXY_HOST/$APT_PROXY_PORT" 2>/dev/null; then
+    echo "http://$APT_PROXY_HOST:$APT_PROXY_PORT"
+else
+    echo DIRECT
+fi
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""DNS throughput/latency benchmark for the local resolver.
+
+Fires a query mix at a resolver over UDP and reports QPS, latency
+percentiles and cache hit ratio. With --stub it also runs a local
+stand-in authoritative server, so the harness works fully offline;
+--via puts systemd-resolved and/or a throwaway cloudflared in front of
+the stand-in, so the resolvers themselves are what gets measured.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import socket
+import string
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+QTYPES = {"A": 1, "AAAA": 28}
+STUB_ZONE = "bench.nullforge.internal"
+RESOLVED_DROPIN = "/run/systemd/resolved.conf.d/zz-nullforge-dns-bench.conf"
+
+
+def build_query(qid: int, name: str, qtype: int) -> bytes:
+    header = struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0)
+    qname = b"".join(bytes([len(label)]) + label.encode() for label in name.rstrip(".").split(".")) + b"\x00"
+    return header + qname + struct.pack("!HH", qtype, 1)
+
+
+def parse_question(packet: bytes) -> tuple[int, str, int, int]:
+    """Return (id, name, end offset of question, qtype) of a query packet."""
+
+    qid = struct.unpack("!H", packet[:2])[0]
+    labels = []
+    offset = 12
+    while packet[offset]:
+        labels.append(packet[offset + 1 : offset + 1 + packet[offset]].decode(errors="replace"))
+        offset += packet[offset] + 1
+    offset += 1
+    qtype = struct.unpack("!H", packet[offset : offset + 2])[0]
+    return qid, ".".join(labels).lower(), offset + 4, qtype
+
+
+def stub_answer(packet: bytes, delay_ms: float, ttl: int) -> bytes:
+    """Answer an A/AAAA query in the stand-in zone with a synthetic record after an artificial delay.
+
+    Names outside the zone are refused, so resolvers pointed at the stand-in
+    never cache made-up answers for real names.
+    """
+
+    qid, name, end, qtype = parse_question(packet)
+    if name != STUB_ZONE and not name.endswith("." + STUB_ZONE):
+        return struct.pack("!HHHHHH", qid, 0x8185, 1, 0, 0, 0) + packet[12:end]
+
+    if qtype == QTYPES["AAAA"]:
+        rdata = socket.inet_pton(socket.AF_INET6, "fd00::5353")
+    else:
+        qtype, rdata = QTYPES["A"], socket.inet_aton("192.0.2.53")
+    header = struct.pack("!HHHHHH", qid, 0x8580, 1, 1, 0, 0)
+    record = struct.pack("!HHHIH", 0xC00C, qtype, 1, ttl, len(rdata)) + rdata
+    if delay_ms:
+        time.sleep(delay_ms / 1000)
+    return header + packet[12:end] + record
+
+
+def serve_stub(port: int, delay_ms: float, ttl: int, stop: threading.Event) -> None:
+    """Serve the stand-in zone over UDP."""
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", port))
+    sock.settimeout(0.2)
+
+    def answer(packet: bytes, addr: tuple[str, int]) -> None:
+        sock.sendto(stub_answer(packet, delay_ms, ttl), addr)
+
+    while not stop.is_set():
+        try:
+            packet, addr = sock.recvfrom(512)
+        except TimeoutError:
+            continue
+        threading.Thread(target=answer, args=(packet, addr), daemon=True).start()
+    sock.close()
+
+
+def serve_stub_doh(port: int, delay_ms: float, ttl: int) -> ThreadingHTTPServer:
+    """Serve the stand-in zone as RFC 8484 POST requests over plain HTTP, for cloudflared."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            packet = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            reply = stub_answer(packet, delay_ms, ttl)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/dns-message")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def wait_for_answer(server: str, port: int, name: str, timeout: float) -> bool:
+    """Poll a resolver until it answers a query for the given name."""
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(0.5)
+            try:
+                sock.sendto(build_query(1, name, QTYPES["A"]), (server, port))
+                if sock.recv(4096)[3] & 0x0F == 0:
+                    return True
+            except OSError:
+                pass
+        time.sleep(0.2)
+    return False
+
+
+@contextlib.contextmanager
+def cloudflared_in_front(upstream_port: int, port: int) -> Iterator[None]:
+    """Run a throwaway cloudflared DoH proxy on the given port, forwarding to the stand-in."""
+
+    proc = subprocess.Popen(  # noqa: S603
+        [  # noqa: S607
+            "cloudflared",
+            "proxy-dns",
+            "--address",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--upstream",
+            f"http://127.0.0.1:{upstream_port}/dns-query",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_answer("127.0.0.1", port, f"ready.{STUB_ZONE}", 10):
+            raise RuntimeError("cloudflared in front of the stand-in did not come up")
+        yield
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+@contextlib.contextmanager
+def resolved_in_front(upstream_port: int) -> Iterator[None]:
+    """Point systemd-resolved at the stand-in (directly or through cloudflared) for the run.
+
+    Names outside the stand-in zone fail while the benchmark runs; the
+    original upstreams are restored and the cache flushed afterwards.
+    """
+
+    os.makedirs(os.path.dirname(RESOLVED_DROPIN), exist_ok=True)
+    with open(RESOLVED_DROPIN, "w") as f:
+        f.write(
+            "# Written by nullforge-dns-bench for the duration of an offline run\n"
+            f"[Resolve]\nDNS=\nDNS=127.0.0.1:{upstream_port}\nDomains=~.\nDNSOverTLS=no\nDNSSEC=no\n"
+        )
+    try:
+        subprocess.run(["systemctl", "restart", "systemd-resolved"], check=True)  # noqa: S607
+        if not wait_for_answer("127.0.0.53", 53, f"ready.{STUB_ZONE}", 10):
+            raise RuntimeError("systemd-resolved in front of the stand-in did not answer")
+        yield
+    finally:
+        os.unlink(RESOLVED_DROPIN)
+        subprocess.run(["systemctl", "restart", "systemd-resolved"], check=False)  # noqa: S607
+        subprocess.run(["resolvectl", "flush-caches"], check=False)  # noqa: S607
+
+
+def build_mix(domains: list[str], total: int, miss_ratio: float, qtypes: list[int]) -> list[tuple[str, int]]:
+    """Cycle over the domain list, replacing a share of names with unique (uncacheable) ones."""
+
+    mix = []
+    for i in range(total):
+        name = domains[i % len(domains)]
+        if random.random() < miss_ratio:  # noqa: S311
+            name = "nf-" + "".join(random.choices(string.ascii_lowercase, k=12)) + "." + name  # noqa: S311
+        mix.append((name, qtypes[i % len(qtypes)]))
+    return mix
+
+
+def run_worker(server: str, port: int, timeout: float, queries: list[tuple[str, int]], out: dict) -> None:
+    """Send the queries one at a time, recording into this worker's own results."""
+
+    sock = socket.socket(socket.AF_INET6 if ":" in server else socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(timeout)
+    sock.connect((server, port))
+    for name, qtype in queries:
+        qid = random.getrandbits(16)
+        started = time.perf_counter()
+        try:
+            sock.send(build_query(qid, name, qtype))
+            while True:
+                reply = sock.recv(4096)
+                if struct.unpack("!H", reply[:2])[0] == qid:
+                    break
+        except OSError:
+            out["errors"] += 1
+            continue
+        out["latencies"].append(time.perf_counter() - started)
+    sock.close()
+
+
+def resolved_cache_stats() -> tuple[int, int] | None:
+    """Return (hits, misses) from systemd-resolved, if it is available."""
+
+    try:
+        output = subprocess.run(
+            ["resolvectl", "statistics"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    stats = {}
+    for line in output.splitlines():
+        key, _, value = line.partition(":")
+        if value.strip().isdigit():
+            stats[key.strip()] = int(value.strip())
+    if "Cache Hits" not in stats:
+        return None
+    return stats["Cache Hits"], stats.get("Cache Misses", 0)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--server", default="127.0.0.53")
+    parser.add_argument("--port", type=int, default=53)
+    parser.add_argument("--domains", default="cloudflare.com,google.com", help="Comma-separated query names")
+    parser.add_argument("--qtypes", default="A,AAAA")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--miss-ratio", type=float, default=0.1, help="Share of unique, uncacheable names")
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--hit-threshold-ms", type=float, default=1.0, help="Latency treated as a cache hit")
+    parser.add_argument("--stub", type=int, default=0, help="Run the stand-in authoritative on this port")
+    parser.add_argument("--stub-delay-ms", type=float, default=20.0, help="Artificial stand-in upstream RTT")
+    parser.add_argument("--stub-ttl", type=int, default=300)
+    parser.add_argument(
+        "--via",
+        default="",
+        help="Comma-separated resolvers put in front of the stand-in (resolved, cloudflared); "
+        "cloudflared also uses the two ports above --stub",
+    )
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", default="", help="Also write the JSON report to this path")
+    args = parser.parse_args()
+
+    domains = [d.strip() for d in args.domains.split(",") if d.strip()]
+    via = {v.strip() for v in args.via.split(",") if v.strip()}
+    stop = threading.Event()
+    with contextlib.ExitStack() as stack:
+        if args.stub:
+            threading.Thread(
+                target=serve_stub,
+                args=(args.stub, args.stub_delay_ms, args.stub_ttl, stop),
+                daemon=True,
+            ).start()
+            args.server, args.port = "127.0.0.1", args.stub
+            domains = [f"{d.split('.')[0]}.{STUB_ZONE}" for d in domains]
+            time.sleep(0.2)
+
+            # Build the chain from the stand-in outwards; the outermost resolver is the one measured
+            if "cloudflared" in via:
+                httpd = serve_stub_doh(args.stub + 1, args.stub_delay_ms, args.stub_ttl)
+                stack.callback(httpd.shutdown)
+                stack.enter_context(cloudflared_in_front(args.stub + 1, args.stub + 2))
+                args.port = args.stub + 2
+            if "resolved" in via:
+                stack.enter_context(resolved_in_front(args.port))
+                args.server, args.port = "127.0.0.53", 53
+
+        return run_benchmark(args, domains, stop)
+
+
+def run_benchmark(args: argparse.Namespace, domains: list[str], stop: threading.Event) -> int:
+    """Run the query mix against the target resolver and report the results."""
+
+    qtypes = [QTYPES[q.strip().upper()] for q in args.qtypes.split(",") if q.strip()]
+    mix = build_mix(domains, args.queries, args.miss_ratio, qtypes)
+    shards = [mix[i :: args.concurrency] for i in range(args.concurrency)]
+    results = [{"latencies": [], "errors": 0} for shard in shards if shard]
+
+    stats_before = resolved_cache_stats() if args.server == "127.0.0.53" else None
+    started = time.perf_counter()
+    workers = [
+        threading.Thread(target=run_worker, args=(args.server, args.port, args.timeout, shard, out))
+        for shard, out in zip([shard for shard in shards if shard], results, strict=True)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    latencies = sorted(lat for out in results for lat in out["latencies"])
+    errors = sum(out["errors"] for out in results)
+    stats_after = resolved_cache_stats() if stats_before else None
+    if stats_before and stats_after:
+        hits = stats_after[0] - stats_before[0]
+        misses = stats_after[1] - stats_before[1]
+        hit_source = "resolved"
+    else:
+        hits = sum(1 for lat in latencies if lat * 1000 <= args.hit_threshold_ms)
+        misses = len(latencies) - hits
+        hit_source = "latency"
+
+    report = {
+        "label": args.label,
+        "server": f"{args.server}:{args.port}",
+        "stub": bool(args.stub),
+        "via": args.via,
+        "queries": len(mix),
+        "answered": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "qps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "cache_hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "cache_hit_source": hit_source,
+        "timestamp": int(time.time()),
+    }
+
+    payload = json.dumps(report, indent=2)
+    print(payload)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    return 0 if latencies else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
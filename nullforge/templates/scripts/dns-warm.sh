@@ -0,0 +1,37 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+SERVER=${1:-127.0.0.53}
+PORT=${2:-53}
+LIST=${3:-/etc/nullforge/dns-warm.list}
+PARALLEL=${4:-8}
+WAIT_SECS=15
+
+log(){ logger -t dns-warm -- "$*"; }
+
+if [[ ! -s "$LIST" ]]; then
+  log "No domains in $LIST; nothing to warm"
+  exit 0
+fi
+
+# The resolver may still be starting right after boot or a restart
+i=0
+until dig +tries=1 +time=1 -p "$PORT" @"$SERVER" . NS >/dev/null 2>&1; do
+  i=$((i+1))
+  if [[ $i -ge $WAIT_SECS ]]; then
+    log "Resolver $SERVER:$PORT not answering after ${WAIT_SECS}s; giving up"
+    exit 0
+  fi
+  sleep 1
+done
+
+started=$(date +%s%N)
+count=$(grep -Evc '^[[:space:]]*(#|$)' "$LIST" || true)
+
+grep -Ev '^[[:space:]]*(#|$)' "$LIST" \
+  | xargs -P "$PARALLEL" -I{} \
+    dig +tries=2 +time=2 +short -p "$PORT" @"$SERVER" {} A {} AAAA >/dev/null || true
+
+elapsed_ms=$(( ($(date +%s%N) - started) / 1000000 ))
+log "Warmed $count domains via $SERVER:$PORT in ${elapsed_ms}ms"
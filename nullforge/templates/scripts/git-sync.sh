@@ -0,0 +1,61 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+# usage: git-sync.sh clone SRC REF DEST
+#        git-sync.sh unpack TARBALL REV DEST
+# Converges DEST to a depth-1 checkout of REF. clone only asks the remote for
+# the current revision and fetches when it differs; unpack updates DEST from
+# a controller-built tarball of revision REV when DEST is at another revision.
+cmd=${1:?clone|unpack}
+SRC=${2:?source}
+REF=${3:?ref}
+DEST=${4:?dest}
+
+log(){ logger -t git-sync -- "$*"; }
+head_rev(){ git -C "$DEST" rev-parse -q --verify HEAD 2>/dev/null || true; }
+
+case "$cmd" in
+clone)
+    if [[ $REF =~ ^[0-9a-f]{40}$ ]]; then
+        want=$REF
+    else
+        # Prefer the peeled commit of annotated tags over the tag object
+        want=$(git ls-remote "$SRC" "refs/heads/$REF" "refs/tags/$REF" "refs/tags/$REF^{}" |
+            awk '$2 ~ /\^\{\}$/ {peeled = $1} !first {first = $1} END {print peeled ? peeled : first}')
+        [ -n "$want" ] || { echo "git-sync: $REF not found in $SRC" >&2; exit 1; }
+    fi
+    [ "$(head_rev)" = "$want" ] && exit 0
+
+    if [ ! -d "$DEST/.git" ]; then
+        rm -rf "$DEST"
+        git init -q "$DEST"
+    fi
+    git -C "$DEST" remote add origin "$SRC" 2>/dev/null || git -C "$DEST" remote set-url origin "$SRC"
+    git -C "$DEST" fetch -q --depth 1 origin "$REF"
+    git -C "$DEST" reset -q --hard FETCH_HEAD
+    log "$DEST updated to $want"
+    ;;
+unpack)
+    [ "$(head_rev)" = "$REF" ] && exit 0
+
+    tmp="$DEST.git-sync-tmp"
+    rm -rf "$tmp"
+    mkdir -p "$tmp"
+    tar -xzf "$SRC" -C "$tmp"
+    if [ -d "$DEST/.git" ]; then
+        # Update in place so ignored content (e.g. oh-my-zsh custom plugins) survives
+        git -C "$DEST" fetch -q --depth 1 "$tmp" HEAD
+        git -C "$DEST" reset -q --hard FETCH_HEAD
+        rm -rf "$tmp"
+    else
+        rm -rf "$DEST"
+        mv "$tmp" "$DEST"
+    fi
+    log "$DEST unpacked at $REF"
+    ;;
+*)
+    echo "usage: $0 {clone|unpack} SRC REF DEST" >&2
+    exit 2
+    ;;
+esac
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""runc vs runsc microbenchmark.
+
+Runs the same small workloads under each Docker runtime and reports
+container start latency, per-syscall cost and network throughput, so the
+gVisor platform and network settings can be compared on this node.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def docker_run(runtime: str, image: str, command: str, network: str) -> float:
+    """Run a command in a throwaway container; return wall time in seconds."""
+
+    started = time.perf_counter()
+    subprocess.run(  # noqa: S603
+        ["docker", "run", "--rm", f"--runtime={runtime}", f"--network={network}", image, "sh", "-c", command],  # noqa: S607
+        check=True,
+        capture_output=True,
+    )
+    return time.perf_counter() - started
+
+
+def bench_runtime(runtime: str, args: argparse.Namespace) -> dict:
+    """Measure one runtime; workload times have the median start latency subtracted."""
+
+    starts = [docker_run(runtime, args.image, "true", "none") for _ in range(args.rounds)]
+    start = statistics.median(starts)
+
+    # dd with bs=1 issues one read and one write per byte
+    syscalls = 2 * args.syscalls
+    syscall_time = docker_run(runtime, args.image, f"dd if=/dev/zero of=/dev/null bs=1 count={args.syscalls}", "none")
+    report = {
+        "start_p50_ms": round(start * 1000, 1),
+        "start_max_ms": round(max(starts) * 1000, 1),
+        "syscall_ns": round(max(syscall_time - start, 0) / syscalls * 1e9, 1),
+    }
+
+    if args.url:
+        try:
+            fetch_time = docker_run(runtime, args.image, f"wget -q -O /dev/null '{args.url}'", "bridge")
+        except subprocess.CalledProcessError:
+            report["download_mbps"] = None
+        else:
+            elapsed = max(fetch_time - start, 1e-3)
+            report["download_mbps"] = round(args.url_bytes * 8 / elapsed / 1e6, 1)
+
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runtime", action="append", default=[], help="Docker runtime to measure, repeatable")
+    parser.add_argument("--image", default="alpine:3")
+    parser.add_argument("--rounds", type=int, default=5, help="Container starts measured per runtime")
+    parser.add_argument("--syscalls", type=int, default=200000, help="Bytes copied one at a time by dd")
+    parser.add_argument("--url", default="", help="URL downloaded to measure network throughput")
+    parser.add_argument("--url-bytes", type=int, default=25000000, help="Size of the download")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", default="", help="Also write the JSON report to this path")
+    args = parser.parse_args()
+
+    runtimes = args.runtime or ["runc", "runsc"]
+    subprocess.run(["docker", "pull", "-q", args.image], check=True, capture_output=True)  # noqa: S603, S607
+
+    results = {}
+    for runtime in runtimes:
+        try:
+            results[runtime] = bench_runtime(runtime, args)
+        except subprocess.CalledProcessError as e:
+            results[runtime] = {"error": e.stderr.decode(errors="replace").strip()}
+
+    report = {
+        "label": args.label,
+        "image": args.image,
+        "runtimes": results,
+        "timestamp": int(time.time()),
+    }
+
+    payload = json.dumps(report, indent=2)
+    print(payload)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    return 0 if all("error" not in result for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+#!/bin/sh
+# Time the initial base package install and compare the provisioning modes.
+# Usage: provision-timer.sh start | stop MODE [BASELINE_SECONDS]
+#
+# Elapsed seconds are kept per mode in /var/lib/nullforge/provisioning. A host
+# only times its own initial cast, so a fast cast is compared against
+# BASELINE_SECONDS, a default-mode time measured elsewhere in the fleet, or
+# against a default-mode time recorded on this host if it has one.
+set -eu
+
+state_dir=/var/lib/nullforge
+state="$state_dir/provisioning"
+mkdir -p "$state_dir"
+
+case "$1" in
+start)
+    date +%s > "$state.start"
+    ;;
+stop)
+    mode=$2
+    elapsed=$(( $(date +%s) - $(cat "$state.start") ))
+    rm -f "$state.start"
+    { grep -v "^$mode=" "$state" 2>/dev/null || true; echo "$mode=$elapsed"; } > "$state.tmp"
+    mv -f "$state.tmp" "$state"
+
+    echo "Base packages installed in ${elapsed}s ($mode mode)"
+    default=${3:-$(sed -n 's/^default=//p' "$state")}
+    fast=$(sed -n 's/^fast=//p' "$state")
+    if [ "$mode" = fast ] && [ -n "$default" ]; then
+        echo "Fast provisioning saves $((default - fast))s against the default mode (${default}s)"
+    fi
+    ;;
+esac
@@ -0,0 +1,36 @@
+#!/bin/sh
+# Restrict a published registry cache port to the allowed networks.
+# Usage: registry-cache-firewall.sh add|del CHAIN PORT [SOURCE...]
+#
+# Published container ports are DNATed and forwarded, so they never reach
+# UFW's input rules. The rules go into the forward path instead (DOCKER-USER
+# for Docker, FORWARD for Podman) and match the original destination port.
+# Loopback clients are not forwarded and are unaffected.
+set -eu
+
+action=$1
+chain=$2
+port=$3
+shift 3
+
+match="-p tcp -m conntrack --ctorigdstport $port --ctdir ORIGINAL"
+
+# DOCKER-USER hands allowed traffic back to Docker's rules; FORWARD must accept it
+allow=RETURN
+[ "$chain" = FORWARD ] && allow=ACCEPT
+
+# Drop every rule previously installed for this port, whatever its sources were
+iptables -S "$chain" | grep -e "--ctorigdstport $port " | sed 's/^-A /-D /' | while read -r rule; do
+    # shellcheck disable=SC2086
+    iptables $rule
+done
+
+[ "$action" = add ] || exit 0
+
+# Inserted at the top in reverse order: allowed sources first, then the drop
+# shellcheck disable=SC2086
+iptables -I "$chain" 1 $match -j DROP
+for source in "$@"; do
+    # shellcheck disable=SC2086
+    iptables -I "$chain" 1 $match -s "$source" -j "$allow"
+done
@@ -0,0 +1,21 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+# usage: registry-cache-prune.sh CACHE_DIR MAX_SIZE_GB UNIT...
+# registry:2 has no size-based eviction, so once the cache grows past its cap
+# the proxies are stopped, their storage is wiped and they start over empty.
+CACHE_DIR=${1:?cache dir}
+MAX_GB=${2:?max size in GiB}
+shift 2
+
+used_kb=$(du -sk "$CACHE_DIR" | cut -f1)
+max_kb=$((MAX_GB * 1024 * 1024))
+if [ "$used_kb" -le "$max_kb" ]; then
+    exit 0
+fi
+
+logger -t registry-cache -- "cache at ${used_kb} KiB exceeds ${max_kb} KiB, resetting"
+systemctl stop "$@"
+find "$CACHE_DIR" -mindepth 2 -maxdepth 2 -exec rm -rf {} +
+systemctl start "$@"
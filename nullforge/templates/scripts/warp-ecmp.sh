@@ -0,0 +1,168 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+# usage: warp-ecmp.sh {up|down|healthy|unhealthy} IFACE
+#        warp-ecmp.sh {sync|flush}
+cmd=${1:?up|down|healthy|unhealthy|sync|flush}
+IFACE=${2:-}
+CONF=${WARP_ECMP_CONF:-/etc/nullforge/warp-ecmp.env}
+RUN_DIR=/run/nullforge/warp-ecmp
+
+# shellcheck source=/dev/null
+. "$CONF"
+TABLE=warp
+TID=${TABLE_ID:-123}
+PRIO=${PRIO:-12100}
+PRIO_MARK=$((PRIO + 90))
+WAIT_SECS=15
+
+log(){ logger -t warp-ecmp -- "$*"; }
+
+ensure_table(){
+  mkdir -p /etc/iproute2
+  grep -qE "^[[:space:]]*$TID[[:space:]]+$TABLE$" /etc/iproute2/rt_tables \
+    || echo "$TID $TABLE" >> /etc/iproute2/rt_tables
+}
+
+index_of(){
+  local i=0 name
+  for name in $IFACES; do
+    if [ "$name" = "$1" ]; then echo "$i"; return 0; fi
+    i=$((i + 1))
+  done
+  return 1
+}
+
+is_up(){
+  [ -n "$(ip link show dev "$1" up 2>/dev/null)" ]
+}
+
+wait_for_link(){
+  local i=0
+  while [ $i -lt "$WAIT_SECS" ]; do
+    is_up "$1" && return 0
+    sleep 1; i=$((i + 1))
+  done
+  return 1
+}
+
+get_addr6(){
+  ip -6 -o addr show dev "$1" scope global 2>/dev/null | awk '{print $4}' | head -n1 | cut -d/ -f1
+}
+
+# Per-instance table, so sockets bound to a tunnel and replies from its address stay on it
+instance_up(){
+  local iface=$1 idx tid prio addr6 fam
+  idx=$(index_of "$iface") || { log "$iface is not a WARP ECMP member"; return 1; }
+  tid=$((TID + 1 + idx))
+  prio=$((PRIO + 10 * idx))
+
+  for fam in -4 -6; do
+    ip "$fam" route replace default dev "$iface" table "$tid" 2>/dev/null || true
+    ip "$fam" rule del pref "$prio" 2>/dev/null || true
+    ip "$fam" rule add pref "$prio" oif "$iface" lookup "$tid"
+  done
+
+  ip -6 rule del pref $((prio + 5)) 2>/dev/null || true
+  addr6=$(get_addr6 "$iface")
+  if [ -n "$addr6" ]; then
+    ip -6 rule add pref $((prio + 5)) from "${addr6}/128" lookup "$tid"
+  fi
+}
+
+instance_down(){
+  local iface=$1 idx tid prio fam
+  idx=$(index_of "$iface") || return 0
+  tid=$((TID + 1 + idx))
+  prio=$((PRIO + 10 * idx))
+
+  for fam in -4 -6; do
+    ip "$fam" rule del pref "$prio" 2>/dev/null || true
+    ip "$fam" route flush table "$tid" 2>/dev/null || true
+  done
+  ip -6 rule del pref $((prio + 5)) 2>/dev/null || true
+}
+
+# Multipath default over every tunnel that is up and healthy
+sync(){
+  local iface hops4=() hops6=() n4=0 n6=0 fam
+  ensure_table
+
+  for iface in $IFACES; do
+    is_up "$iface" || continue
+    [ -e "$RUN_DIR/$iface.unhealthy" ] && continue
+    hops4+=(nexthop dev "$iface" weight 1)
+    n4=$((n4 + 1))
+    # IPv6 multipath needs a gateway; tunnels are NOARP, so an onlink link-local one will do
+    if [ -n "$(get_addr6 "$iface")" ]; then
+      hops6+=(nexthop via fe80::1 dev "$iface" onlink weight 1)
+      n6=$((n6 + 1))
+    fi
+  done
+
+  if [ ${#hops4[@]} -gt 0 ]; then
+    ip -4 route replace default table "$TID" "${hops4[@]}"
+  else
+    ip -4 route del default table "$TID" 2>/dev/null || true
+  fi
+  if [ ${#hops6[@]} -gt 0 ]; then
+    ip -6 route replace default table "$TID" "${hops6[@]}"
+  else
+    ip -6 route del default table "$TID" 2>/dev/null || true
+  fi
+
+  for fam in -4 -6; do
+    ip "$fam" rule del pref "$PRIO_MARK" 2>/dev/null || true
+    ip "$fam" rule add pref "$PRIO_MARK" fwmark "$FWMARK" lookup "$TABLE"
+  done
+
+  log "ECMP over $n4 IPv4 / $n6 IPv6 tunnels in table $TABLE"
+}
+
+flush(){
+  local iface fam
+  for iface in $IFACES; do
+    instance_down "$iface"
+  done
+  for fam in -4 -6; do
+    ip "$fam" rule del pref "$PRIO_MARK" 2>/dev/null || true
+    ip "$fam" route flush table "$TID" 2>/dev/null || true
+  done
+  rm -rf "$RUN_DIR"
+}
+
+mkdir -p "$RUN_DIR"
+case "$cmd" in
+  up)
+    wait_for_link "${IFACE:?iface}" || log "$IFACE is not up after ${WAIT_SECS}s"
+    instance_up "$IFACE"
+    rm -f "$RUN_DIR/$IFACE.unhealthy"
+    sync
+    ;;
+  down)
+    instance_down "${IFACE:?iface}"
+    sync
+    ;;
+  healthy)
+    rm -f "$RUN_DIR/${IFACE:?iface}.unhealthy"
+    instance_up "$IFACE"
+    log "$IFACE back in rotation"
+    sync
+    ;;
+  unhealthy)
+    touch "$RUN_DIR/${IFACE:?iface}.unhealthy"
+    log "$IFACE taken out of rotation"
+    sync
+    ;;
+  sync)
+    sync
+    ;;
+  flush)
+    flush
+    ;;
+  *)
+    echo "usage: $0 {up|down|healthy|unhealthy IFACE|sync|flush}" >&2
+    exit 1
+    ;;
+esac
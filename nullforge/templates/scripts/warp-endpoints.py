@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""WARP endpoint scanner.
+
+Measures RTT and loss to a set of candidate Cloudflare anycast endpoints and
+pins the best one in the engine configuration. MASQUE candidates are probed
+per port with a QUIC version-negotiation round trip; WireGuard candidates are
+ranked with ICMP, since a WireGuard handshake needs X25519 which the standard
+library lacks. A ping says nothing about WireGuard being served, so a new
+WireGuard endpoint is only kept once the tunnel completes a handshake with it;
+otherwise the previous endpoint is restored.
+"""
+
+import argparse
+import ipaddress
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import syslog
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+LOSS_PENALTY_MS = 1000.0
+REJECT_TTL = 86400
+
+
+def log(message: str) -> None:
+    syslog.syslog(syslog.LOG_INFO, message)
+    print(message)
+
+
+def quic_probe(ip: str, port: int, rounds: int, timeout: float) -> tuple[float | None, float]:
+    """Return (median RTT in ms, loss ratio) of QUIC version negotiation round trips."""
+
+    family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    samples = []
+    for _ in range(rounds):
+        dcid, scid = os.urandom(8), os.urandom(8)
+        # Long header with a reserved (greasing) version forces a Version Negotiation reply
+        packet = bytes([0xC0]) + b"\x0a\x0a\x0a\x0a" + bytes([8]) + dcid + bytes([8]) + scid
+        packet += b"\x00" * (1200 - len(packet))
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.settimeout(timeout)
+        try:
+            started = time.perf_counter()
+            sock.sendto(packet, (ip, port))
+            reply = sock.recv(2048)
+            if reply[1:5] == b"\x00\x00\x00\x00":
+                samples.append((time.perf_counter() - started) * 1000)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+    return median(samples), 1 - len(samples) / rounds
+
+
+def icmp_probe(ip: str, rounds: int, timeout: float) -> tuple[float | None, float]:
+    """Return (average RTT in ms, loss ratio) reported by ping."""
+
+    try:
+        output = subprocess.run(  # noqa: S603
+            ["ping", "-n", "-q", "-c", str(rounds), "-i", "0.2", "-W", str(max(1, round(timeout))), ip],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout
+    except OSError:
+        return None, 1.0
+
+    loss_match = re.search(r"([\d.]+)% packet loss", output)
+    rtt_match = re.search(r"= [\d.]+/([\d.]+)/", output)
+    loss = float(loss_match.group(1)) / 100 if loss_match else 1.0
+    return (float(rtt_match.group(1)) if rtt_match else None), loss
+
+
+def median(values: list[float]) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def score(rtt: float | None, loss: float) -> float:
+    if rtt is None:
+        return float("inf")
+    return rtt + loss * LOSS_PENALTY_MS
+
+
+def format_endpoint(ip: str, port: int) -> str:
+    return f"[{ip}]:{port}" if ":" in ip else f"{ip}:{port}"
+
+
+def current_endpoint(engine: str, config: str) -> tuple[dict[int, str], int | None]:
+    """Return the configured endpoint address per IP version and the port, if any."""
+
+    if engine == "masque":
+        with open(config) as f:
+            data = json.load(f)
+        addresses = {4: data.get("endpoint_v4", ""), 6: data.get("endpoint_v6", "")}
+        return {v: a for v, a in addresses.items() if a}, None
+
+    with open(config) as f:
+        match = re.search(r"^Endpoint\s*=\s*\[?([^\]\s]+?)\]?:(\d+)\s*$", f.read(), re.MULTILINE)
+    if not match:
+        return {}, None
+    host, port = match.group(1), int(match.group(2))
+    try:
+        return {ipaddress.ip_address(host).version: host}, port
+    except ValueError:
+        return {}, port
+
+
+def recorded_port(state: str) -> int | None:
+    """Return the MASQUE connect port pinned by a previous scan, if any."""
+
+    try:
+        with open(state) as f:
+            for line in f:
+                key, _, value = line.strip().partition("=")
+                if key == "WARP_CONNECT_PORT" and value.isdigit():
+                    return int(value)
+    except OSError:
+        pass
+    return None
+
+
+def pin_masque(config: str, best: dict[int, str]) -> None:
+    with open(config) as f:
+        data = json.load(f)
+    for version, ip in best.items():
+        data[f"endpoint_v{version}"] = ip
+    # Rewrite in place so the file keeps its owner and mode
+    with open(config, "r+") as f:
+        f.seek(0)
+        f.write(json.dumps(data, indent=2) + "\n")
+        f.truncate()
+
+
+def pin_wireguard(config: str, ip: str, port: int) -> None:
+    with open(config) as f:
+        content = f.read()
+    content = re.sub(r"^Endpoint\s*=.*$", f"Endpoint = {format_endpoint(ip, port)}", content, flags=re.MULTILINE)
+    with open(config, "r+") as f:
+        f.seek(0)
+        f.write(content)
+        f.truncate()
+
+
+def service_active(service: str) -> bool:
+    result = subprocess.run(["systemctl", "is-active", "--quiet", service], check=False)  # noqa: S603, S607
+    return result.returncode == 0
+
+
+def restart_service(service: str) -> None:
+    subprocess.run(["systemctl", "try-restart", service], check=False)  # noqa: S603, S607
+
+
+def wireguard_handshake(iface: str, since: float, timeout: float) -> bool:
+    """Wait until the interface reports a handshake newer than `since`."""
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        output = subprocess.run(  # noqa: S603
+            ["wg", "show", iface, "latest-handshakes"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout
+        if any(int(fields[1]) >= since for fields in (line.split() for line in output.splitlines()) if len(fields) > 1):
+            return True
+        time.sleep(1)
+    return False
+
+
+def read_rejected(path: str) -> dict[str, int]:
+    """Return WireGuard endpoints that failed a handshake within the last day."""
+
+    rejected = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                ip, _, rejected_at = line.strip().partition(" ")
+                if rejected_at.isdigit() and time.time() - int(rejected_at) < REJECT_TTL:
+                    rejected[ip] = int(rejected_at)
+    except OSError:
+        pass
+    return rejected
+
+
+def write_rejected(path: str, rejected: dict[str, int]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.writelines(f"{ip} {rejected_at}\n" for ip, rejected_at in rejected.items())
+
+
+def write_state(path: str, primary: tuple[str, int], v6: str | None, rtt: float, loss: float) -> None:
+    """Record the pinned endpoint; the Masque unit reads WARP_CONNECT_PORT from it on start."""
+
+    lines = [f"WARP_ENDPOINT={primary[0]}", f"WARP_CONNECT_PORT={primary[1]}"]
+    if v6:
+        lines.append(f"WARP_ENDPOINT_V6={v6}")
+    lines += [f"RTT_MS={rtt:.1f}", f"LOSS={loss:.3f}", f"SCANNED_AT={int(time.time())}"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(f"{path}.tmp", path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--engine", choices=["masque", "wireguard"], required=True)
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--candidates", required=True, help="Comma-separated endpoint IPs")
+    parser.add_argument("--ports", default="", help="Comma-separated ports (MASQUE only)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--min-gain-ms", type=float, default=5.0, help="Required improvement before re-pinning")
+    parser.add_argument("--state", default="")
+    parser.add_argument("--service", default="", help="Tunnel service restarted when the endpoint changes")
+    parser.add_argument("--iface", default="warp", help="WireGuard interface checked for a handshake")
+    parser.add_argument("--handshake-timeout", type=float, default=15.0)
+    args = parser.parse_args()
+
+    syslog.openlog("warp-endpoints")
+    current, current_port = current_endpoint(args.engine, args.config)
+    if args.engine == "masque":
+        current_port = (recorded_port(args.state) if args.state else None) or 443
+    candidates = [c.strip() for c in args.candidates.split(",") if c.strip()]
+    rejected_path = f"{args.state or args.config}.rejected"
+    rejected = read_rejected(rejected_path) if args.engine == "wireguard" else {}
+    candidates = [ip for ip in candidates if ip not in rejected]
+    candidates += [ip for ip in current.values() if ip not in candidates]
+
+    if args.engine == "masque":
+        ports = [int(p) for p in args.ports.split(",") if p.strip()] or [443]
+        targets = [(ip, port) for ip in candidates for port in ports]
+        probe = lambda t: quic_probe(t[0], t[1], args.rounds, args.timeout)  # noqa: E731
+    else:
+        port = current_port or 2408
+        targets = [(ip, port) for ip in candidates]
+        probe = lambda t: icmp_probe(t[0], args.rounds, args.timeout)  # noqa: E731
+
+    with ThreadPoolExecutor(max_workers=min(16, len(targets))) as pool:
+        results = dict(zip(targets, pool.map(probe, targets), strict=True))
+
+    for (ip, port), (rtt, loss) in sorted(results.items(), key=lambda r: score(*r[1])):
+        rtt_text = f"{rtt:.1f}ms" if rtt is not None else "unreachable"
+        log(f"{format_endpoint(ip, port)} rtt={rtt_text} loss={loss:.0%}")
+
+    best: dict[int, tuple[str, int]] = {}
+    for version in (4, 6):
+        family = [t for t in targets if ipaddress.ip_address(t[0]).version == version]
+        ranked = sorted(family, key=lambda t: score(*results[t]))
+        if not ranked or results[ranked[0]][0] is None:
+            continue
+        winner = ranked[0]
+        # Keep the current endpoint unless the winner is clearly better
+        incumbent = [t for t in family if t[0] == current.get(version) and t[1] == (current_port or winner[1])]
+        if incumbent and score(*results[incumbent[0]]) - score(*results[winner]) < args.min_gain_ms:
+            winner = incumbent[0]
+        best[version] = winner
+
+    if not best:
+        log("No candidate endpoint answered; keeping the configured endpoint")
+        return 0
+
+    primary = best.get(4) or best[6]
+    changed = primary[1] != current_port or any(current.get(v) != ip for v, (ip, _) in best.items())
+    v6 = best[6][0] if 6 in best else None
+    if changed and args.engine == "masque":
+        pin_masque(args.config, {v: ip for v, (ip, _) in best.items()})
+        # The port only reaches usque through the state file, so it is written before the restart
+        if args.state:
+            write_state(args.state, primary, v6, *results[primary])
+        if args.service:
+            restart_service(args.service)
+    elif changed:
+        if not args.service or not service_active(args.service):
+            log(f"Tunnel is not running; not pinning unverified endpoint {format_endpoint(*primary)}")
+            return 0
+
+        with open(args.config) as f:
+            previous = f.read()
+        pin_wireguard(args.config, *primary)
+        since = time.time() - 1
+        restart_service(args.service)
+        if not wireguard_handshake(args.iface, since, args.handshake_timeout):
+            log(f"No WireGuard handshake with {format_endpoint(*primary)}; restoring the previous endpoint")
+            rejected[primary[0]] = int(time.time())
+            write_rejected(rejected_path, rejected)
+            with open(args.config, "r+") as f:
+                f.seek(0)
+                f.write(previous)
+                f.truncate()
+            restart_service(args.service)
+            return 0
+
+    if args.state and not (changed and args.engine == "masque"):
+        write_state(args.state, primary, v6, *results[primary])
+
+    if changed:
+        log(f"Pinned {args.engine} endpoint {format_endpoint(*primary)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
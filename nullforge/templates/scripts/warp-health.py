@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Resident WARP tunnel health checker.
+
+Probes several endpoints through the tunnel interface in parallel at a short
+interval. The tunnel service is restarted only after several consecutive
+failed rounds (hysteresis), and restarts back off exponentially while the
+tunnel keeps failing. Latency and loss are exported as a Prometheus textfile.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import ssl
+import subprocess
+import sys
+import syslog
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+DEFAULT_TARGETS = [
+    "https://cloudflare.com/cdn-cgi/trace|warp=on",
+    "http://www.apple.com/library/test/success.html|Success",
+    "http://connectivitycheck.platform.hicloud.com/generate_204|204",
+]
+
+
+def log(message: str) -> None:
+    syslog.syslog(syslog.LOG_INFO, message)
+
+
+def probe(iface: str, target: str, timeout: float) -> float | None:
+    """GET the target bound to the tunnel interface; return latency or None on failure.
+
+    A target is `url|expect`, where `expect` is either an HTTP status code or a
+    substring that must appear in the response.
+    """
+
+    url, _, expect = target.partition("|")
+    parts = urlsplit(url)
+    https = parts.scheme == "https"
+    port = parts.port or (443 if https else 80)
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    started = time.perf_counter()
+    try:
+        addr = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)[0]
+        sock = socket.socket(addr[0], socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        if iface:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, iface.encode())
+        sock.connect(addr[4])
+        if https:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: {parts.hostname}\r\nUser-Agent: warp-health\r\nConnection: close\r\n\r\n"
+        )
+        sock.sendall(request.encode())
+        response = b""
+        while len(response) < 65536:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            response += chunk
+        sock.close()
+    except OSError:
+        return None
+
+    latency = time.perf_counter() - started
+    status_line, _, body = response.partition(b"\r\n")
+    status = status_line.split(b" ")[1].decode() if status_line.count(b" ") >= 1 else ""
+    if expect.isdigit():
+        return latency if status == expect else None
+    return latency if status.startswith("2") and expect.encode() in body else None
+
+
+class HealthState:
+    """Hysteresis and restart backoff bookkeeping."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.healthy = True
+        self.failures = 0
+        self.successes = 0
+        self.restarts = 0
+        self.backoff = args.backoff_base
+        self.next_restart_at = 0.0
+        self.window: deque[bool] = deque(maxlen=args.loss_window)
+        self.latency: dict[str, float] = {}
+
+    def record(self, results: dict[str, float | None]) -> None:
+        for target, latency in results.items():
+            self.window.append(latency is not None)
+            if latency is not None:
+                self.latency[target] = latency
+
+        if any(latency is not None for latency in results.values()):
+            self.failures = 0
+            self.successes += 1
+            if not self.healthy and self.successes >= self.args.rise:
+                self.healthy = True
+                self.backoff = self.args.backoff_base
+                log(f"{self.args.iface} healthy again after {self.successes} good rounds")
+                run_hook(self.args.up_hook)
+            return
+
+        self.successes = 0
+        self.failures += 1
+        if self.healthy and self.failures >= self.args.fall:
+            self.healthy = False
+            log(f"{self.args.iface} unhealthy after {self.failures} failed rounds")
+            run_hook(self.args.down_hook)
+
+        if not self.healthy and time.monotonic() >= self.next_restart_at:
+            self.restart()
+
+    def restart(self) -> None:
+        log(f"Restarting {self.args.service} (backoff {self.backoff}s)")
+        subprocess.run(["systemctl", "restart", self.args.service], check=False)  # noqa: S603, S607
+        self.restarts += 1
+        self.next_restart_at = time.monotonic() + self.backoff
+        self.backoff = min(self.backoff * 2, self.args.backoff_max)
+
+    @property
+    def loss(self) -> float:
+        if not self.window:
+            return 0.0
+        return 1 - sum(self.window) / len(self.window)
+
+
+def run_hook(command: str) -> None:
+    if command:
+        subprocess.run(command, shell=True, check=False)  # noqa: S602
+
+
+def write_metrics(path: str, state: HealthState, args: argparse.Namespace) -> None:
+    if not path:
+        return
+
+    labels = f'iface="{args.iface}",service="{args.service}"'
+    lines = [
+        "# HELP warp_health_up Whether the WARP tunnel is considered healthy.",
+        "# TYPE warp_health_up gauge",
+        f"warp_health_up{{{labels}}} {int(state.healthy)}",
+        "# HELP warp_health_loss_ratio Share of failed probes over the recent window.",
+        "# TYPE warp_health_loss_ratio gauge",
+        f"warp_health_loss_ratio{{{labels}}} {state.loss:.3f}",
+        "# HELP warp_health_consecutive_failures Consecutive failed probe rounds.",
+        "# TYPE warp_health_consecutive_failures gauge",
+        f"warp_health_consecutive_failures{{{labels}}} {state.failures}",
+        "# HELP warp_health_restarts_total Tunnel restarts issued by the health checker.",
+        "# TYPE warp_health_restarts_total counter",
+        f"warp_health_restarts_total{{{labels}}} {state.restarts}",
+        "# HELP warp_health_probe_latency_seconds Latency of the last successful probe per target.",
+        "# TYPE warp_health_probe_latency_seconds gauge",
+    ]
+    for target, latency in state.latency.items():
+        url = target.partition("|")[0]
+        lines.append(f'warp_health_probe_latency_seconds{{{labels},target="{url}"}} {latency:.4f}')
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iface", default="warp")
+    parser.add_argument("--service", default="cloudflare-warp")
+    parser.add_argument("--target", action="append", default=[], help="url|expect, repeatable")
+    parser.add_argument("--interval", type=float, default=15.0)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--fall", type=int, default=3, help="Failed rounds before the tunnel is unhealthy")
+    parser.add_argument("--rise", type=int, default=2, help="Good rounds before the tunnel is healthy again")
+    parser.add_argument("--backoff-base", type=float, default=30.0)
+    parser.add_argument("--backoff-max", type=float, default=600.0)
+    parser.add_argument("--loss-window", type=int, default=60, help="Number of probes the loss ratio covers")
+    parser.add_argument("--metrics", default="", help="Prometheus textfile to write after every round")
+    parser.add_argument("--up-hook", default="", help="Command run when the tunnel becomes healthy")
+    parser.add_argument("--down-hook", default="", help="Command run when the tunnel becomes unhealthy")
+    args = parser.parse_args()
+
+    syslog.openlog("warp-health")
+    targets = args.target or DEFAULT_TARGETS
+    state = HealthState(args)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    log(f"Watching {args.iface} ({args.service}) every {args.interval}s with {len(targets)} targets")
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        while not stop.is_set():
+            started = time.monotonic()
+            latencies = pool.map(lambda target: probe(args.iface, target, args.timeout), targets)
+            state.record(dict(zip(targets, latencies, strict=True)))
+            write_metrics(args.metrics, state, args)
+            stop.wait(max(0.0, args.interval - (time.monotonic() - started)))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+# usage: warp-mtu.sh probe STATE_FILE IFACE ENGINE CONFIG OVERHEAD MAX_MTU [TTL_SECONDS]
+#        warp-mtu.sh set   STATE_FILE IFACE ENGINE CONFIG MTU
+cmd=${1:?probe|set}
+STATE=${2:?state file}
+IFACE=${3:?iface}
+ENGINE=${4:?masque|wireguard}
+CFG=${5:?engine config}
+MIN_MTU=1280
+FLOOR_PATH_MTU=576
+
+log(){ logger -t warp-mtu -- "$*"; echo "$*"; }
+
+get_endpoint(){
+  case "$ENGINE" in
+    masque) jq -r '.endpoint_v4 // empty' "$CFG" 2>/dev/null || true ;;
+    wireguard) awk -F' *= *' '/^Endpoint/ {print $2; exit}' "$CFG" 2>/dev/null | sed 's/:[0-9]*$//' ;;
+  esac
+}
+
+# Two DF-set probes of the given IPv4 packet size; one reply is enough
+fits(){
+  ping -4 -n -q -M do -c 2 -i 0.2 -W 1 -s $(($2 - 28)) "$1" >/dev/null 2>&1
+}
+
+# Largest IPv4 packet that reaches the endpoint unfragmented, by binary search
+probe_path_mtu(){
+  local ep=$1 lo=$FLOOR_PATH_MTU hi=1500 mid
+  if fits "$ep" "$hi"; then echo "$hi"; return 0; fi
+  fits "$ep" "$lo" || return 1
+  while [ $((hi - lo)) -gt 1 ]; do
+    mid=$(((lo + hi) / 2))
+    if fits "$ep" "$mid"; then lo=$mid; else hi=$mid; fi
+  done
+  echo "$lo"
+}
+
+record(){
+  mkdir -p "$(dirname "$STATE")"
+  cat > "$STATE.tmp" <<STATE
+WARP_MTU=$1
+PATH_MTU=$2
+ENDPOINT=$3
+ENGINE=$ENGINE
+MEASURED_AT=$(date +%s)
+STATE
+  mv "$STATE.tmp" "$STATE"
+}
+
+# Recorded value of KEY in the state file, empty if missing
+recorded(){
+  sed -n "s/^$1=//p" "$STATE" 2>/dev/null || true
+}
+
+# Live interface MTU now; the engine config for the next tunnel start
+apply(){
+  local mtu=$1
+  if ip link show dev "$IFACE" >/dev/null 2>&1; then
+    ip link set dev "$IFACE" mtu "$mtu"
+  fi
+  if [ "$ENGINE" = wireguard ] && [ -f "$CFG" ]; then
+    sed -i --follow-symlinks "s/^MTU = .*/MTU = $mtu/" "$CFG"
+  fi
+}
+
+case "$cmd" in
+  probe)
+    OVERHEAD=${6:?encapsulation overhead}
+    MAX_MTU=${7:?max tunnel mtu}
+    TTL=${8:-0}
+
+    # Nothing to discover when the engine cannot go above the IPv6 minimum
+    if [ "$MAX_MTU" -le "$MIN_MTU" ]; then
+      record "$MAX_MTU" "" ""
+      apply "$MAX_MTU"
+      exit 0
+    fi
+
+    EP=$(get_endpoint)
+    if [ -z "$EP" ]; then
+      log "No $ENGINE endpoint found in $CFG; keeping the recorded MTU"
+      exit 0
+    fi
+
+    # Reuse a recent measurement towards the same endpoint with the same engine
+    MTU=$(recorded WARP_MTU)
+    MEASURED_AT=$(recorded MEASURED_AT)
+    if [ -n "$MTU" ] && [ -n "$MEASURED_AT" ] && [ "$(recorded ENDPOINT)" = "$EP" ] \
+        && [ "$(recorded ENGINE)" = "$ENGINE" ] && [ $(($(date +%s) - MEASURED_AT)) -lt "$TTL" ]; then
+      apply "$MTU"
+      exit 0
+    fi
+
+    if ! PATH_MTU=$(probe_path_mtu "$EP"); then
+      log "$EP does not answer DF pings; keeping the recorded MTU"
+      exit 0
+    fi
+
+    MTU=$((PATH_MTU - OVERHEAD))
+    [ "$MTU" -gt "$MAX_MTU" ] && MTU=$MAX_MTU
+    if [ "$MTU" -lt "$MIN_MTU" ]; then
+      log "Path MTU $PATH_MTU leaves $MTU for $IFACE; raising to the IPv6 minimum $MIN_MTU"
+      MTU=$MIN_MTU
+    fi
+
+    record "$MTU" "$PATH_MTU" "$EP"
+    apply "$MTU"
+    log "$IFACE MTU set to $MTU (path MTU to $EP is $PATH_MTU, overhead $OVERHEAD)"
+    ;;
+
+  set)
+    MTU=${6:?mtu}
+    record "$MTU" "" ""
+    apply "$MTU"
+    log "$IFACE MTU pinned to $MTU"
+    ;;
+
+  *)
+    echo "usage: $0 {probe|set} STATE_FILE IFACE ENGINE CONFIG ..." >&2
+    exit 1
+    ;;
+esac
@@ -0,0 +1,162 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+# usage: warp-route.sh {up|down} IFACE
+#        warp-route.sh {refresh|flush}
+cmd=${1:?up|down|refresh|flush}
+IFACE=${2:-}
+CONF=${WARP_ROUTE_CONF:-/etc/nullforge/warp-route.env}
+
+# shellcheck source=/dev/null
+. "$CONF"
+TABLE=warp
+TID=${TABLE_ID:-123}
+PRIO_MARK=${PRIO_MARK:-12190}
+NFT_TABLE=nullforge_warp_route
+
+log(){ logger -t warp-route -- "$*"; }
+
+ensure_table(){
+  mkdir -p /etc/iproute2
+  grep -qE "^[[:space:]]*$TID[[:space:]]+$TABLE$" /etc/iproute2/rt_tables \
+    || echo "$TID $TABLE" >> /etc/iproute2/rt_tables
+}
+
+csv(){
+  tr -s ' \n' '\n\n' | sed '/^$/d' | sort -u | paste -sd, -
+}
+
+resolve(){
+  local family=$1 dom
+  for dom in $DOMAINS; do
+    getent "ahosts$family" "$dom" 2>/dev/null | awk '$1 !~ /^::ffff:/ {print $1}' || true
+  done
+}
+
+set_block(){
+  local name=$1 type=$2 elements=$3
+  echo "  set $name {"
+  echo "    type $type; flags interval; auto-merge;"
+  [ -n "$elements" ] && echo "    elements = { $elements }"
+  echo "  }"
+}
+
+# The whole table is replaced in one nft transaction, so rules never apply half-way
+build_ruleset(){
+  local dst4 dst6 members unit cgroup rules=()
+  dst4=$({ echo "$CIDRS4"; resolve v4; } | csv)
+  dst6=$({ echo "$CIDRS6"; resolve v6; } | csv)
+  members=$(for m in $MEMBERS; do printf '"%s"\n' "$m"; done | paste -sd, -)
+
+  rules+=("ip daddr @dst4 meta mark set $FWMARK")
+  rules+=("ip6 daddr @dst6 meta mark set $FWMARK")
+
+  echo "table inet $NFT_TABLE"
+  echo "delete table inet $NFT_TABLE"
+  echo "table inet $NFT_TABLE {"
+  set_block dst4 ipv4_addr "$dst4"
+  set_block dst6 ipv6_addr "$dst6"
+
+  echo "  chain prerouting {"
+  echo "    type filter hook prerouting priority mangle; policy accept;"
+  printf '    %s\n' "${rules[@]}"
+  echo "  }"
+
+  if [ -n "$USERS" ]; then
+    rules+=("meta skuid { $(echo "$USERS" | csv) } meta mark set $FWMARK")
+  fi
+  for unit in $UNITS; do
+    # cgroup paths are resolved when the rule loads, so only match running units
+    cgroup=$(systemctl show -p ControlGroup --value "$unit" 2>/dev/null || true)
+    cgroup=${cgroup#/}
+    if [ -n "$cgroup" ] && [ -d "/sys/fs/cgroup/$cgroup" ]; then
+      rules+=("socket cgroupv2 level $(echo "$cgroup" | awk -F/ '{print NF}') \"$cgroup\" meta mark set $FWMARK")
+    fi
+  done
+
+  echo "  chain output {"
+  echo "    type route hook output priority mangle; policy accept;"
+  printf '    %s\n' "${rules[@]}"
+  echo "  }"
+
+  # Local sockets picked their source address from the main table before the re-route
+  echo "  chain postrouting {"
+  echo "    type nat hook postrouting priority srcnat; policy accept;"
+  echo "    meta mark $FWMARK oifname { $members } masquerade"
+  echo "  }"
+  echo "}"
+}
+
+any_other_member_up(){
+  local m
+  for m in $MEMBERS; do
+    [ "$m" = "$1" ] && continue
+    [ -n "$(ip link show dev "$m" up 2>/dev/null)" ] && return 0
+  done
+  return 1
+}
+
+case "$cmd" in
+  up)
+    : "${IFACE:?iface}"
+    ensure_table
+    build_ruleset | nft -f -
+
+    # Replies to re-routed flows arrive on the tunnel; loose reverse-path checks accept them
+    sysctl -qw net.ipv4.conf.all.src_valid_mark=1
+    sysctl -qw "net.ipv4.conf.${IFACE}.rp_filter=2" 2>/dev/null || true
+
+    # With multiple tunnels the ECMP script owns the table routes and the fwmark rule
+    if [ "${MULTI:-0}" != 1 ]; then
+      ip -4 route replace default dev "$IFACE" table "$TABLE"
+      if [ -n "$(ip -6 -o addr show dev "$IFACE" scope global 2>/dev/null)" ]; then
+        ip -6 route replace default dev "$IFACE" table "$TABLE"
+      fi
+      for fam in -4 -6; do
+        ip "$fam" rule del pref "$PRIO_MARK" 2>/dev/null || true
+        ip "$fam" rule add pref "$PRIO_MARK" fwmark "$FWMARK" lookup "$TABLE"
+      done
+    fi
+
+    log "Selective WARP routing up on $IFACE: fwmark=$FWMARK table=$TABLE"
+    ;;
+
+  down)
+    : "${IFACE:?iface}"
+    if [ "${MULTI:-0}" = 1 ] && any_other_member_up "$IFACE"; then
+      exit 0
+    fi
+
+    nft delete table inet "$NFT_TABLE" 2>/dev/null || true
+    if [ "${MULTI:-0}" != 1 ]; then
+      for fam in -4 -6; do
+        ip "$fam" rule del pref "$PRIO_MARK" 2>/dev/null || true
+        ip "$fam" route del default dev "$IFACE" table "$TABLE" 2>/dev/null || true
+      done
+    fi
+
+    log "Selective WARP routing down: table $NFT_TABLE removed"
+    ;;
+
+  refresh)
+    # Only re-resolve while the tunnel has the rules installed
+    if nft list table inet "$NFT_TABLE" >/dev/null 2>&1; then
+      build_ruleset | nft -f -
+    fi
+    ;;
+
+  flush)
+    nft delete table inet "$NFT_TABLE" 2>/dev/null || true
+    if [ "${MULTI:-0}" != 1 ]; then
+      for fam in -4 -6; do
+        ip "$fam" rule del pref "$PRIO_MARK" 2>/dev/null || true
+      done
+    fi
+    ;;
+
+  *)
+    echo "usage: $0 {up|down IFACE|refresh|flush}" >&2
+    exit 1
+    ;;
+esac
@@ -0,0 +1,98 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+# usage: warp-select.sh STATE_FILE LATENCY_URL THROUGHPUT_URL ENGINE:SERVICE:IFACE:ALL_SERVICES...
+# The engine is measured on SERVICE/IFACE; ALL_SERVICES (comma-separated) are its tunnel instances.
+STATE=${1:?state file}
+LATENCY_URL=${2:?latency url}
+THROUGHPUT_URL=${3:?throughput url}
+shift 3
+WAIT_SECS=30
+PROBES=5
+
+log(){ logger -t warp-select -- "$*"; echo "$*"; }
+
+wait_for_tunnel(){
+  local iface=$1 i=0
+  while [ $i -lt "$WAIT_SECS" ]; do
+    if curl -fsS -o /dev/null --interface "$iface" --max-time 5 "$LATENCY_URL" 2>/dev/null; then
+      return 0
+    fi
+    sleep 1; i=$((i+1))
+  done
+  return 1
+}
+
+# Median of several small requests, in milliseconds
+measure_latency(){
+  local iface=$1 samples=()
+  for _ in $(seq "$PROBES"); do
+    samples+=("$(curl -fsS -o /dev/null --interface "$iface" --max-time 10 \
+      -w '%{time_starttransfer}' "$LATENCY_URL" 2>/dev/null || echo 99)")
+  done
+  printf '%s\n' "${samples[@]}" | sort -n | awk '{a[NR]=$1} END {printf "%.1f", a[int((NR+1)/2)]*1000}'
+}
+
+# Download throughput in Mbit/s
+measure_throughput(){
+  local iface=$1 bps
+  bps=$(curl -fsS -o /dev/null --interface "$iface" --max-time 60 \
+    -w '%{speed_download}' "$THROUGHPUT_URL" 2>/dev/null || echo 0)
+  awk -v b="$bps" 'BEGIN {printf "%.1f", b*8/1000000}'
+}
+
+best_engine="" best_tput=-1 best_lat=0 results=()
+for candidate in "$@"; do
+  IFS=: read -r engine service iface _ <<<"$candidate"
+  for other in "$@"; do
+    IFS=: read -r _ _ _ other_services <<<"$other"
+    # shellcheck disable=SC2086
+    systemctl stop ${other_services//,/ } 2>/dev/null || true
+  done
+
+  log "Measuring $engine ($service on $iface)"
+  systemctl start "$service" || true
+  if ! wait_for_tunnel "$iface"; then
+    log "$engine tunnel did not come up within ${WAIT_SECS}s"
+    results+=("${engine^^}_LATENCY_MS=" "${engine^^}_THROUGHPUT_MBPS=0")
+    systemctl stop "$service" || true
+    continue
+  fi
+
+  lat=$(measure_latency "$iface")
+  tput=$(measure_throughput "$iface")
+  systemctl stop "$service" || true
+  log "$engine: latency=${lat}ms throughput=${tput}Mbit/s"
+  results+=("${engine^^}_LATENCY_MS=$lat" "${engine^^}_THROUGHPUT_MBPS=$tput")
+
+  # Higher throughput wins; within 5% the lower latency wins
+  if awk -v t="$tput" -v bt="$best_tput" -v l="$lat" -v bl="$best_lat" \
+    'BEGIN {exit !(t > bt*1.05 || (t >= bt*0.95 && l < bl))}'; then
+    best_engine=$engine best_tput=$tput best_lat=$lat best_candidate=$candidate
+  fi
+done
+
+if [ -z "$best_engine" ]; then
+  log "No engine produced a working tunnel; leaving selection unrecorded"
+  exit 1
+fi
+
+for candidate in "$@"; do
+  IFS=: read -r _ _ _ services <<<"$candidate"
+  # shellcheck disable=SC2086
+  [ "$candidate" = "$best_candidate" ] || systemctl disable ${services//,/ } 2>/dev/null || true
+done
+# Every tunnel instance of the winner, not just the measured one
+IFS=: read -r _ _ _ services <<<"$best_candidate"
+# shellcheck disable=SC2086
+systemctl enable --now ${services//,/ }
+
+mkdir -p "$(dirname "$STATE")"
+{
+  echo "WARP_ENGINE=$best_engine"
+  echo "SELECTED_AT=$(date -u +%Y-%m-%dT%H:%M:%SZ)"
+  printf '%s\n' "${results[@]}"
+} > "$STATE"
+
+log "Selected $best_engine (throughput=${best_tput}Mbit/s latency=${best_lat}ms)"
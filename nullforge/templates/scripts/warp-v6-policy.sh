@@ -10,6 +10,7 @@ TID=123
 PRIO=12300
 PRIO_OIF=$((PRIO+10))
 WAIT_SECS=15
+EP6_STATE=${RUNTIME_DIRECTORY:-/run/warp-policy}/${IFACE}.ep6
 
 log(){ logger -t warp-policy -- "$*"; }
 
@@ -52,7 +53,13 @@ case "$cmd" in
       GW6=$(ip -6 route show default | awk '/default/ {print $3; exit}')
       DEV=$(ip -6 route show default | awk '/default/ {print $5; exit}')
       if [ -n "${GW6}" ] && [ -n "${DEV}" ]; then
+        # The endpoint may be re-pinned while the tunnel is up; remember which one was routed
+        OLD_EP6=$(cat "$EP6_STATE" 2>/dev/null || true)
+        if [ -n "$OLD_EP6" ] && [ "$OLD_EP6" != "$EP6" ]; then
+          ip -6 route del "${OLD_EP6}/128" 2>/dev/null || true
+        fi
         ip -6 route replace "${EP6}/128" via "$GW6" dev "$DEV"
+        echo "$EP6" > "$EP6_STATE" 2>/dev/null || true
       fi
     fi
 
@@ -70,10 +77,11 @@ case "$cmd" in
     ip -6 rule del pref "$PRIO" 2>/dev/null || true
     ip -6 rule del pref "$PRIO_OIF" 2>/dev/null || true
 
-    EP6=$(get_ep6 || true)
+    EP6=$(cat "$EP6_STATE" 2>/dev/null || get_ep6 || true)
     if [ -n "${EP6:-}" ]; then
       ip -6 route del "${EP6}/128" 2>/dev/null || true
     fi
+    rm -f "$EP6_STATE"
 
     ip -6 route flush table "$TABLE" 2>/dev/null || true
 
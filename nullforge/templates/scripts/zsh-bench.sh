@@ -0,0 +1,35 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+# usage: zsh-bench.sh LABEL [OUTPUT] [RUNS]
+# Times `zsh -i -c exit` for the calling user and prints a JSON report,
+# also written to OUTPUT when given. One untimed warm-up run fills caches.
+LABEL=${1:?label}
+OUTPUT=${2:-}
+RUNS=${3:-10}
+
+command -v zsh >/dev/null || { echo "zsh-bench: zsh is not installed" >&2; exit 1; }
+
+zsh -i -c exit >/dev/null 2>&1 || true
+samples=()
+for _ in $(seq "$RUNS"); do
+    start=$(date +%s%N)
+    zsh -i -c exit >/dev/null 2>&1 || true
+    end=$(date +%s%N)
+    samples+=($(( (end - start) / 1000 )))
+done
+
+report=$(printf '%s\n' "${samples[@]}" | sort -n | awk -v label="$LABEL" -v user="$(id -un)" -v ts="$(date +%s)" '
+    { us[NR] = $1; sum += $1 }
+    END {
+        printf "{\"label\": \"%s\", \"user\": \"%s\", \"runs\": %d, ", label, user, NR
+        printf "\"min_ms\": %.1f, \"median_ms\": %.1f, ", us[1] / 1000, us[int((NR + 1) / 2)] / 1000
+        printf "\"mean_ms\": %.1f, \"max_ms\": %.1f, \"timestamp\": %d}\n", sum / NR / 1000, us[NR] / 1000, ts
+    }')
+
+echo "$report"
+if [ -n "$OUTPUT" ]; then
+    mkdir -p "$(dirname "$OUTPUT")"
+    echo "$report" > "$OUTPUT"
+fi